@@ -0,0 +1,194 @@
+import numpy as np
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from app.gallery import Gallery, ENCODING_DIM, euclidean_distances
+
+
+def kmeans(sample: np.ndarray, k: int, iterations: int, rng: np.random.Generator) -> np.ndarray:
+    """K-means (Lloyd) sobre a amostra; retorna os k centróides (k, D) float32"""
+    sample = np.ascontiguousarray(sample, dtype=np.float32)
+    n = sample.shape[0]
+    centroids = sample[rng.choice(n, size=k, replace=False)].copy()
+
+    for _ in range(iterations):
+        assignment = euclidean_distances(sample, centroids).argmin(axis=1)
+        counts = np.bincount(assignment, minlength=k)
+        filled = counts > 0
+        # Soma por centróide com reduceat sobre a amostra ordenada (np.add.at é lento)
+        order = np.argsort(assignment, kind="stable")
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])[filled]
+        sums = np.add.reduceat(sample[order], starts, axis=0)
+        centroids[filled] = sums / counts[filled, None]
+        # Centróides vazios são reiniciados em pontos aleatórios da amostra
+        empty = np.flatnonzero(~filled)
+        if empty.size:
+            centroids[empty] = sample[rng.choice(n, size=empty.size, replace=False)]
+
+    return centroids
+
+
+class _InvertedList:
+    """
+    Lista invertida de um centróide: vetores contíguos + face_ids.
+    Imutável: alterações criam uma lista nova (copy-on-write, O(tamanho da lista)),
+    então buscas concorrentes nunca veem uma lista pela metade.
+    """
+
+    def __init__(self, face_ids: Sequence[str] = (), vectors: Optional[np.ndarray] = None):
+        self.face_ids = list(face_ids)
+        if vectors is None:
+            vectors = np.empty((0, ENCODING_DIM), dtype=np.float32)
+        self.vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        self.sq_norms = np.einsum("ij,ij->i", self.vectors, self.vectors)
+
+    def __len__(self) -> int:
+        return len(self.face_ids)
+
+    def with_appended(self, face_ids: Sequence[str], vectors: np.ndarray) -> "_InvertedList":
+        return _InvertedList(self.face_ids + list(face_ids), np.concatenate([self.vectors, vectors]))
+
+    def with_removed(self, position: int) -> Tuple["_InvertedList", Optional[str]]:
+        """Remove trocando com o último; retorna a nova lista e o face_id que mudou de posição"""
+        last = len(self.face_ids) - 1
+        face_ids = list(self.face_ids)
+        vectors = self.vectors.copy()
+        moved = None
+        if position != last:
+            vectors[position] = vectors[last]
+            face_ids[position] = face_ids[last]
+            moved = face_ids[position]
+        face_ids.pop()
+        return _InvertedList(face_ids, vectors[:last]), moved
+
+
+class IVFIndex:
+    """
+    Índice aproximado IVF (inverted file) para galerias muito grandes.
+
+    Os encodings são agrupados por k-means em `nlist` centróides. Na busca,
+    apenas as `nprobe` listas mais próximas de cada probe são varridas, e os
+    candidatos são reordenados pela distância euclidiana exata, de modo que a
+    tolerância continua com a mesma semântica do matching exato (o que pode
+    mudar é apenas o recall, caso o vizinho mais próximo esteja fora das
+    listas visitadas).
+    """
+
+    def __init__(self, nlist: Optional[int] = None, nprobe: int = 8, kmeans_iterations: int = 10, seed: int = 0):
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.kmeans_iterations = kmeans_iterations
+        self.seed = seed
+        self.centroids: Optional[np.ndarray] = None
+        self._lists: List[_InvertedList] = []
+        self._locations: Dict[str, Tuple[int, int]] = {}
+        self.trained_size = 0
+
+    def __len__(self) -> int:
+        return len(self._locations)
+
+    @property
+    def is_trained(self) -> bool:
+        return self.centroids is not None
+
+    def train(self, matrix: np.ndarray):
+        """Calcula os centróides com k-means (Lloyd) sobre uma amostra da galeria"""
+        matrix = np.asarray(matrix, dtype=np.float32)
+        n = matrix.shape[0]
+        nlist = self.nlist or max(1, int(np.sqrt(n)))
+        nlist = min(nlist, n)
+        rng = np.random.default_rng(self.seed)
+
+        # 32 pontos por centróide bastam para posicioná-los
+        sample_size = min(n, nlist * 32)
+        sample = matrix[rng.choice(n, size=sample_size, replace=False)]
+
+        self.centroids = kmeans(sample, nlist, self.kmeans_iterations, rng)
+        self._lists = [_InvertedList() for _ in range(nlist)]
+        self._locations = {}
+        self.trained_size = n
+
+    def build(self, gallery: Gallery):
+        """Treina os centróides e insere toda a galeria"""
+        self.train(gallery.matrix)
+        self.add_many(gallery.face_ids, gallery.matrix)
+
+    def add_many(self, face_ids: Sequence[str], vectors: np.ndarray):
+        if not len(face_ids):
+            return
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, ENCODING_DIM)
+        for face_id in face_ids:
+            if face_id in self._locations:
+                self.remove(face_id)
+
+        assignment = euclidean_distances(vectors, self.centroids).argmin(axis=1)
+        # Agrupa por lista para copiar cada lista afetada uma única vez
+        for list_no in np.unique(assignment).tolist():
+            rows = np.flatnonzero(assignment == list_no)
+            new_ids = [face_ids[row] for row in rows.tolist()]
+            current = self._lists[list_no]
+            for offset, face_id in enumerate(new_ids):
+                self._locations[face_id] = (list_no, len(current) + offset)
+            self._lists[list_no] = current.with_appended(new_ids, vectors[rows])
+
+    def add(self, face_id: str, vector: np.ndarray):
+        """Insere (ou substitui) um encoding no índice"""
+        self.add_many([face_id], vector)
+
+    def remove(self, face_id: str) -> bool:
+        """Remove um encoding do índice (copia apenas a lista afetada)"""
+        location = self._locations.pop(face_id, None)
+        if location is None:
+            return False
+        list_no, position = location
+        self._lists[list_no], moved = self._lists[list_no].with_removed(position)
+        if moved is not None:
+            self._locations[moved] = (list_no, position)
+        return True
+
+    def sync(self, gallery: Gallery):
+        """Aplica incrementalmente as inserções/remoções entre o índice e a galeria"""
+        current = set(gallery.face_ids)
+        for face_id in [f for f in self._locations if f not in current]:
+            self.remove(face_id)
+
+        added = [row for row, face_id in enumerate(gallery.face_ids) if face_id not in self._locations]
+        if added:
+            self.add_many([gallery.face_ids[row] for row in added], gallery.matrix[added])
+
+    def search(self, probes: np.ndarray, nprobe: Optional[int] = None) -> List[Tuple[str, float]]:
+        """
+        Retorna, para cada probe, (face_id, distância exata) do candidato mais
+        próximo entre as listas visitadas, ou ("", inf) se não houver candidatos.
+        """
+        probes = np.asarray(probes, dtype=np.float32).reshape(-1, ENCODING_DIM)
+        nprobe = min(nprobe or self.nprobe, len(self._lists))
+
+        coarse = euclidean_distances(probes, self.centroids)
+        if nprobe < coarse.shape[1]:
+            probed = np.argpartition(coarse, nprobe - 1, axis=1)[:, :nprobe]
+        else:
+            probed = np.broadcast_to(np.arange(coarse.shape[1]), coarse.shape)
+
+        results = []
+        # Referência local: o escritor troca listas inteiras, nunca as altera
+        all_lists = self._lists
+        for probe, list_nos in zip(probes, probed):
+            lists = [lst for lst in (all_lists[i] for i in list_nos.tolist()) if len(lst)]
+            if not lists:
+                results.append(("", float("inf")))
+                continue
+
+            # Re-rank exato dos candidatos das listas visitadas
+            vectors = np.concatenate([lst.vectors for lst in lists])
+            sq_norms = np.concatenate([lst.sq_norms for lst in lists])
+            dist = sq_norms - 2.0 * (vectors @ probe) + float(np.dot(probe, probe))
+            best = int(dist.argmin())
+            distance = float(np.sqrt(max(dist[best], 0.0)))
+
+            for lst in lists:
+                if best < len(lst):
+                    results.append((lst.face_ids[best], distance))
+                    break
+                best -= len(lst)
+
+        return results
@@ -0,0 +1,32 @@
+import hmac
+import os
+from typing import Optional
+
+from fastapi import HTTPException, Security
+from fastapi.security import APIKeyHeader
+
+api_key_header = APIKeyHeader(name="x-api-key", auto_error=False)
+
+
+def get_api_key() -> str:
+    # Lida a cada chamada: o .env é carregado em app.main depois de importar as rotas
+    return os.getenv("API_KEY", "your-secret-api-key-123")
+
+
+def is_authorized(header_key: Optional[str], query_key: Optional[str] = None) -> bool:
+    """
+    Valida a API key enviada no header x-api-key ou, para clientes que não
+    enviam headers (EventSource e WebSocket do navegador), em ?api_key=.
+    """
+    key = header_key or query_key
+    return bool(key) and hmac.compare_digest(key.encode("utf-8"), get_api_key().encode("utf-8"))
+
+
+def verify_api_key(api_key: str = Security(api_key_header)):
+    """Dependência das rotas protegidas: exige a API key no header"""
+    if not is_authorized(api_key):
+        raise HTTPException(
+            status_code=401,
+            detail="API key inválida ou ausente. Forneça o header 'x-api-key'."
+        )
+    return api_key
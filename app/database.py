@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, Text, Index, func
+from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, LargeBinary, Index, func, update, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, scoped_session
 from sqlalchemy.pool import StaticPool
@@ -18,7 +18,7 @@ class TrainedFace(Base):
     id = Column(Integer, primary_key=True, index=True)
     face_id = Column(String(255), unique=True, index=True, nullable=False)
     name = Column(String(255), nullable=False, index=True)
-    encoding = Column(Text, nullable=False)  # JSON serialized encoding
+    encoding = Column(LargeBinary, nullable=False)  # float32 binário (ver app.utils.encode_face_encoding)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
     last_seen = Column(DateTime, nullable=True, index=True)
     
@@ -88,7 +88,7 @@ class Database:
     def get_session(self):
         return self.SessionLocal()
     
-    def add_trained_face(self, face_id: str, name: str, encoding: str):
+    def add_trained_face(self, face_id: str, name: str, encoding: bytes):
         session = self.get_session()
         try:
             face = TrainedFace(
@@ -98,10 +98,45 @@ class Database:
             )
             session.add(face)
             session.commit()
+            # Carrega os atributos (ex.: id) antes de fechar a sessão
+            session.refresh(face)
             return face
         finally:
             session.close()
     
+    def add_trained_faces(self, faces: List[tuple]) -> List[int]:
+        """
+        Grava vários rostos (face_id, name, encoding) em uma única transação.
+        Retorna os ids das linhas, na mesma ordem. Se qualquer linha falhar
+        (ex.: face_id repetido), nada é gravado.
+        """
+        if not faces:
+            return []
+        session = self.get_session()
+        try:
+            rows = [
+                TrainedFace(face_id=face_id, name=name, encoding=encoding)
+                for face_id, name, encoding in faces
+            ]
+            session.add_all(rows)
+            session.flush()
+            ids = [row.id for row in rows]
+            session.commit()
+            return ids
+        except Exception as e:
+            session.rollback()
+            raise e
+        finally:
+            session.close()
+    
+    def get_trained_face_ids(self) -> set:
+        """Conjunto dos face_id já cadastrados (só a coluna, sem montar objetos ORM)"""
+        session = self.get_session()
+        try:
+            return {face_id for face_id, in session.query(TrainedFace.face_id)}
+        finally:
+            session.close()
+    
     def get_all_trained_faces(self):
         session = self.get_session()
         try:
@@ -109,6 +144,27 @@ class Database:
         finally:
             session.close()
     
+    def get_gallery_rows(self):
+        """Retorna (id, face_id, name, encoding) de todos os rostos, sem montar objetos ORM"""
+        session = self.get_session()
+        try:
+            return session.query(
+                TrainedFace.id, TrainedFace.face_id, TrainedFace.name, TrainedFace.encoding
+            ).order_by(TrainedFace.id).all()
+        finally:
+            session.close()
+    
+    def get_gallery_fingerprint(self):
+        """Assinatura barata da tabela de rostos: (contagem, maior id)"""
+        session = self.get_session()
+        try:
+            count, max_id = session.query(
+                func.count(TrainedFace.id), func.max(TrainedFace.id)
+            ).one()
+            return count, max_id or 0
+        finally:
+            session.close()
+    
     def get_trained_face_by_id(self, face_id: str):
         session = self.get_session()
         try:
@@ -139,6 +195,30 @@ class Database:
         finally:
             session.close()
     
+    def add_recognition_logs(self, recognitions: List[tuple]):
+        """
+        Grava vários reconhecimentos (face_id, name, confidence) e atualiza o
+        last_seen dos rostos em uma única transação.
+        """
+        if not recognitions:
+            return
+        session = self.get_session()
+        try:
+            now = datetime.utcnow()
+            session.add_all([
+                RecognitionLog(face_id=face_id, name=name, confidence=confidence, timestamp=now)
+                for face_id, name, confidence in recognitions
+            ])
+            session.query(TrainedFace).filter(
+                TrainedFace.face_id.in_({face_id for face_id, _, _ in recognitions})
+            ).update({TrainedFace.last_seen: now}, synchronize_session=False)
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            raise e
+        finally:
+            session.close()
+    
     def get_trained_faces_count(self):
         session = self.get_session()
         try:
@@ -284,6 +364,54 @@ class Database:
         finally:
             session.close()
 
+    
+    def migrate_encodings_to_binary(self, batch_size: int = 500, pause_seconds: float = 0.0) -> int:
+        """
+        Converte encodings no formato JSON legado para o formato binário.
+        Processa em lotes pequenos, cada um em sua própria transação, para que a
+        API continue lendo e gravando durante a migração. Retorna o total convertido.
+        """
+        from app.utils import encode_face_encoding, decode_face_encoding
+        import time
+        
+        converted = 0
+        last_id = 0
+        
+        while True:
+            session = self.get_session()
+            try:
+                rows = session.query(TrainedFace.id, TrainedFace.encoding).filter(
+                    TrainedFace.id > last_id,
+                    func.typeof(TrainedFace.encoding) == "text"
+                ).order_by(TrainedFace.id).limit(batch_size).all()
+                
+                if not rows:
+                    break
+                
+                session.execute(update(TrainedFace), [
+                    {"id": row.id, "encoding": encode_face_encoding(decode_face_encoding(row.encoding))}
+                    for row in rows
+                ])
+                session.commit()
+                
+                converted += len(rows)
+                last_id = rows[-1].id
+            except Exception as e:
+                session.rollback()
+                raise e
+            finally:
+                session.close()
+            
+            if pause_seconds:
+                time.sleep(pause_seconds)
+        
+        return converted
+    
+    def vacuum(self):
+        """Compacta o arquivo do banco (recupera o espaço liberado pela migração)"""
+        with self.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text("VACUUM"))
+
 
 # Singleton instance
 db = Database()
@@ -0,0 +1,212 @@
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+# Caixa (top, right, bottom, left), no formato do face_recognition
+Box = Tuple[int, int, int, int]
+
+DETECTOR_NAMES = ["hog", "cascade", "dnn", "cascade_hog"]
+
+try:
+    import face_recognition
+except ImportError:
+    face_recognition = None
+
+
+def _gray(image: np.ndarray) -> np.ndarray:
+    return cv2.cvtColor(image, cv2.COLOR_RGB2GRAY) if image.ndim == 3 else image
+
+
+def _iou(a: Box, b: Box) -> float:
+    top, right, bottom, left = max(a[0], b[0]), min(a[1], b[1]), min(a[2], b[2]), max(a[3], b[3])
+    inter = max(0, right - left) * max(0, bottom - top)
+    union = (a[1] - a[3]) * (a[2] - a[0]) + (b[1] - b[3]) * (b[2] - b[0]) - inter
+    return inter / union if union else 0.0
+
+
+class HogDetector:
+    """dlib HOG (face_recognition.face_locations): o detector original"""
+
+    name = "hog"
+
+    def __init__(self, upsample: int = 1):
+        self.upsample = upsample
+
+    def detect(self, image: np.ndarray) -> List[Box]:
+        if face_recognition is None:
+            raise ValueError("face-recognition não está instalado")
+        return face_recognition.face_locations(image, self.upsample)
+
+
+class CascadeDetector:
+    """
+    Cascata Haar/LBP do OpenCV: bem mais rápida que o HOG na CPU, com mais
+    falsos positivos e menos tolerante a rostos de perfil.
+    """
+
+    name = "cascade"
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        scale_factor: float = 1.1,
+        min_neighbors: int = 5,
+        min_size: int = 30
+    ):
+        self.path = path or os.path.join(cv2.data.haarcascades, "haarcascade_frontalface_default.xml")
+        if cv2.CascadeClassifier(self.path).empty():
+            raise ValueError(f"Não foi possível carregar a cascata: {self.path}")
+        self.scale_factor = scale_factor
+        self.min_neighbors = min_neighbors
+        self.min_size = min_size
+        # CascadeClassifier não é seguro entre threads: um por thread
+        self._local = threading.local()
+
+    def detect(self, image: np.ndarray) -> List[Box]:
+        classifier = getattr(self._local, "classifier", None)
+        if classifier is None:
+            classifier = self._local.classifier = cv2.CascadeClassifier(self.path)
+
+        gray = cv2.equalizeHist(_gray(image))
+        rects = classifier.detectMultiScale(
+            gray,
+            scaleFactor=self.scale_factor,
+            minNeighbors=self.min_neighbors,
+            minSize=(self.min_size, self.min_size)
+        )
+        return [(int(y), int(x + w), int(y + h), int(x)) for x, y, w, h in rects]
+
+
+class DnnDetector:
+    """
+    Detector SSD do módulo DNN do OpenCV a partir de um arquivo local, por
+    exemplo res10_300x300_ssd_iter_140000.caffemodel + deploy.prototxt
+    (qualquer formato aceito por cv2.dnn.readNet com saída SSD [1, 1, N, 7]).
+    """
+
+    name = "dnn"
+
+    def __init__(
+        self,
+        model: str,
+        config: Optional[str] = None,
+        confidence: float = 0.5,
+        input_size: int = 300,
+        mean: Tuple[float, float, float] = (104.0, 177.0, 123.0)
+    ):
+        if not model or not os.path.exists(model):
+            raise ValueError(f"Modelo do detector DNN não encontrado: {model!r} (defina DETECTOR_DNN_MODEL)")
+        self.model = model
+        self.config = config or ""
+        self.confidence = confidence
+        self.input_size = input_size
+        self.mean = mean
+        # cv2.dnn.Net não é seguro entre threads: uma rede por thread
+        self._local = threading.local()
+        self._net()
+
+    def _net(self):
+        net = getattr(self._local, "net", None)
+        if net is None:
+            net = self._local.net = cv2.dnn.readNet(self.model, self.config)
+        return net
+
+    def detect(self, image: np.ndarray) -> List[Box]:
+        bgr = cv2.cvtColor(image, cv2.COLOR_RGB2BGR) if image.ndim == 3 else cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+        height, width = bgr.shape[:2]
+        size = (self.input_size, self.input_size)
+        net = self._net()
+        net.setInput(cv2.dnn.blobFromImage(cv2.resize(bgr, size), 1.0, size, self.mean))
+        detections = net.forward().reshape(-1, 7)
+
+        boxes = []
+        for _, _, score, x1, y1, x2, y2 in detections:
+            if score < self.confidence:
+                continue
+            left, right = max(0, int(x1 * width)), min(width, int(x2 * width))
+            top, bottom = max(0, int(y1 * height)), min(height, int(y2 * height))
+            if right > left and bottom > top:
+                boxes.append((top, right, bottom, left))
+        return boxes
+
+
+class CascadeFilterDetector:
+    """
+    Cascata como pré-filtro: o detector barato propõe regiões (com poucos
+    vizinhos, para perder pouco) e o dlib HOG só confirma dentro de cada uma,
+    com margem. Sem propostas, o HOG nem roda. As caixas finais são as do HOG,
+    então os encodings não mudam em relação ao detector original.
+    """
+
+    name = "cascade_hog"
+
+    def __init__(self, proposer, confirmer: Optional[HogDetector] = None, padding: float = 0.5):
+        self.proposer = proposer
+        self.confirmer = confirmer or HogDetector()
+        # Margem em volta de cada proposta, relativa ao tamanho dela
+        self.padding = padding
+
+    def detect(self, image: np.ndarray) -> List[Box]:
+        height, width = image.shape[:2]
+        boxes: List[Box] = []
+        for top, right, bottom, left in self.proposer.detect(image):
+            pad_y = int((bottom - top) * self.padding)
+            pad_x = int((right - left) * self.padding)
+            y0, y1 = max(0, top - pad_y), min(height, bottom + pad_y)
+            x0, x1 = max(0, left - pad_x), min(width, right + pad_x)
+            for t, r, b, l in self.confirmer.detect(image[y0:y1, x0:x1]):
+                box = (t + y0, r + x0, b + y0, l + x0)
+                # Propostas sobrepostas podem confirmar a mesma face duas vezes
+                if all(_iou(box, other) < 0.5 for other in boxes):
+                    boxes.append(box)
+        return boxes
+
+
+def create_detector(name: str):
+    """
+    Cria o detector configurado: hog, cascade, dnn ou cascade_hog (proposta
+    pela cascata, confirmação pelo HOG). Parâmetros por variáveis de ambiente.
+    Levanta ValueError para nome desconhecido ou modelo ausente.
+    """
+    name = (name or "hog").lower()
+    if name == "hog":
+        return HogDetector(int(os.getenv("DETECTOR_HOG_UPSAMPLE", "1")))
+    if name == "dnn":
+        return DnnDetector(
+            os.getenv("DETECTOR_DNN_MODEL", ""),
+            os.getenv("DETECTOR_DNN_CONFIG") or None,
+            float(os.getenv("DETECTOR_DNN_CONFIDENCE", "0.5"))
+        )
+
+    cascade_path = os.getenv("DETECTOR_CASCADE_PATH") or None
+    min_size = int(os.getenv("DETECTOR_CASCADE_MIN_SIZE", "30"))
+    if name == "cascade":
+        return CascadeDetector(cascade_path, min_neighbors=int(os.getenv("DETECTOR_CASCADE_NEIGHBORS", "5")),
+                               min_size=min_size)
+    if name == "cascade_hog":
+        # Propostas permissivas: o HOG descarta os falsos positivos
+        proposer = CascadeDetector(cascade_path, min_neighbors=int(os.getenv("DETECTOR_CASCADE_NEIGHBORS", "3")),
+                                   min_size=min_size)
+        return CascadeFilterDetector(proposer, HogDetector(int(os.getenv("DETECTOR_HOG_UPSAMPLE", "1"))))
+
+    raise ValueError(f"Detector desconhecido: {name} (use hog, cascade, dnn ou cascade_hog)")
+
+
+_detectors: Dict[str, object] = {}
+_detectors_lock = threading.Lock()
+
+
+def get_detector(name: Optional[str] = None):
+    """Detector compartilhado (um por nome); padrão FACE_DETECTOR"""
+    name = (name or os.getenv("FACE_DETECTOR", "hog")).lower()
+    detector = _detectors.get(name)
+    if detector is None:
+        with _detectors_lock:
+            detector = _detectors.get(name)
+            if detector is None:
+                detector = _detectors[name] = create_detector(name)
+    return detector
+
@@ -0,0 +1,111 @@
+import collections
+import os
+import threading
+from typing import Optional
+
+
+class FrameRateController:
+    """
+    Controla quantos frames por segundo a câmera entrega ao pipeline.
+
+    A cada frame processado recebe a latência (captura → fim do processamento),
+    o tempo de CPU gasto nele e se havia faces. O alvo sobe aos poucos enquanto
+    a latência média (EMA) fica dentro de `latency_budget` e cai pela metade
+    quando estoura (AIMD). O teto é o menor entre:
+
+    - `max_fps` com faces na cena (ou até `idle_after` segundos depois da última),
+      `idle_fps` com a cena vazia;
+    - o FPS em que o processamento ocuparia `cpu_ceiling` dos núcleos da máquina.
+    """
+
+    def __init__(
+        self,
+        latency_budget: float = 0.5,
+        cpu_ceiling: float = 0.5,
+        min_fps: float = 1.0,
+        max_fps: float = 15.0,
+        idle_fps: float = 2.0,
+        idle_after: float = 3.0,
+        step: float = 0.5,
+        cpu_count: Optional[int] = None
+    ):
+        self.latency_budget = latency_budget
+        self.cpu_ceiling = cpu_ceiling
+        self.min_fps = min_fps
+        self.max_fps = max_fps
+        self.idle_fps = max(min_fps, min(idle_fps, max_fps))
+        self.idle_after = idle_after
+        self.step = step
+        self.cpu_count = cpu_count or os.cpu_count() or 1
+        # observe() é chamado pelas threads de vários estágios
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.target_fps = self.idle_fps
+        self.state = "idle"
+        self._latency: Optional[float] = None
+        self._compute: Optional[float] = None
+        self._last_submit: Optional[float] = None
+        self._last_faces: Optional[float] = None
+        # Momentos dos últimos frames processados, para o FPS efetivo
+        self._done: collections.deque = collections.deque(maxlen=30)
+
+    def should_process(self, now: float) -> bool:
+        """Se o frame capturado agora deve ir para o pipeline"""
+        if self._last_submit is not None and now - self._last_submit < 1.0 / self.target_fps:
+            return False
+        self._last_submit = now
+        return True
+
+    def observe(self, latency: float, compute: float, faces: bool, now: float):
+        """Registra um frame processado e ajusta o alvo"""
+        with self._lock:
+            self._observe(latency, compute, faces, now)
+
+    def _observe(self, latency: float, compute: float, faces: bool, now: float):
+        self._done.append(now)
+        self._latency = latency if self._latency is None else 0.8 * self._latency + 0.2 * latency
+        self._compute = compute if self._compute is None else 0.8 * self._compute + 0.2 * compute
+        if faces:
+            self._last_faces = now
+
+        active = self._last_faces is not None and now - self._last_faces < self.idle_after
+        cap = min(self.max_fps if active else self.idle_fps, self.cpu_cap)
+
+        if self._latency > self.latency_budget:
+            self.target_fps /= 2
+            self.state = "backoff"
+        elif self.target_fps > cap:
+            # Cena ficou vazia ou a CPU passou do teto: desce direto para o teto
+            self.target_fps = cap
+            self.state = "active" if active else "idle"
+        else:
+            self.target_fps += self.step
+            self.state = "active" if active else "idle"
+        self.target_fps = max(self.min_fps, min(self.target_fps, cap))
+
+    @property
+    def cpu_cap(self) -> float:
+        """FPS máximo para o processamento ficar dentro de cpu_ceiling"""
+        if not self._compute:
+            return self.max_fps
+        return self.cpu_ceiling * self.cpu_count / self._compute
+
+    @property
+    def effective_fps(self) -> float:
+        if len(self._done) < 2 or self._done[-1] == self._done[0]:
+            return 0.0
+        return (len(self._done) - 1) / (self._done[-1] - self._done[0])
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "target_fps": round(self.target_fps, 2),
+            "effective_fps": round(self.effective_fps, 2),
+            "latency_ms": round(1000 * (self._latency or 0.0), 2),
+            "compute_ms": round(1000 * (self._compute or 0.0), 2),
+            "cpu_load": round((self._compute or 0.0) * self.effective_fps / self.cpu_count, 3),
+            "latency_budget_ms": round(1000 * self.latency_budget, 2),
+            "cpu_ceiling": self.cpu_ceiling
+        }
@@ -0,0 +1,290 @@
+import copy
+import numpy as np
+from typing import Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+# Dimensão dos encodings gerados pelo face_recognition (dlib)
+ENCODING_DIM = 128
+
+
+def euclidean_distances(
+    probes: np.ndarray,
+    matrix: np.ndarray,
+    sq_norms: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    Distâncias euclidianas (M, N) entre probes (M, D) e as linhas de matrix (N, D),
+    usando ||a - b||² = ||a||² + ||b||² - 2·a·b.
+    """
+    probes = np.asarray(probes, dtype=np.float32).reshape(-1, matrix.shape[1])
+    if sq_norms is None:
+        sq_norms = np.einsum("ij,ij->i", matrix, matrix)
+    probe_sq = np.einsum("ij,ij->i", probes, probes)
+
+    dist = probes @ matrix.T
+    dist *= -2.0
+    dist += probe_sq[:, None]
+    dist += sq_norms[None, :]
+    # Erros de arredondamento podem gerar valores levemente negativos
+    np.maximum(dist, 0.0, out=dist)
+    np.sqrt(dist, out=dist)
+    return dist
+
+
+class Gallery:
+    """
+    Galeria de rostos conhecidos em formato vetorizado.
+
+    Os encodings ficam em uma matriz contígua float32 (N, 128) com as normas
+    ao quadrado pré-calculadas, de modo que todos os encodings de um frame são
+    comparados com a galeria inteira em uma única multiplicação de matrizes:
+    ||a - b||² = ||a||² + ||b||² - 2·a·b
+
+    Cada instância é um snapshot imutável: with_added / with_removed /
+    with_renamed retornam uma nova galeria e nunca alteram nada que um leitor
+    da galeria antiga possa ver. Inserções escrevem além do fim visível dos
+    buffers compartilhados (O(1) amortizado); remoções e renomeações ficam em
+    pequenas sobreposições (tombstones / nomes novos) até a próxima compactação.
+    """
+
+    def __init__(
+        self,
+        face_ids: Sequence[str],
+        names: Sequence[str],
+        matrix: np.ndarray,
+        sq_norms: Optional[np.ndarray] = None
+    ):
+        self._face_ids = list(face_ids)
+        self._names = list(names)
+        # Não copia se já for float32 contígua (ex.: snapshot mapeado em memória)
+        self._matrix = np.ascontiguousarray(matrix, dtype=np.float32).reshape(-1, ENCODING_DIM)
+        if sq_norms is None:
+            sq_norms = np.einsum("ij,ij->i", self._matrix, self._matrix)
+        self._sq_norms = sq_norms
+        self._size = self._matrix.shape[0]
+        self._positions: Optional[Dict[str, int]] = None
+        self._deleted: FrozenSet[int] = frozenset()
+        self._deleted_rows: Optional[np.ndarray] = None
+        self._renamed: Dict[int, str] = {}
+        # Geração do snapshot compartilhado de onde a galeria veio (0 = local)
+        self.generation = 0
+
+        if not (len(self._face_ids) == len(self._names) == self._size):
+            raise ValueError("face_ids, names e matrix devem ter o mesmo número de linhas")
+
+    @classmethod
+    def empty(cls) -> "Gallery":
+        return cls([], [], np.empty((0, ENCODING_DIM), dtype=np.float32))
+
+    @classmethod
+    def from_known_faces(cls, known_faces: Sequence[Tuple[str, str, np.ndarray]]) -> "Gallery":
+        """Cria a galeria a partir de uma lista de (face_id, name, encoding)"""
+        if not known_faces:
+            return cls.empty()
+
+        face_ids, names, encodings = zip(*known_faces)
+        return cls(face_ids, names, np.stack(encodings))
+
+    def __len__(self) -> int:
+        return self._size - len(self._deleted)
+
+    # Visões "compactas" (apenas rostos vivos) para usos fora do caminho quente
+
+    @property
+    def matrix(self) -> np.ndarray:
+        if not self._deleted:
+            return self._matrix[:self._size]
+        return self._matrix[self._live_rows()]
+
+    @property
+    def sq_norms(self) -> np.ndarray:
+        if not self._deleted:
+            return self._sq_norms[:self._size]
+        return self._sq_norms[self._live_rows()]
+
+    @property
+    def face_ids(self) -> List[str]:
+        return [self._face_ids[row] for row in self._live_rows()]
+
+    @property
+    def names(self) -> List[str]:
+        return [self.name_at(row) for row in self._live_rows()]
+
+    def _live_rows(self) -> List[int]:
+        return [row for row in range(self._size) if row not in self._deleted]
+
+    @property
+    def overlay_size(self) -> int:
+        """Quantidade de remoções/renomeações pendentes de compactação"""
+        return len(self._deleted) + len(self._renamed)
+
+    # Acesso por linha interna (as linhas removidas continuam ocupando posição)
+
+    def position(self, face_id: str) -> Optional[int]:
+        """Linha interna correspondente ao face_id (None se não existir)"""
+        row = self._position_map().get(face_id)
+        if row is None or row >= self._size or row in self._deleted:
+            return None
+        return row
+
+    def face_id_at(self, row: int) -> str:
+        return self._face_ids[row]
+
+    def name_at(self, row: int) -> str:
+        return self._renamed.get(row, self._names[row])
+
+    def encoding_at(self, row: int) -> np.ndarray:
+        return self._matrix[row]
+
+    def _position_map(self) -> Dict[str, int]:
+        if self._positions is None:
+            self._positions = {face_id: row for row, face_id in enumerate(self._face_ids[:self._size])}
+        return self._positions
+
+    def distances(self, probes: np.ndarray) -> np.ndarray:
+        """
+        Calcula as distâncias euclidianas entre os probes e toda a galeria.
+        Retorna matriz (M, linhas internas) float32; linhas removidas valem inf.
+        """
+        dist = euclidean_distances(probes, self._matrix[:self._size], self._sq_norms[:self._size])
+        if self._deleted:
+            if self._deleted_rows is None:
+                self._deleted_rows = np.fromiter(self._deleted, dtype=np.intp)
+            dist[:, self._deleted_rows] = np.inf
+        return dist
+
+    def match(self, probes: Sequence[np.ndarray], tolerance: float = 0.6) -> List[Tuple[bool, str, str, float]]:
+        """
+        Compara todos os probes com a galeria de uma vez.
+        Retorna, para cada probe: (match, face_id, name, confidence)
+        """
+        if len(probes) == 0:
+            return []
+
+        if len(self) == 0:
+            return [(False, "", "", 0.0) for _ in range(len(probes))]
+
+        dist = self.distances(np.asarray(probes))
+        best = dist.argmin(axis=1)
+        best_dist = dist[np.arange(dist.shape[0]), best]
+
+        results = []
+        for row, min_distance in zip(best.tolist(), best_dist.tolist()):
+            # Considera match se a distância for menor que a tolerância
+            if min_distance <= tolerance:
+                confidence = max(0.0, 1.0 - min_distance)
+                results.append((True, self._face_ids[row], self.name_at(row), confidence))
+            else:
+                results.append((False, "", "", 0.0))
+
+        return results
+
+    def top_k(self, probes: Sequence[np.ndarray], k: int = 5) -> List[List[Tuple[str, str, float]]]:
+        """
+        Os k rostos mais próximos de cada probe, do mais próximo ao mais distante.
+        Usa seleção parcial (argpartition, O(N)) e ordena só os k escolhidos.
+        Retorna, para cada probe: [(face_id, name, distance), ...]
+        """
+        if len(probes) == 0:
+            return []
+
+        k = min(k, len(self))
+        if k <= 0:
+            return [[] for _ in range(len(probes))]
+
+        dist = self.distances(np.asarray(probes))
+        if k < dist.shape[1]:
+            rows = np.argpartition(dist, k - 1, axis=1)[:, :k]
+        else:
+            rows = np.broadcast_to(np.arange(dist.shape[1]), dist.shape)
+        selected = np.take_along_axis(dist, rows, axis=1)
+        order = np.argsort(selected, axis=1)
+        rows = np.take_along_axis(rows, order, axis=1)
+        selected = np.take_along_axis(selected, order, axis=1)
+
+        # Linhas removidas valem inf e nunca ficam entre as k primeiras (k <= vivos)
+        return [
+            [
+                (self._face_ids[row], self.name_at(row), distance)
+                for row, distance in zip(probe_rows, probe_dist)
+            ]
+            for probe_rows, probe_dist in zip(rows.tolist(), selected.tolist())
+        ]
+
+    # Alterações: sempre retornam um novo snapshot
+
+    def with_added(self, face_id: str, name: str, encoding: np.ndarray) -> "Gallery":
+        """Novo snapshot com o rosto inserido, em O(1) amortizado"""
+        base = self
+        positions = base._position_map()
+        if face_id in positions or base._size != len(base._face_ids):
+            # face_id já conhecido ou buffers já estendidos a partir deste
+            # snapshot: trabalha sobre uma cópia compacta, que nenhum leitor vê
+            base = self.compacted()
+            positions = base._position_map()
+            row = base.position(face_id)
+            if row is not None:
+                # Rosto já presente: substitui encoding e nome na cópia
+                base._matrix[row] = encoding
+                base._sq_norms[row] = np.dot(base._matrix[row], base._matrix[row])
+                base._names[row] = name
+                return base
+
+        row = base._size
+        matrix, sq_norms = base._matrix, base._sq_norms
+        if row == matrix.shape[0] or not (matrix.flags.writeable and sq_norms.flags.writeable):
+            matrix, sq_norms = base._grown_buffers()
+
+        # Escreve além do fim visível: snapshots antigos nunca leem esta linha
+        matrix[row] = encoding
+        sq_norms[row] = np.dot(matrix[row], matrix[row])
+        base._face_ids.append(face_id)
+        base._names.append(name)
+        positions[face_id] = row
+
+        gallery = copy.copy(base)
+        gallery._matrix = matrix
+        gallery._sq_norms = sq_norms
+        gallery._size = row + 1
+        return gallery
+
+    def with_removed(self, face_id: str) -> "Gallery":
+        """Novo snapshot sem o rosto (tombstone, sem copiar a matriz)"""
+        row = self.position(face_id)
+        if row is None:
+            return self
+
+        gallery = copy.copy(self)
+        gallery._deleted = self._deleted | {row}
+        gallery._deleted_rows = None
+        return gallery
+
+    def with_renamed(self, face_id: str, name: str) -> "Gallery":
+        row = self.position(face_id)
+        if row is None:
+            return self
+
+        gallery = copy.copy(self)
+        gallery._renamed = dict(self._renamed)
+        gallery._renamed[row] = name
+        return gallery
+
+    def compacted(self) -> "Gallery":
+        """Cópia sem tombstones nem sobreposições, com buffers próprios"""
+        rows = self._live_rows()
+        gallery = Gallery(
+            [self._face_ids[row] for row in rows],
+            [self.name_at(row) for row in rows],
+            self._matrix[rows],
+            np.array(self._sq_norms[rows], dtype=np.float32)
+        )
+        gallery.generation = self.generation
+        return gallery
+
+    def _grown_buffers(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Buffers novos com o dobro da capacidade (também copia galerias mapeadas em memória)"""
+        capacity = max(16, 2 * self._matrix.shape[0])
+        matrix = np.empty((capacity, ENCODING_DIM), dtype=np.float32)
+        sq_norms = np.empty(capacity, dtype=np.float32)
+        matrix[:self._size] = self._matrix[:self._size]
+        sq_norms[:self._size] = self._sq_norms[:self._size]
+        return matrix, sq_norms
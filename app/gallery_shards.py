@@ -0,0 +1,327 @@
+import heapq
+import multiprocessing as mp
+import threading
+import time
+import zlib
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.database import db
+from app.gallery import Gallery
+
+
+def shard_of(face_id: str, num_shards: int) -> int:
+    """Shard dono do face_id (hash estável entre processos, ao contrário de hash())"""
+    return zlib.crc32(face_id.encode("utf-8")) % num_shards
+
+
+def _load_shard(shard: int, num_shards: int) -> Gallery:
+    """Carrega do banco apenas os rostos deste shard"""
+    from app.utils import decode_face_encoding
+
+    known_faces = [
+        (face_id, name, decode_face_encoding(encoding))
+        for _, face_id, name, encoding in db.get_gallery_rows()
+        if shard_of(face_id, num_shards) == shard
+    ]
+    return Gallery.from_known_faces(known_faces)
+
+
+def _shard_worker(conn, shard: int, num_shards: int):
+    """Processo matcher de um shard: atende pedidos pelo pipe até receber "stop" ou EOF"""
+    gallery = _load_shard(shard, num_shards)
+    conn.send(("ok", len(gallery)))
+
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            break
+
+        op = message[0]
+        try:
+            if op == "top_k":
+                conn.send(("ok", gallery.top_k(message[1], message[2])))
+                continue
+            if op == "stop":
+                break
+
+            if op == "add":
+                gallery = gallery.with_added(message[1], message[2], message[3])
+            elif op == "remove":
+                gallery = gallery.with_removed(message[1])
+            elif op == "rename":
+                gallery = gallery.with_renamed(message[1], message[2])
+            elif op == "reload":
+                gallery = _load_shard(shard, num_shards)
+            else:
+                raise ValueError(f"Operação desconhecida: {op}")
+
+            if gallery.overlay_size > max(64, 0.1 * len(gallery)):
+                gallery = gallery.compacted()
+            conn.send(("ok", len(gallery)))
+        except Exception as e:
+            conn.send(("error", str(e)))
+
+    conn.close()
+
+
+class ShardedGallery:
+    """
+    Galeria particionada entre processos matcher locais.
+
+    Cada rosto pertence a um shard (crc32 do face_id % num_shards); cada
+    processo carrega do banco só a sua partição e conversa com este processo
+    por um pipe. Os probes são enviados a todos os shards (scatter), que
+    calculam o top-k local em paralelo, e os resultados são combinados
+    (gather). Alterações vão apenas para o shard dono do rosto.
+    """
+
+    # Tempo máximo para ler uma resposta pendente depois de uma falha em outro shard
+    drain_timeout = 30.0
+
+    def __init__(self, num_shards: int, start_timeout: float = 300.0, reply_timeout: float = 30.0,
+                 consistency_interval: float = 60.0):
+        if num_shards < 1:
+            raise ValueError("num_shards deve ser >= 1")
+        self.num_shards = num_shards
+        self.start_timeout = start_timeout
+        # Espera máxima por uma resposta (recargas usam start_timeout): um shard
+        # travado é marcado como quebrado em vez de segurar os locks para sempre
+        self.reply_timeout = reply_timeout
+        # Maior id do banco refletido nos shards (mesma verificação do GalleryManager)
+        self._max_id = db.get_gallery_fingerprint()[1]
+        self._max_id_lock = threading.Lock()
+        self._consistency_mismatches = 0
+        self._stopped = threading.Event()
+        # spawn: o filho não herda o engine/conexões SQLite do processo pai
+        self._context = mp.get_context("spawn")
+        self._conns = []
+        self._processes = []
+        for shard in range(num_shards):
+            conn, process = self._spawn(shard)
+            self._conns.append(conn)
+            self._processes.append(process)
+        self._locks = [threading.Lock() for _ in range(num_shards)]
+        self._sizes = [0] * num_shards
+        # Shard com estado do pipe desconhecido: é reiniciado (e recarregado do
+        # banco) antes da próxima chamada
+        self._broken = [False] * num_shards
+        self.restarts = 0
+
+        for shard in range(num_shards):
+            self._sizes[shard] = self._wait_ready(shard)
+
+        if consistency_interval > 0:
+            threading.Thread(
+                target=self._check_loop, args=(consistency_interval,), name="gallery-shards-check", daemon=True
+            ).start()
+
+    def __len__(self) -> int:
+        return sum(self._sizes)
+
+    @property
+    def sizes(self) -> List[int]:
+        return list(self._sizes)
+
+    def _spawn(self, shard: int):
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(
+            target=_shard_worker, args=(child_conn, shard, self.num_shards),
+            name=f"gallery-shard-{shard}", daemon=True
+        )
+        process.start()
+        child_conn.close()
+        return parent_conn, process
+
+    def _wait_ready(self, shard: int) -> int:
+        conn = self._conns[shard]
+        try:
+            if not conn.poll(self.start_timeout):
+                raise RuntimeError(f"Shard {shard} não respondeu em {self.start_timeout:.0f}s")
+            return self._reply(shard, conn.recv())
+        except (EOFError, OSError) as e:
+            raise RuntimeError(f"Shard {shard} encerrou ao iniciar: {str(e)}")
+
+    def _stop(self, shard: int):
+        """Encerra o processo do shard à força e fecha o pipe (com o lock do shard)"""
+        process = self._processes[shard]
+        if process.is_alive():
+            process.terminate()
+            process.join(timeout=5)
+        if process.is_alive():
+            # Travado a ponto de ignorar o SIGTERM
+            process.kill()
+        process.join(timeout=5)
+        self._conns[shard].close()
+
+    def _ensure(self, shard: int):
+        """Reinicia o shard se ele estiver marcado como quebrado (com o lock do shard)"""
+        if not self._broken[shard]:
+            return
+        self._stop(shard)
+        self._conns[shard], self._processes[shard] = self._spawn(shard)
+        self._sizes[shard] = self._wait_ready(shard)
+        self._broken[shard] = False
+        self.restarts += 1
+        print(f"🔄 Shard {shard} da galeria reiniciado ({self._sizes[shard]} rostos)")
+
+    def _drain(self, shard: int):
+        """Descarta a resposta pendente do shard; se ela não vier, marca o shard como quebrado"""
+        conn = self._conns[shard]
+        try:
+            if conn.poll(self.drain_timeout):
+                conn.recv()
+                return
+        except (EOFError, OSError):
+            pass
+        self._broken[shard] = True
+
+    def _reply(self, shard: int, reply: tuple):
+        status, value = reply
+        if status != "ok":
+            raise RuntimeError(f"Shard {shard}: {value}")
+        return value
+
+    def _recv(self, shard: int, timeout: float):
+        conn = self._conns[shard]
+        if not conn.poll(timeout):
+            raise TimeoutError(f"sem resposta em {timeout:.0f}s")
+        return conn.recv()
+
+    def _call(self, shard: int, message: tuple):
+        with self._locks[shard]:
+            self._ensure(shard)
+            try:
+                self._conns[shard].send(message)
+                reply = self._recv(shard, self.reply_timeout)
+            except (EOFError, OSError) as e:
+                self._broken[shard] = True
+                raise RuntimeError(f"Shard {shard} indisponível: {str(e)}")
+        return self._reply(shard, reply)
+
+    def _scatter(self, message: tuple, timeout: Optional[float] = None) -> list:
+        """Envia a mensagem a todos os shards e coleta as respostas na mesma ordem"""
+        # Locks sempre na ordem dos shards (sem deadlock); cada um é liberado assim
+        # que a resposta do shard chega, então chamadas concorrentes se sobrepõem
+        for lock in self._locks:
+            lock.acquire()
+        released = 0
+        replies = []
+        try:
+            for shard in range(self.num_shards):
+                self._ensure(shard)
+            sent = 0
+            try:
+                for conn in self._conns:
+                    conn.send(message)
+                    sent += 1
+                # Os shards trabalham em paralelo: um único prazo para todos
+                deadline = time.monotonic() + (timeout or self.reply_timeout)
+                for shard in range(self.num_shards):
+                    replies.append(self._recv(shard, max(0.0, deadline - time.monotonic())))
+                    self._locks[released].release()
+                    released += 1
+            except (EOFError, OSError) as e:
+                failed = sent if sent < self.num_shards else len(replies)
+                self._broken[failed] = True
+                # Os outros shards que receberam a mensagem ainda vão responder:
+                # a resposta precisa ser lida agora, senão a próxima chamada a
+                # receberia no lugar da sua
+                for shard in range(len(replies), sent):
+                    if shard != failed:
+                        self._drain(shard)
+                raise RuntimeError(f"Shard {failed} indisponível: {str(e)}")
+        finally:
+            for lock in self._locks[released:]:
+                lock.release()
+        return [self._reply(shard, reply) for shard, reply in enumerate(replies)]
+
+    def top_k(self, probes: Sequence[np.ndarray], k: int = 5) -> List[List[Tuple[str, str, float]]]:
+        """Os k rostos mais próximos de cada probe, combinando o top-k de cada shard"""
+        if len(probes) == 0:
+            return []
+        probes = np.asarray(probes, dtype=np.float32)
+        per_shard = self._scatter(("top_k", probes, k))
+        return [
+            heapq.nsmallest(k, (c for shard in per_shard for c in shard[i]), key=lambda c: c[2])
+            for i in range(len(probes))
+        ]
+
+    def match(self, probes: Sequence[np.ndarray], tolerance: float = 0.6) -> List[Tuple[bool, str, str, float]]:
+        """Mesmo contrato de Gallery.match: (match, face_id, name, confidence) por probe"""
+        results = []
+        for nearest in self.top_k(probes, 1):
+            if nearest and nearest[0][2] <= tolerance:
+                face_id, name, distance = nearest[0]
+                results.append((True, face_id, name, max(0.0, 1.0 - distance)))
+            else:
+                results.append((False, "", "", 0.0))
+        return results
+
+    def add(self, face_id: str, name: str, encoding: np.ndarray, db_id: int = 0):
+        shard = shard_of(face_id, self.num_shards)
+        self._sizes[shard] = self._call(shard, ("add", face_id, name, np.asarray(encoding, dtype=np.float32)))
+        with self._max_id_lock:
+            self._max_id = max(self._max_id, db_id)
+
+    def remove(self, face_id: str):
+        shard = shard_of(face_id, self.num_shards)
+        self._sizes[shard] = self._call(shard, ("remove", face_id))
+        # A remoção pode ter apagado a linha de maior id
+        with self._max_id_lock:
+            self._max_id = db.get_gallery_fingerprint()[1]
+
+    def rename(self, face_id: str, name: str):
+        shard = shard_of(face_id, self.num_shards)
+        self._sizes[shard] = self._call(shard, ("rename", face_id, name))
+
+    def reload(self):
+        # Lido antes: uma escrita no meio da recarga aparece como divergência
+        # na próxima verificação, nunca some
+        max_id = db.get_gallery_fingerprint()[1]
+        self._sizes = self._scatter(("reload",), self.start_timeout)
+        with self._max_id_lock:
+            self._max_id = max_id
+
+    def _check_loop(self, interval: float):
+        while not self._stopped.wait(interval):
+            try:
+                if not self._is_consistent():
+                    self.reload()
+            except Exception as e:
+                print(f"Erro ao verificar os shards da galeria: {str(e)}")
+
+    def _is_consistent(self) -> bool:
+        """
+        Compara os shards com o banco (contagem e maior id), para detectar
+        rostos gravados por outro processo (outro worker, import_faces.py).
+        """
+        count, max_id = db.get_gallery_fingerprint()
+        if count == len(self) and max_id == self._max_id:
+            self._consistency_mismatches = 0
+            return True
+
+        # Um escritor pode ter gravado no banco e ainda não atualizado o shard;
+        # só recarrega se a divergência persistir na verificação seguinte
+        self._consistency_mismatches += 1
+        if self._consistency_mismatches < 2:
+            return True
+
+        self._consistency_mismatches = 0
+        print(f"⚠️  Shards inconsistentes com o banco ({len(self)} em memória, {count} no banco); recarregando")
+        return False
+
+    def close(self):
+        self._stopped.set()
+        for shard, conn in enumerate(self._conns):
+            with self._locks[shard]:
+                try:
+                    conn.send(("stop",))
+                except OSError:
+                    pass
+        for shard, process in enumerate(self._processes):
+            process.join(timeout=5)
+            with self._locks[shard]:
+                self._stop(shard)
@@ -0,0 +1,165 @@
+import json
+import os
+import time
+from typing import Callable, Optional, Tuple
+
+import numpy as np
+
+from app.gallery import Gallery
+
+# Arquivo com a geração publicada mais recente
+CURRENT_FILE = "CURRENT"
+LOCK_FILE = ".lock"
+
+
+class GallerySnapshotStore:
+    """
+    Snapshot da galeria compartilhado entre processos (workers do uvicorn).
+
+    Cada geração é publicada como um par de arquivos em `directory`:
+    - gallery-<geração>.npy: matriz float32 (N, 128), mapeada em memória
+      somente leitura por todos os workers (as páginas ficam no page cache
+      do sistema e são compartilhadas);
+    - gallery-<geração>.json: sidecar com face_ids, nomes e a assinatura do
+      banco (contagem e maior id) usada para detectar snapshots desatualizados.
+
+    O arquivo CURRENT contém a geração vigente e é trocado atomicamente
+    (os.replace); os workers remapeiam quando ela muda.
+    """
+
+    def __init__(self, directory: str, check_interval: float = 0.5, keep_generations: int = 2):
+        self.directory = directory
+        self.check_interval = check_interval
+        self.keep_generations = keep_generations
+        self._last_check = 0.0
+        self._last_generation = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def current_generation(self, force: bool = False) -> int:
+        """Lê a geração vigente (no máximo uma vez a cada check_interval segundos)"""
+        now = time.monotonic()
+        if not force and now - self._last_check < self.check_interval:
+            return self._last_generation
+
+        try:
+            with open(self._path(CURRENT_FILE), "r") as f:
+                self._last_generation = int(f.read().strip() or 0)
+        except (FileNotFoundError, ValueError):
+            self._last_generation = 0
+
+        self._last_check = now
+        return self._last_generation
+
+    def load(self, generation: Optional[int] = None) -> Optional[Tuple[Gallery, dict]]:
+        """
+        Mapeia o snapshot da geração indicada (ou da vigente).
+        Retorna (galeria, metadados) ou None se não houver snapshot.
+        """
+        if generation is None:
+            generation = self.current_generation(force=True)
+        if not generation:
+            return None
+
+        try:
+            with open(self._path(f"gallery-{generation}.json"), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            matrix = np.load(self._path(f"gallery-{generation}.npy"), mmap_mode="r")
+            sq_norms = np.load(self._path(f"gallery-{generation}.norms.npy"), mmap_mode="r")
+        except (FileNotFoundError, ValueError):
+            return None
+
+        gallery = Gallery(meta["face_ids"], meta["names"], matrix, sq_norms=sq_norms)
+        gallery.generation = generation
+        return gallery, meta
+
+    def publish(self, build: Callable[[], Tuple[Gallery, dict]]) -> Tuple[Gallery, dict]:
+        """
+        Publica uma nova geração. `build` é chamado dentro do lock entre
+        processos e deve retornar (galeria, metadados extras) lidos do banco.
+        """
+        with _FileLock(self._path(LOCK_FILE)):
+            generation = self.current_generation(force=True) + 1
+            gallery, extra = build()
+
+            meta = dict(extra)
+            meta.update({
+                "generation": generation,
+                "count": len(gallery),
+                "face_ids": gallery.face_ids,
+                "names": gallery.names,
+            })
+
+            self._write_atomic(f"gallery-{generation}.npy", lambda f: np.save(f, gallery.matrix))
+            self._write_atomic(f"gallery-{generation}.norms.npy", lambda f: np.save(f, gallery.sq_norms))
+            self._write_atomic(
+                f"gallery-{generation}.json",
+                lambda f: f.write(json.dumps(meta, ensure_ascii=False).encode("utf-8"))
+            )
+            self._write_atomic(CURRENT_FILE, lambda f: f.write(str(generation).encode("ascii")))
+
+            self._cleanup(generation)
+            self.current_generation(force=True)
+
+        return self.load(generation)
+
+    def _write_atomic(self, name: str, write: Callable):
+        tmp_path = self._path(f".{name}.{os.getpid()}.tmp")
+        with open(tmp_path, "wb") as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self._path(name))
+
+    def _cleanup(self, generation: int):
+        """Remove gerações antigas (mantém as últimas keep_generations)"""
+        for name in os.listdir(self.directory):
+            if not name.startswith("gallery-"):
+                continue
+            try:
+                old_generation = int(name.split("-", 1)[1].split(".", 1)[0])
+            except ValueError:
+                continue
+            if old_generation <= generation - self.keep_generations:
+                try:
+                    os.remove(self._path(name))
+                except OSError:
+                    # No Windows um arquivo ainda mapeado por outro worker não pode ser removido
+                    pass
+
+
+class _FileLock:
+    """Lock simples entre processos baseado em criação exclusiva de arquivo"""
+
+    def __init__(self, path: str, timeout: float = 30.0, stale_after: float = 120.0):
+        self.path = path
+        self.timeout = timeout
+        self.stale_after = stale_after
+
+    def __enter__(self):
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                fd = os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                os.write(fd, str(os.getpid()).encode("ascii"))
+                os.close(fd)
+                return self
+            except FileExistsError:
+                # Lock abandonado por um processo que morreu no meio da publicação
+                try:
+                    if time.time() - os.path.getmtime(self.path) > self.stale_after:
+                        os.remove(self.path)
+                        continue
+                except OSError:
+                    pass
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"Timeout aguardando lock {self.path}")
+                time.sleep(0.05)
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
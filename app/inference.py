@@ -0,0 +1,393 @@
+import math
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+from multiprocessing import shared_memory
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from app import utils
+from app.pipeline import LatencyStats
+
+# Caixa (top, right, bottom, left) e região (x, y, largura, altura)
+Box = Tuple[int, int, int, int]
+Region = Tuple[int, int, int, int]
+
+
+class InferenceQueueFull(Exception):
+    """
+    Todos os workers ocupados e a fila de espera cheia (ou a espera passou do
+    limite). retry_after: segundos estimados até haver vaga
+    """
+
+    def __init__(self, message: str = "Fila de inferência cheia", retry_after: int = 1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def _run_task(task: str, image, params: dict):
+    """Executa uma tarefa de inferência (no worker ou na própria thread)"""
+    if task == "extract_bytes":
+        image = utils.load_image_bytes(image)
+        task = "extract"
+
+    if task in ("detect", "extract"):
+        regions = params.get("regions")
+        if regions:
+            boxes = utils.detect_faces_in_regions(image, regions, params["scale"], params["grayscale"])
+        else:
+            boxes = utils.detect_faces(image, params["scale"], params["grayscale"])
+        if task == "detect":
+            return boxes
+        return boxes, utils.encode_faces(image, boxes)
+
+    if task == "encode":
+        return utils.encode_faces(image, params["boxes"])
+
+    raise ValueError(f"Tarefa desconhecida: {task}")
+
+
+class InferenceExecutor:
+    """
+    Executor de detecção/encoding usado pelo FaceService.
+
+    Implementação padrão: roda na thread de quem chamou, com no máximo
+    `max_workers` inferências simultâneas e `queue_size` chamadas esperando.
+    Além disso, ou depois de `queue_timeout` segundos na fila, a chamada falha
+    na hora com InferenceQueueFull em vez de acumular.
+
+    Mede separadamente o tempo na fila e o tempo de inferência, para
+    dimensionar a quantidade de workers.
+    """
+
+    backend = "thread"
+
+    def __init__(self, max_workers: int = 1, queue_size: int = 8, queue_timeout: Optional[float] = None):
+        self.max_workers = max_workers
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self._running = threading.BoundedSemaphore(max_workers)
+        self._admitted = threading.BoundedSemaphore(max_workers + queue_size)
+        self._stats_lock = threading.Lock()
+        self._active = 0
+        self._waiting = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.queue_wait = LatencyStats()
+        self.compute = LatencyStats()
+
+    def detect(self, rgb_frame: np.ndarray, scale: float = 1.0, grayscale: bool = False,
+               regions: Optional[List[Region]] = None) -> List[Box]:
+        return self._submit("detect", rgb_frame, {"scale": scale, "grayscale": grayscale, "regions": regions})
+
+    def encode(self, rgb_frame: np.ndarray, boxes: List[Box]) -> List[np.ndarray]:
+        if not boxes:
+            return []
+        return self._submit("encode", rgb_frame, {"boxes": boxes})
+
+    def extract(self, rgb_frame: np.ndarray, scale: float = 1.0, grayscale: bool = False,
+                regions: Optional[List[Region]] = None) -> Tuple[List[Box], List[np.ndarray]]:
+        return self._submit("extract", rgb_frame, {"scale": scale, "grayscale": grayscale, "regions": regions})
+
+    def extract_bytes(self, image_bytes: bytes, scale: float = 1.0,
+                      grayscale: bool = False) -> Tuple[List[Box], List[np.ndarray]]:
+        """Decodifica a imagem enviada e extrai caixas + encodings"""
+        return self._submit("extract_bytes", image_bytes, {"scale": scale, "grayscale": grayscale})
+
+    def _submit(self, task: str, image, params: dict):
+        if not self._admitted.acquire(blocking=False):
+            self._count("rejected")
+            raise InferenceQueueFull("Fila de inferência cheia", self.retry_after())
+        try:
+            queued = time.perf_counter()
+            self._count("_waiting")
+            acquired = self._running.acquire(timeout=self.queue_timeout)
+            self._count("_waiting", -1)
+            if not acquired:
+                self._count("timed_out")
+                raise InferenceQueueFull("Tempo de espera na fila de inferência esgotado", self.retry_after())
+
+            started = time.perf_counter()
+            self.queue_wait.add(started - queued)
+            self._count("_active")
+            try:
+                return self._execute(task, image, params)
+            finally:
+                self._running.release()
+                self.compute.add(time.perf_counter() - started)
+                self._count("_active", -1)
+                self._count("completed")
+        finally:
+            self._admitted.release()
+
+    def _count(self, name: str, delta: int = 1):
+        with self._stats_lock:
+            setattr(self, name, getattr(self, name) + delta)
+
+    def retry_after(self) -> int:
+        """Segundos estimados até a fila andar: tempo médio de inferência x chamadas à frente por worker"""
+        ahead = (self._active + self._waiting) / self.max_workers
+        return max(1, math.ceil(self.compute.mean() * ahead))
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.backend,
+            "workers": self.max_workers,
+            "queue_size": self.queue_size,
+            "queue_timeout": self.queue_timeout,
+            "running": self._active,
+            "waiting": self._waiting,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            # Tempo esperando um worker vs. tempo de inferência, em ms
+            "queue_wait_ms": self.queue_wait.snapshot(),
+            "compute_ms": self.compute.snapshot()
+        }
+
+    def _execute(self, task: str, image, params: dict):
+        return _run_task(task, image, params)
+
+    def close(self):
+        pass
+
+
+def _inference_worker(conn):
+    """Processo de inferência: carrega os modelos uma vez e atende tarefas pelo pipe"""
+    if not utils.FACE_RECOGNITION_AVAILABLE:
+        conn.send(("error", "face-recognition não está instalado"))
+        conn.close()
+        return
+    segment = None
+    conn.send(("ok", os.getpid()))
+
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            break
+        if message[0] == "stop":
+            break
+
+        task, payload, params = message
+        image = None
+        try:
+            if isinstance(payload, tuple):
+                # Frame na memória compartilhada: (nome do segmento, shape)
+                name, shape = payload
+                if segment is None or segment.name != name:
+                    if segment is not None:
+                        segment.close()
+                    # O segmento pertence ao processo pai, que faz o unlink
+                    segment = shared_memory.SharedMemory(name=name)
+                image = np.ndarray(shape, dtype=np.uint8, buffer=segment.buf)
+            else:
+                image = payload
+            result = _run_task(task, image, params)
+            # Solta a visão do segmento antes de um possível close()
+            image = None
+            conn.send(("ok", result))
+        except Exception as e:
+            image = None
+            conn.send(("error", (type(e).__name__, str(e))))
+
+    if segment is not None:
+        segment.close()
+    conn.close()
+
+
+class _Worker:
+    """Processo de inferência + pipe + segmento de memória compartilhada próprio"""
+
+    def __init__(self, context):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_inference_worker, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.segment: Optional[shared_memory.SharedMemory] = None
+
+    def wait_ready(self, timeout: float):
+        try:
+            if not self.conn.poll(timeout):
+                raise RuntimeError("Worker de inferência não respondeu")
+            status, value = self.conn.recv()
+        except (EOFError, OSError):
+            raise RuntimeError("Worker de inferência encerrou ao iniciar")
+        if status != "ok":
+            raise RuntimeError(f"Worker de inferência falhou ao iniciar: {value}")
+
+    def frame_payload(self, frame: np.ndarray) -> tuple:
+        """Copia o frame para o segmento do worker (recriado se não couber)"""
+        frame = np.ascontiguousarray(frame, dtype=np.uint8)
+        if self.segment is None or self.segment.size < frame.nbytes:
+            if self.segment is not None:
+                self.segment.close()
+                self.segment.unlink()
+            self.segment = shared_memory.SharedMemory(create=True, size=max(frame.nbytes, 1))
+        np.ndarray(frame.shape, dtype=np.uint8, buffer=self.segment.buf)[...] = frame
+        return self.segment.name, frame.shape
+
+    def close(self, graceful: bool = True):
+        """Encerra o processo e libera o segmento; graceful=False não espera a tarefa em andamento"""
+        if graceful:
+            try:
+                self.conn.send(("stop",))
+            except OSError:
+                pass
+            self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(timeout=5)
+        self.conn.close()
+        if self.segment is not None:
+            self.segment.close()
+            self.segment.unlink()
+            self.segment = None
+
+
+class ProcessInferenceExecutor(InferenceExecutor):
+    """
+    Executor com um pool de processos, para usar todos os núcleos apesar do GIL.
+
+    Cada worker carrega os modelos do dlib uma única vez e tem um segmento de
+    memória compartilhada próprio: o frame é copiado direto para ele (sem
+    pickle) e só as caixas/encodings voltam pelo pipe. Imagens enviadas por
+    upload seguem como bytes comprimidos e são decodificadas no worker.
+    """
+
+    backend = "process"
+
+    def __init__(self, max_workers: Optional[int] = None, queue_size: Optional[int] = None,
+                 queue_timeout: Optional[float] = None, start_timeout: float = 120.0):
+        max_workers = max_workers or os.cpu_count() or 1
+        super().__init__(max_workers, queue_size if queue_size is not None else 2 * max_workers, queue_timeout)
+        self._context = mp.get_context("spawn")
+        self._start_timeout = start_timeout
+        self._workers_lock = threading.Lock()
+        self._closed = False
+        self.respawned = 0
+        self._workers = [_Worker(self._context) for _ in range(max_workers)]
+        try:
+            for worker in self._workers:
+                worker.wait_ready(start_timeout)
+        except Exception:
+            self.close()
+            raise
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        for worker in self._workers:
+            self._idle.put(worker)
+
+    def _execute(self, task: str, image, params: dict):
+        worker = self._acquire_worker()
+        if worker is None:
+            # Nenhum worker vivo (todos caíram e ainda não voltaram): roda na
+            # própria thread, como o executor padrão, em vez de travar
+            return _run_task(task, image, params)
+        healthy = False
+        try:
+            payload = worker.frame_payload(image) if isinstance(image, np.ndarray) else image
+            try:
+                worker.conn.send((task, payload, params))
+                status, value = worker.conn.recv()
+            except (EOFError, OSError) as e:
+                raise RuntimeError(f"Worker de inferência indisponível: {str(e)}")
+            healthy = True
+        finally:
+            if healthy:
+                self._idle.put(worker)
+            else:
+                # Processo morto ou pipe com uma resposta pendente: não volta ao pool
+                self._discard(worker)
+
+        if status != "ok":
+            error_type, message = value
+            if error_type == "ValueError":
+                raise ValueError(message)
+            raise RuntimeError(f"{error_type}: {message}")
+        return value
+
+    def _acquire_worker(self) -> Optional[_Worker]:
+        """Um worker ocioso; None se não há nenhum vivo"""
+        deadline = time.monotonic() + self.queue_timeout if self.queue_timeout else None
+        while True:
+            if self._closed:
+                raise RuntimeError("Executor de inferência encerrado")
+            if not self._workers:
+                return None
+            try:
+                return self._idle.get(timeout=0.5)
+            except queue.Empty:
+                pass
+            if deadline is not None and time.monotonic() > deadline:
+                self._count("timed_out")
+                raise InferenceQueueFull("Nenhum worker de inferência livre", self.retry_after())
+
+    def _discard(self, worker: _Worker):
+        """Encerra o worker e sobe outro no lugar em segundo plano"""
+        with self._workers_lock:
+            if worker in self._workers:
+                self._workers.remove(worker)
+        worker.close(graceful=False)
+        if not self._closed:
+            threading.Thread(target=self._respawn, name="inference-respawn", daemon=True).start()
+
+    def _respawn(self):
+        """Sobe um worker novo, tentando de novo com espera crescente até conseguir"""
+        delay = 1.0
+        while True:
+            if self._closed:
+                return
+            worker = None
+            try:
+                worker = _Worker(self._context)
+                worker.wait_ready(self._start_timeout)
+                break
+            except Exception as e:
+                if worker is not None:
+                    worker.close(graceful=False)
+                print(f"Erro ao reiniciar worker de inferência (nova tentativa em {delay:.0f}s): {str(e)}")
+                time.sleep(delay)
+                delay = min(60.0, 2 * delay)
+        with self._workers_lock:
+            if self._closed:
+                worker.close()
+                return
+            self._workers.append(worker)
+            self.respawned += 1
+        self._idle.put(worker)
+
+    def stats(self) -> dict:
+        stats = super().stats()
+        stats["alive_workers"] = len(self._workers)
+        stats["respawned"] = self.respawned
+        return stats
+
+    def close(self):
+        with self._workers_lock:
+            self._closed = True
+            workers, self._workers = self._workers, []
+        for worker in workers:
+            worker.close()
+
+
+def create_executor() -> InferenceExecutor:
+    """Executor configurado por INFERENCE_BACKEND ("thread" ou "process")"""
+    backend = os.getenv("INFERENCE_BACKEND", "thread").lower()
+    workers = int(os.getenv("INFERENCE_WORKERS", "0")) or None
+    queue_size = os.getenv("INFERENCE_QUEUE_SIZE")
+    queue_size = int(queue_size) if queue_size else None
+    # Espera máxima por um worker (0 = sem limite)
+    queue_timeout = float(os.getenv("INFERENCE_QUEUE_TIMEOUT", "10")) or None
+
+    if backend == "process":
+        try:
+            return ProcessInferenceExecutor(workers, queue_size, queue_timeout)
+        except Exception as e:
+            print(f"⚠️  Pool de processos de inferência indisponível ({str(e)}); usando threads")
+
+    workers = workers or os.cpu_count() or 1
+    return InferenceExecutor(workers, queue_size if queue_size is not None else 2 * workers, queue_timeout)
@@ -1,11 +1,13 @@
-from fastapi import FastAPI, Request, HTTPException, Security
+from fastapi import FastAPI, Security
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.security import APIKeyHeader
-from app.routes import train, recognize, status, alert, faces
+from app.auth import verify_api_key
+from app.routes import train, recognize, status, alert, faces, cameras, events
 from app.services.camera_service import camera_service
 from app.services.alert_service import alert_service
+from app.services.event_service import event_service
+from app.services.face_service import face_service
 from app.database import db
-import os
+import threading
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -25,20 +27,6 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Segurança via API Key
-API_KEY = os.getenv("API_KEY", "your-secret-api-key-123")
-api_key_header = APIKeyHeader(name="x-api-key", auto_error=False)
-
-
-def verify_api_key(request: Request, api_key: str = Security(api_key_header)):
-    """Verifica se a API key é válida"""
-    if not api_key or api_key != API_KEY:
-        raise HTTPException(
-            status_code=401,
-            detail="API key inválida ou ausente. Forneça o header 'x-api-key'."
-        )
-    return api_key
-
 
 # Inclui rotas
 app.include_router(train.router, dependencies=[Security(verify_api_key)])
@@ -46,11 +34,15 @@ app.include_router(recognize.router, dependencies=[Security(verify_api_key)])
 app.include_router(status.router)  # Status pode ser público ou protegido conforme necessário
 app.include_router(alert.router, dependencies=[Security(verify_api_key)])
 app.include_router(faces.router, dependencies=[Security(verify_api_key)])
+app.include_router(cameras.router, dependencies=[Security(verify_api_key)])
+app.include_router(events.router)  # Valida a API key por header ou ?api_key= (EventSource/WebSocket)
 
 
 # Callback para quando uma face é reconhecida
 def on_face_recognized(data: dict):
     """Callback chamado quando uma face é reconhecida pela câmera"""
+    # Antes do webhook: assinantes do stream não esperam pelo HTTP do alerta
+    event_service.publish("face_recognized", data)
     alert_service.send_alert(
         face_id=data["face_id"],
         name=data["name"],
@@ -81,12 +73,25 @@ async def startup_event():
         print("✅ face-recognition disponível!")
     
     print(f"📊 Rostos treinados: {db.get_trained_faces_count()}")
+    
+    # Converte encodings JSON legados para binário em segundo plano (sem downtime)
+    threading.Thread(target=_migrate_encodings, daemon=True).start()
+
+
+def _migrate_encodings():
+    try:
+        converted = db.migrate_encodings_to_binary(pause_seconds=0.05)
+        if converted:
+            print(f"🗜️  {converted} encodings convertidos para o formato binário")
+    except Exception as e:
+        print(f"Erro na migração de encodings: {str(e)}")
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Executado quando o servidor é encerrado"""
     camera_service.stop()
+    face_service.close()
     print("👋 Face Recognition API encerrada")
 
 
@@ -101,7 +106,8 @@ async def root():
             "train": "/train",
             "recognize": "/recognize",
             "status": "/status",
-            "alert": "/alert"
+            "alert": "/alert",
+            "events": "/events/stream"
         }
     }
 
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Any, Dict, Optional, List
 from datetime import datetime
 
 
@@ -21,9 +21,25 @@ class RecognizedFace(BaseModel):
     face_id: str
 
 
+class Candidate(BaseModel):
+    face_id: str
+    name: str
+    distance: float
+    confidence: float
+
+
+class FaceCandidates(BaseModel):
+    face_index: int
+    candidates: List[Candidate] = []
+
+
 class RecognizeResponse(BaseModel):
     status: str
     recognized_faces: List[RecognizedFace] = []
+    # Preenchido apenas quando top_k é informado
+    candidates: Optional[List[FaceCandidates]] = None
+    # Escala usada na detecção de faces (1.0 = resolução original)
+    detection_scale: Optional[float] = None
 
 
 class StatusResponse(BaseModel):
@@ -31,6 +47,12 @@ class StatusResponse(BaseModel):
     trained_faces_count: int
     last_recognition: Optional[str] = None
     uptime_seconds: float
+    # Contadores por câmera (FPS, descartes, portão de movimento, rastreador) e do pipeline
+    camera_stats: Optional[Dict[str, Any]] = None
+    # Executor de inferência: workers, fila, rejeições, tempo na fila vs. inferência
+    inference_stats: Optional[Dict[str, Any]] = None
+    # Cache de caixas + encodings das imagens enviadas: acertos, erros, remoções, memória
+    cache_stats: Optional[Dict[str, Any]] = None
 
 
 class AlertRequest(BaseModel):
@@ -0,0 +1,121 @@
+from typing import List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+# Região no frame original: (x, y, largura, altura)
+Region = Tuple[int, int, int, int]
+
+
+class MotionGate:
+    """
+    Portão de movimento para câmeras fixas.
+
+    Cada frame é reduzido para `width` pixels de largura em tons de cinza e
+    comparado com um fundo médio (cv2.accumulateWeighted). Se nada mudou, a
+    detecção de faces é pulada; se mudou, retorna as regiões com movimento
+    (já no tamanho do frame original, com margem) para detectar só nelas.
+    A cada `full_frame_interval` frames avaliados o frame inteiro é liberado,
+    para não perder quem ficou parado diante da câmera.
+    """
+
+    def __init__(
+        self,
+        width: int = 160,
+        threshold: int = 25,
+        min_area: float = 0.002,
+        padding: float = 0.5,
+        full_frame_interval: int = 150,
+        learning_rate: float = 0.05
+    ):
+        self.width = width
+        self.threshold = threshold
+        # Fração mínima do frame reduzido que precisa mudar
+        self.min_area = min_area
+        # Margem em volta de cada região, relativa ao tamanho dela
+        self.padding = padding
+        self.full_frame_interval = full_frame_interval
+        self.learning_rate = learning_rate
+        self._background: Optional[np.ndarray] = None
+        self._since_full = 0
+        self.stats = {"frames": 0, "gated": 0, "processed": 0, "full_frames": 0}
+
+    def reset(self):
+        self._background = None
+        self._since_full = 0
+
+    def check(self, frame: np.ndarray) -> Optional[List[Region]]:
+        """
+        Avalia o frame. Retorna None se não houve movimento (pular a detecção)
+        ou a lista de regiões a processar ([] = frame inteiro).
+        """
+        self.stats["frames"] += 1
+        height, width = frame.shape[:2]
+        scale = self.width / width
+        small = cv2.resize(frame, (self.width, max(1, int(height * scale))), interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else small
+        gray = cv2.GaussianBlur(gray, (5, 5), 0)
+
+        if self._background is None:
+            self._background = gray.astype(np.float32)
+            return self._full_frame()
+
+        diff = cv2.absdiff(gray, cv2.convertScaleAbs(self._background))
+        cv2.accumulateWeighted(gray, self._background, self.learning_rate)
+        _, mask = cv2.threshold(diff, self.threshold, 255, cv2.THRESH_BINARY)
+
+        self._since_full += 1
+        if cv2.countNonZero(mask) < self.min_area * mask.size:
+            if self._since_full >= self.full_frame_interval:
+                return self._full_frame()
+            self.stats["gated"] += 1
+            return None
+
+        mask = cv2.dilate(mask, None, iterations=2)
+        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        regions = _merge_regions([
+            self._to_frame(cv2.boundingRect(c), scale, width, height) for c in contours
+        ])
+
+        # Regiões cobrindo a maior parte do frame: mais barato detectar nele inteiro
+        if sum(w * h for _, _, w, h in regions) > 0.5 * width * height:
+            return self._full_frame()
+
+        self.stats["processed"] += 1
+        return regions
+
+    def _full_frame(self) -> List[Region]:
+        self._since_full = 0
+        self.stats["processed"] += 1
+        self.stats["full_frames"] += 1
+        return []
+
+    def _to_frame(self, rect: Region, scale: float, width: int, height: int) -> Region:
+        """Converte a região do frame reduzido para o original, com margem"""
+        x, y, w, h = (v / scale for v in rect)
+        pad = self.padding * max(w, h)
+        left, top = max(0, int(x - pad)), max(0, int(y - pad))
+        right, bottom = min(width, int(x + w + pad)), min(height, int(y + h + pad))
+        return left, top, right - left, bottom - top
+
+
+def _merge_regions(regions: List[Region]) -> List[Region]:
+    """Une regiões que se sobrepõem (uma face não pode ficar dividida entre duas)"""
+    merged = list(regions)
+    changed = True
+    while changed:
+        changed = False
+        result = []
+        for region in merged:
+            x, y, w, h = region
+            for i, (ox, oy, ow, oh) in enumerate(result):
+                if x < ox + ow and ox < x + w and y < oy + oh and oy < y + h:
+                    left, top = min(x, ox), min(y, oy)
+                    right, bottom = max(x + w, ox + ow), max(y + h, oy + oh)
+                    result[i] = (left, top, right - left, bottom - top)
+                    changed = True
+                    break
+            else:
+                result.append(region)
+        merged = result
+    return merged
@@ -0,0 +1,377 @@
+import collections
+import threading
+import time
+from typing import Any, Callable, List, Optional, Sequence, Tuple, Type, Union
+
+
+class DropOldestQueue:
+    """
+    Fila limitada em que um item novo descarta o mais antigo quando está cheia.
+    Com maxsize=1 vira um buffer "último frame vence".
+    """
+
+    def __init__(self, maxsize: int = 1):
+        self.maxsize = max(1, maxsize)
+        self._items: collections.deque = collections.deque()
+        self._cond = threading.Condition()
+        self.dropped = 0
+
+    def put(self, item: Any):
+        with self._cond:
+            if len(self._items) >= self.maxsize:
+                self._items.popleft()
+                self.dropped += 1
+            self._items.append(item)
+            self._cond.notify()
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Any]:
+        """Próximo item, ou None se nada chegou dentro do timeout"""
+        with self._cond:
+            if not self._items:
+                self._cond.wait(timeout)
+            return self._items.popleft() if self._items else None
+
+    def release(self, item: Any):
+        """Chamado pelo estágio ao terminar o item (ver FairQueue)"""
+
+    def clear(self):
+        with self._cond:
+            self._items.clear()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+class FairQueue:
+    """
+    Fila por chave (ex.: câmera) com `maxsize` itens por chave, descartando o
+    mais antigo da própria chave. A retirada escolhe entre as chaves com itens
+    pelo round-robin ponderado suave (pesos em set_weight), então uma chave
+    movimentada não impede as outras de serem atendidas.
+
+    Com `exclusive`, uma chave não é servida de novo até o estágio liberar o
+    item anterior dela (release), ou seja, no máximo um item por chave em
+    processamento (o estado por câmera não é acessado por duas threads).
+    """
+
+    def __init__(self, key: Callable[[Any], Any], maxsize: int = 1, exclusive: bool = False):
+        self.key = key
+        self.maxsize = max(1, maxsize)
+        self.exclusive = exclusive
+        self._items: "collections.OrderedDict[Any, collections.deque]" = collections.OrderedDict()
+        self._weights = {}
+        self._current = {}
+        self._busy = set()
+        self._cond = threading.Condition()
+        self.dropped = 0
+        self.dropped_by_key: collections.Counter = collections.Counter()
+
+    def set_weight(self, key: Any, weight: int):
+        with self._cond:
+            self._weights[key] = max(1, weight)
+
+    def remove_key(self, key: Any):
+        with self._cond:
+            self._items.pop(key, None)
+            self._weights.pop(key, None)
+            self._current.pop(key, None)
+            self.dropped_by_key.pop(key, None)
+
+    def put(self, item: Any):
+        key = self.key(item)
+        with self._cond:
+            items = self._items.setdefault(key, collections.deque())
+            if len(items) >= self.maxsize:
+                items.popleft()
+                self.dropped += 1
+                self.dropped_by_key[key] += 1
+            items.append(item)
+            self._cond.notify()
+
+    def _pick(self) -> Optional[Any]:
+        ready = [k for k, items in self._items.items() if items and k not in self._busy]
+        if not ready:
+            return None
+        # Round-robin ponderado suave: cada chave pronta ganha o seu peso e a
+        # escolhida perde o total, intercalando as chaves na proporção dos pesos
+        total = 0
+        for k in ready:
+            weight = self._weights.get(k, 1)
+            self._current[k] = self._current.get(k, 0) + weight
+            total += weight
+        chosen = max(ready, key=lambda k: self._current[k])
+        self._current[chosen] -= total
+        return chosen
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Any]:
+        """Próximo item na vez, ou None se nada chegou dentro do timeout"""
+        with self._cond:
+            key = self._pick()
+            if key is None:
+                self._cond.wait(timeout)
+                key = self._pick()
+                if key is None:
+                    return None
+            if self.exclusive:
+                self._busy.add(key)
+            return self._items[key].popleft()
+
+    def release(self, item: Any):
+        if self.exclusive:
+            with self._cond:
+                self._busy.discard(self.key(item))
+                self._cond.notify()
+
+    def clear(self):
+        with self._cond:
+            self._items.clear()
+            self._busy.clear()
+
+    def __len__(self) -> int:
+        return sum(len(items) for items in self._items.values())
+
+
+class LatencyStats:
+    """Latências das últimas `window` amostras, em milissegundos"""
+
+    def __init__(self, window: int = 200):
+        self._samples: collections.deque = collections.deque(maxlen=window)
+
+    def add(self, seconds: float):
+        self._samples.append(seconds)
+
+    def mean(self) -> float:
+        """Média das amostras, em segundos (0.0 sem amostras)"""
+        samples = list(self._samples)
+        return sum(samples) / len(samples) if samples else 0.0
+
+    def snapshot(self) -> dict:
+        if not self._samples:
+            return {"avg": 0.0, "p95": 0.0, "max": 0.0}
+        samples = sorted(self._samples)
+        return {
+            "avg": round(1000 * sum(samples) / len(samples), 2),
+            "p95": round(1000 * samples[min(len(samples) - 1, int(0.95 * len(samples)))], 2),
+            "max": round(1000 * samples[-1], 2)
+        }
+
+
+Queue = Union[DropOldestQueue, FairQueue]
+
+
+class Stage:
+    """
+    Um estágio do pipeline: `workers` threads que consomem `source`, aplicam
+    `fn` e entregam o resultado em `target`. `fn` retorna None para consumir o
+    item sem repassá-lo (ex.: nada a fazer neste frame).
+
+    Itens mais velhos que `max_age` segundos (desde `captured_at`) e exceções em
+    `drop_on` (ex.: inferência saturada) descartam o item, sem erro no log.
+    O tempo gasto em `fn` é somado em `item.compute_time`, e `on_complete(item)`
+    é chamado quando o item sai do pipeline por este estágio.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        fn: Callable[[Any], Any],
+        source: Queue,
+        target: Optional[Queue] = None,
+        drop_on: Tuple[Type[BaseException], ...] = (),
+        max_age: Optional[float] = None,
+        on_complete: Optional[Callable[[Any], None]] = None,
+        workers: int = 1,
+        key: Optional[Callable[[Any], Any]] = None
+    ):
+        self.name = name
+        self.fn = fn
+        self.source = source
+        self.target = target
+        self.drop_on = drop_on
+        self.max_age = max_age
+        self.on_complete = on_complete
+        self.workers = max(1, workers)
+        self.key = key
+        self.latency = LatencyStats()
+        self.processed = 0
+        self.discarded = 0
+        self.expired = 0
+        self.errors = 0
+        # Descartes por chave (ex.: câmera), quando o pipeline tem `key`
+        self.dropped_by_key: collections.Counter = collections.Counter()
+        self.threads: List[threading.Thread] = []
+
+    def start(self, stop_event: threading.Event):
+        self.threads = [
+            threading.Thread(target=self._run, args=(stop_event,), name=f"pipeline-{self.name}-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    def _run(self, stop_event: threading.Event):
+        while not stop_event.is_set():
+            item = self.source.get(timeout=0.2)
+            if item is None:
+                continue
+            try:
+                self._process(item)
+            finally:
+                self.source.release(item)
+
+    def _drop(self, item: Any):
+        if self.key is not None:
+            self.dropped_by_key[self.key(item)] += 1
+
+    def _process(self, item: Any):
+        if self.max_age is not None and time.monotonic() - item.captured_at > self.max_age:
+            self.expired += 1
+            self._drop(item)
+            return
+
+        start = time.perf_counter()
+        try:
+            result = self.fn(item)
+        except self.drop_on:
+            self.discarded += 1
+            self._drop(item)
+            return
+        except Exception as e:
+            self.errors += 1
+            print(f"Erro no estágio {self.name}: {str(e)}")
+            return
+        finally:
+            elapsed = time.perf_counter() - start
+            self.latency.add(elapsed)
+            item.compute_time += elapsed
+
+        self.processed += 1
+        if result is not None and self.target is not None:
+            self.target.put(result)
+        elif self.on_complete is not None:
+            try:
+                self.on_complete(item)
+            except Exception as e:
+                print(f"Erro no estágio {self.name}: {str(e)}")
+
+    def join(self, timeout: float):
+        for thread in self.threads:
+            thread.join(timeout=timeout)
+        self.threads = []
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "processed": self.processed,
+            # Itens perdidos por este estágio: sobrescritos na fila de entrada
+            # enquanto ele estava ocupado + descartados por ele
+            "dropped": self.source.dropped + self.discarded + self.expired,
+            "expired": self.expired,
+            "errors": self.errors,
+            "queued": len(self.source),
+            "latency_ms": self.latency.snapshot()
+        }
+
+
+class Pipeline:
+    """
+    Estágios em threads separadas ligados por filas limitadas (descarta o item
+    mais antigo). A entrada é um buffer de uma posição: se o primeiro estágio
+    está ocupado, o frame novo substitui o que ainda não foi processado. Assim
+    a latência de ponta a ponta fica limitada sob sobrecarga em vez de crescer.
+
+    Com `key` (ex.: câmera do item), cada fila vira uma FairQueue: uma posição
+    de entrada por chave e atendimento por round-robin ponderado entre as
+    chaves, com no máximo um item por chave no primeiro estágio.
+
+    Os estágios são (nome, fn) ou (nome, fn, threads). Os itens precisam dos
+    atributos `captured_at` (time.monotonic() da captura) e `compute_time`
+    (0.0; tempo somado pelos estágios). `on_complete(item)` é chamado para
+    cada item que sai do pipeline sem ser descartado.
+    """
+
+    def __init__(
+        self,
+        stages: Sequence[tuple],
+        queue_size: int = 2,
+        drop_on: Tuple[Type[BaseException], ...] = (),
+        max_age: Optional[float] = None,
+        on_complete: Optional[Callable[[Any], None]] = None,
+        key: Optional[Callable[[Any], Any]] = None
+    ):
+        self.key = key
+        self.input = FairQueue(key, 1, exclusive=True) if key else DropOldestQueue(1)
+        self.end_to_end = LatencyStats()
+        self.submitted = 0
+        self.completed = 0
+        self._stop = threading.Event()
+
+        self.stages: List[Stage] = []
+        source = self.input
+        for i, (name, fn, *workers) in enumerate(stages):
+            last = i == len(stages) - 1
+            target = None
+            if not last:
+                target = FairQueue(key, queue_size) if key else DropOldestQueue(queue_size)
+            self.stages.append(Stage(
+                name, self._finish(fn) if last else fn, source, target, drop_on, max_age, on_complete,
+                workers[0] if workers else 1, key
+            ))
+            source = target
+
+    def _finish(self, fn: Callable[[Any], Any]) -> Callable[[Any], Any]:
+        """Envolve o último estágio para medir a latência captura → fim"""
+        def run(item):
+            result = fn(item)
+            self.completed += 1
+            self.end_to_end.add(time.monotonic() - item.captured_at)
+            return result
+        return run
+
+    def submit(self, item: Any):
+        """Entrega um frame ao pipeline (substitui o anterior da mesma chave se ainda não foi consumido)"""
+        self.submitted += 1
+        self.input.put(item)
+
+    def set_weight(self, key: Any, weight: int):
+        """Peso da chave no round-robin de todas as filas"""
+        for stage in self.stages:
+            if isinstance(stage.source, FairQueue):
+                stage.source.set_weight(key, weight)
+
+    def remove_key(self, key: Any):
+        """Descarta os itens pendentes e os contadores da chave"""
+        for stage in self.stages:
+            if isinstance(stage.source, FairQueue):
+                stage.source.remove_key(key)
+            stage.dropped_by_key.pop(key, None)
+
+    def dropped(self, key: Any) -> int:
+        """Itens da chave descartados em qualquer estágio"""
+        return sum(
+            stage.dropped_by_key[key] + (stage.source.dropped_by_key[key] if isinstance(stage.source, FairQueue) else 0)
+            for stage in self.stages
+        )
+
+    @property
+    def is_running(self) -> bool:
+        return any(stage.threads for stage in self.stages)
+
+    def start(self):
+        self._stop.clear()
+        for stage in self.stages:
+            stage.source.clear()
+            stage.start(self._stop)
+
+    def stop(self, timeout: float = 2.0):
+        self._stop.set()
+        for stage in self.stages:
+            stage.join(timeout)
+
+    def stats(self) -> dict:
+        return {
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "end_to_end_ms": self.end_to_end.snapshot(),
+            "stages": {stage.name: stage.stats() for stage in self.stages}
+        }
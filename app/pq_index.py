@@ -0,0 +1,229 @@
+import numpy as np
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from app.ann_index import kmeans
+from app.gallery import Gallery, ENCODING_DIM, euclidean_distances
+
+# Linhas codificadas por vez (limita a matriz temporária de distâncias N x 256)
+_ENCODE_CHUNK = 65536
+
+
+class ProductQuantizer:
+    """
+    Quantização por produto: o encoding (128 floats) é dividido em `subspaces`
+    blocos e cada bloco vira o índice (uint8) do centróide mais próximo do
+    codebook daquele bloco. Com 16 blocos, cada rosto ocupa 16 bytes em vez
+    de 512 (float32).
+    """
+
+    def __init__(self, subspaces: int = 16, centroids: int = 256, kmeans_iterations: int = 10, seed: int = 0):
+        if ENCODING_DIM % subspaces or subspaces % 2:
+            raise ValueError(f"subspaces deve ser par e dividir {ENCODING_DIM}")
+        if not 1 <= centroids <= 256:
+            raise ValueError("centroids deve estar entre 1 e 256 (códigos uint8)")
+        self.subspaces = subspaces
+        self.centroids = centroids
+        self.kmeans_iterations = kmeans_iterations
+        self.seed = seed
+        self.sub_dim = ENCODING_DIM // subspaces
+        # (subspaces, centroids, sub_dim)
+        self.codebooks: Optional[np.ndarray] = None
+
+    def train(self, sample: np.ndarray):
+        sample = np.asarray(sample, dtype=np.float32).reshape(-1, ENCODING_DIM)
+        rng = np.random.default_rng(self.seed)
+        k = min(self.centroids, sample.shape[0])
+        self.codebooks = np.stack([
+            kmeans(self._block(sample, m), k, self.kmeans_iterations, rng)
+            for m in range(self.subspaces)
+        ])
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        """Códigos (subspaces, N) uint8 dos vetores (N, 128)"""
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, ENCODING_DIM)
+        codes = np.empty((self.subspaces, vectors.shape[0]), dtype=np.uint8)
+        for start in range(0, vectors.shape[0], _ENCODE_CHUNK):
+            chunk = vectors[start:start + _ENCODE_CHUNK]
+            for m in range(self.subspaces):
+                codes[m, start:start + chunk.shape[0]] = \
+                    euclidean_distances(self._block(chunk, m), self.codebooks[m]).argmin(axis=1)
+        return codes
+
+    def distance_tables(self, probes: np.ndarray) -> np.ndarray:
+        """
+        Distâncias ao quadrado (P, subspaces, centroids) de cada bloco de cada
+        probe até os centróides do codebook correspondente.
+        """
+        probes = np.asarray(probes, dtype=np.float32).reshape(-1, ENCODING_DIM)
+        blocks = probes.reshape(-1, self.subspaces, 1, self.sub_dim)
+        diff = blocks - self.codebooks[None, :, :, :]
+        return np.einsum("pmkd,pmkd->pmk", diff, diff)
+
+    def _block(self, vectors: np.ndarray, m: int) -> np.ndarray:
+        return vectors[:, m * self.sub_dim:(m + 1) * self.sub_dim]
+
+
+class PQIndex:
+    """
+    Galeria quantizada (product quantization) com re-rank exato.
+
+    As distâncias grossas são calculadas só sobre os códigos de 16 bytes por
+    rosto (tabelas de distância por bloco, ADC); os códigos ficam agrupados em
+    pares (uint16) para que cada consulta de tabela cubra dois blocos. Os
+    `shortlist` candidatos mais próximos são reordenados pela distância exata
+    com os vetores float32 da galeria. Com GALLERY_SHARED_SNAPSHOT=true a
+    matriz da galeria é mapeada do disco e só as linhas dos candidatos chegam
+    a ser lidas.
+
+    Mesma interface de manutenção do IVFIndex (build / add / remove / sync).
+    Inserções escrevem além do fim visível dos buffers e remoções viram
+    tombstones, então buscas concorrentes sempre veem um estado consistente.
+    """
+
+    def __init__(self, subspaces: int = 16, shortlist: int = 64, sample_size: int = 20000,
+                 kmeans_iterations: int = 10, seed: int = 0):
+        self.quantizer = ProductQuantizer(subspaces, kmeans_iterations=kmeans_iterations, seed=seed)
+        self.shortlist = shortlist
+        self.sample_size = sample_size
+        self.seed = seed
+        self.trained_size = 0
+        self._positions: Dict[str, int] = {}
+        # Estado visto pelos leitores, trocado de uma vez:
+        # (códigos em pares (subspaces/2, capacidade) uint16, face_ids por coluna,
+        # tamanho visível, colunas removidas)
+        self._view: Tuple[np.ndarray, List[str], int, np.ndarray] = self._empty_view()
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    @property
+    def is_trained(self) -> bool:
+        return self.quantizer.codebooks is not None
+
+    @property
+    def code_bytes(self) -> int:
+        """Memória ocupada pelos códigos"""
+        return self._view[0].nbytes
+
+    def train(self, matrix: np.ndarray):
+        matrix = np.asarray(matrix, dtype=np.float32)
+        n = matrix.shape[0]
+        rng = np.random.default_rng(self.seed)
+        sample = matrix[np.sort(rng.choice(n, size=min(n, self.sample_size), replace=False))]
+        self.quantizer.train(sample)
+        self._positions = {}
+        self._view = self._empty_view()
+        self.trained_size = n
+
+    def _empty_view(self) -> Tuple[np.ndarray, List[str], int, np.ndarray]:
+        return np.empty((self.quantizer.subspaces // 2, 0), dtype=np.uint16), [], 0, np.empty(0, dtype=np.intp)
+
+    def build(self, gallery: Gallery):
+        """Treina os codebooks e codifica toda a galeria"""
+        self.train(gallery.matrix)
+        self.add_many(gallery.face_ids, gallery.matrix)
+
+    def add_many(self, face_ids: Sequence[str], vectors: np.ndarray):
+        if not len(face_ids):
+            return
+        for face_id in face_ids:
+            if face_id in self._positions:
+                self.remove(face_id)
+
+        codes8 = self.quantizer.encode(vectors)
+        new_codes = codes8[0::2].astype(np.uint16) | (codes8[1::2].astype(np.uint16) << 8)
+        codes, column_ids, size, dead = self._view
+        end = size + len(face_ids)
+        if end > codes.shape[1]:
+            grown = np.empty((codes.shape[0], max(1024, end + end // 4)), dtype=np.uint16)
+            grown[:, :size] = codes[:, :size]
+            codes = grown
+
+        # Escreve além do fim visível: leitores do estado anterior não leem estas colunas
+        codes[:, size:end] = new_codes
+        for offset, face_id in enumerate(face_ids):
+            self._positions[face_id] = size + offset
+            column_ids.append(face_id)
+        self._view = (codes, column_ids, end, dead)
+
+    def add(self, face_id: str, vector: np.ndarray):
+        self.add_many([face_id], vector)
+
+    def remove(self, face_id: str) -> bool:
+        row = self._positions.pop(face_id, None)
+        if row is None:
+            return False
+        codes, column_ids, size, dead = self._view
+        self._view = (codes, column_ids, size, np.append(dead, row))
+        if len(dead) + 1 > max(64, 0.1 * size):
+            self._compact()
+        return True
+
+    def sync(self, gallery: Gallery):
+        """Aplica incrementalmente as inserções/remoções entre o índice e a galeria"""
+        face_ids = gallery.face_ids
+        current = set(face_ids)
+        for face_id in [f for f in self._positions if f not in current]:
+            self.remove(face_id)
+
+        added = [row for row, face_id in enumerate(face_ids) if face_id not in self._positions]
+        if added:
+            self.add_many([face_ids[row] for row in added], gallery.matrix[added])
+
+    def _compact(self):
+        """Remove as colunas dos tombstones em buffers novos"""
+        codes, column_ids, _, _ = self._view
+        rows = sorted(self._positions.values())
+        compact = np.ascontiguousarray(codes[:, rows])
+        face_ids = [column_ids[row] for row in rows]
+        self._positions = {face_id: row for row, face_id in enumerate(face_ids)}
+        self._view = (compact, face_ids, len(rows), np.empty(0, dtype=np.intp))
+
+    def search(self, probes: np.ndarray, gallery: Gallery, shortlist: Optional[int] = None) -> List[Tuple[str, float]]:
+        """
+        Retorna, para cada probe, (face_id, distância exata) do melhor candidato
+        da shortlist, ou ("", inf) se nenhum candidato estiver na galeria.
+        """
+        probes = np.asarray(probes, dtype=np.float32).reshape(-1, ENCODING_DIM)
+        # Referências locais: o escritor só troca o estado inteiro
+        codes, face_ids, size, dead = self._view
+        shortlist = min(shortlist or self.shortlist, size)
+        if shortlist <= 0:
+            return [("", float("inf")) for _ in range(len(probes))]
+
+        tables = np.zeros((len(probes), self.quantizer.subspaces, 256), dtype=np.float32)
+        block_tables = self.quantizer.distance_tables(probes)
+        tables[:, :, :block_tables.shape[2]] = block_tables
+        # Tabela do par (a, b) indexada por a | b << 8
+        pair_tables = (tables[:, 0::2, None, :] + tables[:, 1::2, :, None]).reshape(len(probes), codes.shape[0], -1)
+
+        results = []
+        for probe, table in zip(probes, pair_tables):
+            # Distância aproximada (ADC): soma das distâncias de cada par de blocos
+            approx = np.zeros(size, dtype=np.float32)
+            for j in range(codes.shape[0]):
+                approx += table[j][codes[j, :size]]
+            if dead.size:
+                approx[dead] = np.inf
+
+            if shortlist < size:
+                candidates = np.argpartition(approx, shortlist - 1)[:shortlist]
+            else:
+                candidates = np.arange(size)
+
+            # Re-rank exato com os vetores float32 da galeria (só as linhas candidatas)
+            rows = []
+            for column in candidates.tolist():
+                row = gallery.position(face_ids[column])
+                if row is not None:
+                    rows.append(row)
+            if not rows:
+                results.append(("", float("inf")))
+                continue
+
+            vectors = np.stack([gallery.encoding_at(row) for row in rows])
+            distances = np.linalg.norm(vectors - probe, axis=1)
+            best = int(distances.argmin())
+            results.append((gallery.face_id_at(rows[best]), float(distances[best])))
+
+        return results
@@ -0,0 +1,138 @@
+import collections
+import hashlib
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+# Caixa (top, right, bottom, left)
+Box = Tuple[int, int, int, int]
+Result = Tuple[List[Box], List[np.ndarray]]
+
+# Custo fixo estimado por entrada (chave, tupla, OrderedDict) além dos arrays
+_ENTRY_OVERHEAD = 256
+
+
+def content_key(image_bytes: bytes, *params) -> str:
+    """Hash do conteúdo enviado + parâmetros que mudam o resultado da extração"""
+    digest = hashlib.blake2b(image_bytes, digest_size=16)
+    digest.update(repr(params).encode())
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """
+    Cache LRU com TTL das caixas + encodings extraídos de uma imagem, indexado
+    pelo hash do conteúdo. Guarda a extração (não o match): um acerto só é
+    comparado de novo com a galeria atual, então continua correto depois de
+    treinos e remoções.
+
+    Limitado por `max_bytes` (encodings + custo fixo por entrada). Chamadas
+    simultâneas com a mesma chave esperam a primeira em vez de repetir a
+    inferência.
+    """
+
+    def __init__(self, max_bytes: int, ttl: float):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: "collections.OrderedDict[str, Tuple[float, int, Result]]" = collections.OrderedDict()
+        self._pending = {}
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.expired = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0 and self.ttl > 0
+
+    def get_or_compute(self, key: str, compute: Callable[[], Result]) -> Result:
+        """Resultado em cache para a chave, ou compute() (guardado se couber)"""
+        if not self.enabled:
+            return compute()
+
+        with self._lock:
+            result = self._get(key)
+            if result is not None:
+                self.hits += 1
+                return result
+            future = self._pending.get(key)
+            owner = future is None
+            if owner:
+                self.misses += 1
+                future = self._pending[key] = Future()
+            else:
+                self.coalesced += 1
+        if not owner:
+            return future.result()
+
+        try:
+            boxes, encodings = compute()
+            result = (list(boxes), [_readonly(encoding) for encoding in encodings])
+        except BaseException as e:
+            with self._lock:
+                self._pending.pop(key, None)
+            future.set_exception(e)
+            raise
+
+        self._put(key, result)
+        future.set_result(result)
+        return result
+
+    def _get(self, key: str) -> Optional[Result]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        stored_at, size, result = entry
+        if time.monotonic() - stored_at > self.ttl:
+            self._remove(key)
+            self.expired += 1
+            return None
+        self._entries.move_to_end(key)
+        return result
+
+    def _put(self, key: str, result: Result):
+        size = _ENTRY_OVERHEAD + sum(encoding.nbytes for encoding in result[1])
+        with self._lock:
+            self._pending.pop(key, None)
+            if size > self.max_bytes:
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic(), size, result)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _remove(self, key: str):
+        _, size, _ = self._entries.pop(key)
+        self.bytes -= size
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "expired": self.expired,
+            "hit_rate": round((self.hits + self.coalesced) / lookups, 3) if lookups else 0.0
+        }
+
+
+def _readonly(encoding: np.ndarray) -> np.ndarray:
+    # Compartilhado entre requisições: ninguém deve alterar o array em cache
+    encoding = np.array(encoding)
+    encoding.setflags(write=False)
+    return encoding
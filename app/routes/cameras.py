@@ -0,0 +1,92 @@
+from fastapi import APIRouter, HTTPException
+from starlette.concurrency import run_in_threadpool
+from app.services.camera_service import camera_service
+from typing import Optional
+from pydantic import BaseModel, Field
+
+router = APIRouter(prefix="/cameras", tags=["Cameras"])
+
+
+class AddCameraRequest(BaseModel):
+    # Índice da câmera local ("0", "1"...), URL (rtsp://, http://) ou caminho de arquivo de vídeo
+    source: str
+    camera_id: Optional[str] = None
+    # Peso no round-robin do pipeline compartilhado (2 = atendida duas vezes mais)
+    weight: int = Field(1, ge=1, le=100)
+    # Segundos entre alertas da mesma pessoa nesta câmera
+    cooldown: Optional[float] = Field(None, ge=0)
+    # Arquivos de vídeo: recomeça do início ao terminar
+    loop: bool = False
+
+
+@router.get("")
+async def list_cameras():
+    """
+    Lista as câmeras registradas com as estatísticas de cada uma.
+    """
+    cameras = camera_service.list_cameras()
+    return {
+        "success": True,
+        "count": len(cameras),
+        "cameras": {camera.camera_id: camera_service.camera_stats(camera) for camera in cameras}
+    }
+
+
+@router.post("")
+async def add_camera(request: AddCameraRequest):
+    """
+    Registra e inicia uma câmera. Todas as câmeras compartilham o mesmo
+    pipeline de inferência, atendidas de forma justa conforme o peso.
+    """
+    if request.camera_id and camera_service.get_camera(request.camera_id):
+        raise HTTPException(status_code=409, detail=f"Câmera '{request.camera_id}' já existe")
+    
+    try:
+        # Abrir um stream pode demorar: fora do event loop
+        camera = await run_in_threadpool(
+            camera_service.add_camera,
+            request.source,
+            request.camera_id,
+            request.weight,
+            request.cooldown,
+            request.loop
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return {
+        "success": True,
+        "camera_id": camera.camera_id,
+        "camera": camera_service.camera_stats(camera)
+    }
+
+
+@router.get("/{camera_id}")
+async def get_camera(camera_id: str):
+    """
+    Estatísticas de uma câmera (frames, FPS, descartes, latência, alertas).
+    """
+    camera = camera_service.get_camera(camera_id)
+    if not camera:
+        raise HTTPException(status_code=404, detail="Câmera não encontrada")
+    
+    return {
+        "success": True,
+        "camera_id": camera_id,
+        "camera": camera_service.camera_stats(camera)
+    }
+
+
+@router.delete("/{camera_id}")
+async def remove_camera(camera_id: str):
+    """
+    Para e remove uma câmera.
+    """
+    success = await run_in_threadpool(camera_service.remove_camera, camera_id)
+    if not success:
+        raise HTTPException(status_code=404, detail="Câmera não encontrada")
+    
+    return {
+        "success": True,
+        "message": f"Câmera {camera_id} removida com sucesso"
+    }
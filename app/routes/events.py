@@ -0,0 +1,128 @@
+from fastapi import APIRouter, HTTPException, Header, Query, WebSocket, status
+from fastapi.responses import StreamingResponse
+from app.auth import is_authorized
+from app.services.event_service import Subscription, event_service
+from typing import AsyncIterator, Optional
+import asyncio
+import json
+import os
+
+router = APIRouter(prefix="/events", tags=["Events"])
+
+# Intervalo do comentário keep-alive do SSE (mantém proxies com a conexão aberta)
+KEEPALIVE_SECONDS = float(os.getenv("EVENT_KEEPALIVE_SECONDS", "15"))
+
+
+def _dropped_event(subscription: Subscription, reported: int) -> Optional[dict]:
+    """Avisa o cliente de quantos eventos perdeu por não acompanhar"""
+    if subscription.dropped > reported:
+        return {"event": "dropped", "count": subscription.dropped - reported}
+    return None
+
+
+@router.get("/recent")
+async def recent_events(
+    limit: int = Query(50, ge=1, le=1000),
+    since: Optional[int] = Query(None, description="Só eventos com id maior"),
+    x_api_key: Optional[str] = Header(None),
+    api_key: Optional[str] = Query(None)
+):
+    """
+    Últimos eventos de reconhecimento, direto da memória (sem consultar o banco).
+    """
+    if not is_authorized(x_api_key, api_key):
+        raise HTTPException(status_code=401, detail="API key inválida ou ausente.")
+    
+    events = event_service.recent(limit, since)
+    return {
+        "success": True,
+        "count": len(events),
+        "events": events,
+        "stats": event_service.stats()
+    }
+
+
+@router.get("/stream")
+async def stream_events(
+    x_api_key: Optional[str] = Header(None),
+    api_key: Optional[str] = Query(None),
+    last_event_id: Optional[int] = Header(None)
+):
+    """
+    Server-Sent Events com os reconhecimentos da câmera em tempo real.
+    Ao reconectar, o navegador envia Last-Event-ID e recebe os eventos perdidos
+    que ainda estão no histórico.
+    """
+    if not is_authorized(x_api_key, api_key):
+        raise HTTPException(status_code=401, detail="API key inválida ou ausente.")
+    
+    subscription = event_service.subscribe(since=last_event_id)
+    return StreamingResponse(
+        _sse_lines(subscription),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+async def _sse_lines(subscription: Subscription) -> AsyncIterator[str]:
+    # Cancelado pelo Starlette quando o cliente desconecta
+    reported = 0
+    try:
+        yield "retry: 3000\n\n"
+        while True:
+            event = await subscription.get(timeout=KEEPALIVE_SECONDS)
+            if event is None:
+                yield ": keep-alive\n\n"
+                continue
+            
+            dropped = _dropped_event(subscription, reported)
+            if dropped:
+                reported = subscription.dropped
+                yield f"event: dropped\ndata: {json.dumps(dropped)}\n\n"
+            yield f"id: {event['id']}\nevent: {event['event']}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+    finally:
+        event_service.unsubscribe(subscription)
+
+
+@router.websocket("/ws")
+async def websocket_events(
+    websocket: WebSocket,
+    x_api_key: Optional[str] = Header(None),
+    api_key: Optional[str] = Query(None),
+    since: Optional[int] = Query(None)
+):
+    """
+    WebSocket com os reconhecimentos da câmera em tempo real (um JSON por
+    mensagem). Mensagens enviadas pelo cliente são ignoradas.
+    """
+    if not is_authorized(x_api_key, api_key):
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    
+    await websocket.accept()
+    subscription = event_service.subscribe(since=since)
+    sender = asyncio.create_task(_send_events(websocket, subscription))
+    try:
+        # Lê até o cliente desconectar; o envio corre em paralelo
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+    finally:
+        sender.cancel()
+        event_service.unsubscribe(subscription)
+
+
+async def _send_events(websocket: WebSocket, subscription: Subscription):
+    reported = 0
+    try:
+        while True:
+            event = await subscription.get()
+            dropped = _dropped_event(subscription, reported)
+            if dropped:
+                reported = subscription.dropped
+                await websocket.send_json(dropped)
+            await websocket.send_json(event)
+    except Exception:
+        # Conexão fechada no meio de um envio: o loop de leitura encerra
+        pass
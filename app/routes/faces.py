@@ -1,5 +1,7 @@
 from fastapi import APIRouter, HTTPException, Query, Body
+from starlette.concurrency import run_in_threadpool
 from app.database import db
+from app.services.face_service import face_service
 from typing import List, Optional
 from pydantic import BaseModel
 
@@ -58,7 +60,8 @@ async def delete_face(face_id: str):
     """
     Remove um rosto treinado.
     """
-    success = db.delete_trained_face(face_id)
+    # Em uma thread do pool: espera a galeria ser atualizada sem bloquear o event loop
+    success = await run_in_threadpool(face_service.delete_face, face_id)
     if not success:
         raise HTTPException(status_code=404, detail="Rosto não encontrado")
     
@@ -73,7 +76,7 @@ async def update_face_name(face_id: str, request: UpdateNameRequest):
     """
     Atualiza o nome de um rosto.
     """
-    success = db.update_face_name(face_id, request.new_name)
+    success = await run_in_threadpool(face_service.rename_face, face_id, request.new_name)
     if not success:
         raise HTTPException(status_code=404, detail="Rosto não encontrado")
     
@@ -1,18 +1,50 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File
-from app.models import RecognizedFace, RecognizeResponse
+from fastapi import APIRouter, HTTPException, UploadFile, File, Query
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
+from typing import Callable, Iterator, List, Optional, Tuple
+from app.inference import InferenceQueueFull
+from app.models import RecognizedFace, RecognizeResponse, Candidate, FaceCandidates
 from app.services.face_service import face_service
 from app.services.camera_service import camera_service
+from app.services.event_service import event_service
+from app.video import AppearanceTimeline, is_video_file
 from datetime import datetime
+import json
+import os
+import tempfile
+import zipfile
 
 router = APIRouter(prefix="/recognize", tags=["Recognition"])
 
+# Limite de imagens por chamada de /recognize/batch (contando as de dentro dos zips)
+BATCH_MAX_IMAGES = int(os.getenv("RECOGNIZE_BATCH_MAX_IMAGES", "5000"))
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".webp")
+# Proteção contra zip bombs: entradas por chamada (somando os zips), tamanho
+# descompactado de cada imagem e taxa de compressão máxima
+BATCH_ZIP_MAX_ENTRIES = int(os.getenv("BATCH_ZIP_MAX_ENTRIES", "10000"))
+BATCH_ZIP_MAX_ENTRY_BYTES = int(float(os.getenv("BATCH_ZIP_MAX_ENTRY_MB", "50")) * 1024 * 1024)
+BATCH_ZIP_MAX_RATIO = float(os.getenv("BATCH_ZIP_MAX_RATIO", "100"))
+
+# Vídeos enviados vão para disco (nunca inteiros na memória)
+VIDEO_MAX_UPLOAD_BYTES = int(float(os.getenv("VIDEO_MAX_UPLOAD_MB", "2048")) * 1024 * 1024)
+VIDEO_TMP_DIR = os.getenv("VIDEO_TMP_DIR") or None
+# Detecções da mesma pessoa separadas por até N segundos são uma única aparição
+VIDEO_APPEARANCE_GAP = float(os.getenv("VIDEO_APPEARANCE_GAP_SECONDS", "2.0"))
+
 
 @router.post("/image", response_model=RecognizeResponse)
-async def recognize_from_image(file: UploadFile = File(...)):
+async def recognize_from_image(
+    file: UploadFile = File(...),
+    top_k: Optional[int] = Query(None, ge=1, le=50)
+):
     """
     Reconhece faces em uma imagem enviada.
     
     - **file**: Arquivo de imagem (JPG, PNG, etc.)
+    - **top_k**: Se informado, retorna também os k rostos mais próximos de cada
+      face detectada, com as distâncias (para revisar matches ambíguos).
+      Neste modo não são gravados logs de reconhecimento.
     """
     # Valida tipo de arquivo
     if not file.content_type or not file.content_type.startswith("image/"):
@@ -24,8 +56,19 @@ async def recognize_from_image(file: UploadFile = File(...)):
     if len(image_bytes) == 0:
         raise HTTPException(status_code=400, detail="Arquivo vazio")
     
-    # Reconhece faces
-    recognized = face_service.recognize_face(image_bytes)
+    try:
+        # Em uma thread do pool: a inferência não bloqueia o event loop
+        if top_k is not None:
+            return await run_in_threadpool(_recognize_top_k, image_bytes, top_k)
+        
+        # Reconhece faces
+        recognized = await run_in_threadpool(face_service.recognize_face, image_bytes)
+    except InferenceQueueFull as e:
+        raise HTTPException(
+            status_code=503,
+            detail="Servidor ocupado. Tente novamente em instantes.",
+            headers={"Retry-After": str(e.retry_after)}
+        )
     
     recognized_faces = [
         RecognizedFace(
@@ -39,7 +82,232 @@ async def recognize_from_image(file: UploadFile = File(...)):
     
     return RecognizeResponse(
         status="completed",
-        recognized_faces=recognized_faces
+        recognized_faces=recognized_faces,
+        detection_scale=face_service.upload_detection_scale
+    )
+
+
+@router.post("/batch")
+async def recognize_batch(files: List[UploadFile] = File(...)):
+    """
+    Reconhece muitas imagens em uma chamada.
+    
+    - **files**: Imagens e/ou arquivos .zip com imagens
+    
+    As imagens são processadas em paralelo nos workers de inferência e os
+    resultados voltam em streaming, uma linha JSON (NDJSON) por imagem conforme
+    ficam prontas (fora de ordem; use `index`/`filename`). A última linha traz
+    o resumo do lote.
+    """
+    try:
+        items = batch_items(files)
+    except zipfile.BadZipFile:
+        raise HTTPException(status_code=400, detail="Arquivo zip inválido")
+    
+    if not items:
+        raise HTTPException(status_code=400, detail="Nenhuma imagem enviada")
+    if len(items) > BATCH_MAX_IMAGES:
+        raise HTTPException(status_code=413, detail=f"Máximo de {BATCH_MAX_IMAGES} imagens por lote")
+    
+    return StreamingResponse(_batch_lines(items), media_type="application/x-ndjson")
+
+
+def batch_items(files: List[UploadFile]) -> List[Tuple[str, Callable[[], bytes]]]:
+    """(nome, função que lê os bytes) de cada imagem enviada, abrindo os zips"""
+    items = []
+    entries = 0
+    for file in files:
+        filename = file.filename or ""
+        if filename.lower().endswith(".zip") or file.content_type in ("application/zip", "application/x-zip-compressed"):
+            archive = zipfile.ZipFile(file.file)
+            infolist = archive.infolist()
+            entries += len(infolist)
+            if entries > BATCH_ZIP_MAX_ENTRIES:
+                raise HTTPException(status_code=413, detail=f"Máximo de {BATCH_ZIP_MAX_ENTRIES} entradas nos zips")
+            for entry in infolist:
+                if not entry.is_dir() and entry.filename.lower().endswith(IMAGE_EXTENSIONS):
+                    items.append((entry.filename, lambda archive=archive, entry=entry: _read_zip_entry(archive, entry)))
+        else:
+            items.append((filename, lambda file=file: file.file.read()))
+    return items
+
+
+def _read_zip_entry(archive: zipfile.ZipFile, entry: zipfile.ZipInfo) -> bytes:
+    """Bytes de uma imagem do zip; recusa entradas grandes ou comprimidas demais antes de descompactar"""
+    if entry.file_size > BATCH_ZIP_MAX_ENTRY_BYTES:
+        raise ValueError(f"Imagem maior que {BATCH_ZIP_MAX_ENTRY_BYTES // (1024 * 1024)} MB descompactada")
+    if entry.file_size > BATCH_ZIP_MAX_RATIO * max(entry.compress_size, 1):
+        raise ValueError(f"Taxa de compressão acima de {BATCH_ZIP_MAX_RATIO:g}:1")
+    
+    # O tamanho declarado no cabeçalho pode mentir: nunca lê além do limite
+    with archive.open(entry) as stream:
+        data = stream.read(BATCH_ZIP_MAX_ENTRY_BYTES + 1)
+    if len(data) > BATCH_ZIP_MAX_ENTRY_BYTES:
+        raise ValueError(f"Imagem maior que {BATCH_ZIP_MAX_ENTRY_BYTES // (1024 * 1024)} MB descompactada")
+    return data
+
+
+def _batch_lines(items: List[Tuple[str, Callable[[], bytes]]]) -> Iterator[str]:
+    """Linhas NDJSON do lote (iterado pelo Starlette em uma thread do pool)"""
+    recognized_total = errors = 0
+    for index, filename, recognized, faces_detected, error in face_service.recognize_batch(items):
+        timestamp = datetime.utcnow().isoformat()
+        line = {
+            "index": index,
+            "filename": filename,
+            "status": "error" if error else "completed",
+            "faces_detected": faces_detected,
+            "recognized_faces": [
+                RecognizedFace(name=name, timestamp=timestamp, confidence=confidence, face_id=face_id).model_dump()
+                for face_id, name, confidence in recognized
+            ]
+        }
+        if error:
+            line["error"] = error
+            errors += 1
+        recognized_total += len(recognized)
+        yield json.dumps(line, ensure_ascii=False) + "\n"
+    
+    yield json.dumps({
+        "status": "done",
+        "images": len(items),
+        "errors": errors,
+        "recognized_faces": recognized_total,
+        "detection_scale": face_service.upload_detection_scale
+    }) + "\n"
+
+
+@router.post("/video")
+async def recognize_video(
+    file: UploadFile = File(...),
+    sample_fps: float = Query(2.0, gt=0, le=30)
+):
+    """
+    Reconhece as faces de um vídeo gravado (análise de ocorrências).
+    
+    - **file**: Arquivo de vídeo (MP4, AVI, MKV...)
+    - **sample_fps**: Frames analisados por segundo de vídeo
+    
+    O upload é gravado em disco e decodificado em streaming, em paralelo com a
+    inferência. A resposta é NDJSON em streaming: um evento `appearance` quando
+    uma identidade aparece, eventos `progress` e, no fim, o evento `done` com a
+    linha do tempo de cada identidade (primeira e última aparição, melhor
+    confiança, intervalos em segundos). Não grava logs de reconhecimento.
+    """
+    if file.content_type and not file.content_type.startswith(("video/", "application/octet-stream")):
+        raise HTTPException(status_code=400, detail="Arquivo deve ser um vídeo")
+    
+    suffix = os.path.splitext(file.filename or "")[1] or ".mp4"
+    path = await run_in_threadpool(_spool_video, file, suffix)
+    if path is None:
+        raise HTTPException(status_code=413, detail=f"Vídeo maior que {VIDEO_MAX_UPLOAD_BYTES // (1024 * 1024)} MB")
+    
+    if not await run_in_threadpool(is_video_file, path):
+        _remove_file(path)
+        raise HTTPException(status_code=400, detail="Não foi possível abrir o vídeo")
+    
+    return StreamingResponse(
+        _video_lines(path, sample_fps),
+        media_type="application/x-ndjson",
+        background=BackgroundTask(_remove_file, path)
+    )
+
+
+def _spool_video(file: UploadFile, suffix: str) -> Optional[str]:
+    """Copia o upload para um arquivo temporário em blocos; None se passar do limite"""
+    with tempfile.NamedTemporaryFile(suffix=suffix, dir=VIDEO_TMP_DIR, delete=False) as tmp:
+        copied = 0
+        while True:
+            chunk = file.file.read(1024 * 1024)
+            if not chunk:
+                break
+            copied += len(chunk)
+            if copied > VIDEO_MAX_UPLOAD_BYTES:
+                break
+            tmp.write(chunk)
+    if copied > VIDEO_MAX_UPLOAD_BYTES:
+        _remove_file(tmp.name)
+        return None
+    return tmp.name
+
+
+def _remove_file(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _video_lines(path: str, sample_fps: float) -> Iterator[str]:
+    """Linhas NDJSON da análise do vídeo (iterado pelo Starlette em uma thread do pool)"""
+    timeline = AppearanceTimeline(VIDEO_APPEARANCE_GAP)
+    sampled = faces_detected = 0
+    duration = 0.0
+    try:
+        for index, seconds, faces, recognized in face_service.recognize_video(path, sample_fps):
+            sampled += 1
+            faces_detected += faces
+            seconds = duration = round(seconds, 3)
+            for face_id, name, confidence in recognized:
+                if timeline.add(face_id, name, seconds, confidence):
+                    yield json.dumps({
+                        "event": "appearance",
+                        "face_id": face_id,
+                        "name": name,
+                        "time": seconds,
+                        "frame": index,
+                        "confidence": confidence
+                    }, ensure_ascii=False) + "\n"
+            if sampled % 50 == 0:
+                yield json.dumps({"event": "progress", "time": seconds, "frames_sampled": sampled}) + "\n"
+    except Exception as e:
+        # O status HTTP já foi enviado: o erro vai como evento
+        yield json.dumps({"event": "error", "error": str(e)}, ensure_ascii=False) + "\n"
+        return
+    
+    yield json.dumps({
+        "event": "done",
+        "duration": duration,
+        "frames_sampled": sampled,
+        "faces_detected": faces_detected,
+        "sample_fps": sample_fps,
+        "detection_scale": face_service.camera_detection_scale,
+        "timeline": timeline.summary()
+    }, ensure_ascii=False) + "\n"
+
+
+def _recognize_top_k(image_bytes: bytes, top_k: int, tolerance: float = 0.6) -> RecognizeResponse:
+    """Resposta do modo top_k: candidatos por face + melhor match dentro da tolerância"""
+    timestamp = datetime.utcnow().isoformat()
+    recognized_faces = []
+    faces = []
+    
+    for face_index, nearest in enumerate(face_service.recognize_face_top_k(image_bytes, top_k)):
+        candidates = [
+            Candidate(
+                face_id=face_id,
+                name=name,
+                distance=distance,
+                confidence=max(0.0, 1.0 - distance)
+            )
+            for face_id, name, distance in nearest
+        ]
+        faces.append(FaceCandidates(face_index=face_index, candidates=candidates))
+        
+        if candidates and candidates[0].distance <= tolerance:
+            best = candidates[0]
+            recognized_faces.append(RecognizedFace(
+                name=best.name,
+                timestamp=timestamp,
+                confidence=best.confidence,
+                face_id=best.face_id
+            ))
+    
+    return RecognizeResponse(
+        status="completed",
+        recognized_faces=recognized_faces,
+        candidates=faces,
+        detection_scale=face_service.upload_detection_scale
     )
 
 
@@ -51,7 +319,8 @@ async def start_recognition():
     if camera_service.is_active():
         return RecognizeResponse(
             status="already_active",
-            recognized_faces=[]
+            recognized_faces=[],
+            detection_scale=face_service.camera_detection_scale
         )
     
     success = camera_service.start()
@@ -64,7 +333,8 @@ async def start_recognition():
     
     return RecognizeResponse(
         status="active",
-        recognized_faces=[]
+        recognized_faces=[],
+        detection_scale=face_service.camera_detection_scale
     )
 
 
@@ -83,11 +353,23 @@ async def stop_recognition():
 @router.get("/stream-status", response_model=RecognizeResponse)
 async def get_stream_status():
     """
-    Retorna o status atual do reconhecimento em tempo real.
+    Retorna o status atual do reconhecimento em tempo real e os últimos
+    reconhecimentos da câmera (da memória; para tempo real use /events/stream).
     """
     status = "active" if camera_service.is_active() else "inactive"
+    recognized_faces = [
+        RecognizedFace(
+            name=event["name"],
+            timestamp=event["timestamp"],
+            confidence=event["confidence"],
+            face_id=event["face_id"]
+        )
+        for event in event_service.recent(limit=20)
+        if event["event"] == "face_recognized"
+    ]
     return RecognizeResponse(
         status=status,
-        recognized_faces=[]
+        recognized_faces=recognized_faces,
+        detection_scale=face_service.camera_detection_scale
     )
 
@@ -1,6 +1,7 @@
 from fastapi import APIRouter
 from app.models import StatusResponse
 from app.services.camera_service import camera_service
+from app.services.face_service import face_service
 from app.database import db
 import time
 
@@ -19,6 +20,12 @@ async def get_status():
     - **trained_faces_count**: Quantidade de rostos treinados
     - **last_recognition**: Timestamp do último reconhecimento (se houver)
     - **uptime_seconds**: Tempo em execução do sistema em segundos
+    - **camera_stats**: Contadores da câmera (frames lidos, frames pulados pelo
+      portão de movimento, faces recodificadas vs. reaproveitadas pelo rastreador)
+    - **inference_stats**: Executor de inferência (workers, chamadas na fila,
+      rejeitadas, tempo na fila vs. tempo de inferência)
+    - **cache_stats**: Cache de extração das imagens enviadas (acertos, erros,
+      remoções, bytes ocupados)
     """
     # Busca último reconhecimento do banco
     from app.database import RecognitionLog
@@ -35,6 +42,9 @@ async def get_status():
         camera_active=camera_service.is_active(),
         trained_faces_count=db.get_trained_faces_count(),
         last_recognition=last_recognition,
-        uptime_seconds=uptime
+        uptime_seconds=uptime,
+        camera_stats=camera_service.get_stats(),
+        inference_stats=face_service.get_inference_stats(),
+        cache_stats=face_service.get_cache_stats()
     )
 
@@ -1,9 +1,21 @@
 from fastapi import APIRouter, UploadFile, File, Form, HTTPException
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from typing import Callable, Iterator, List, Optional, Tuple
+from app.inference import InferenceQueueFull
 from app.models import TrainRequest, TrainResponse
+from app.routes.recognize import batch_items
 from app.services.face_service import face_service
+import json
+import os
+import posixpath
+import zipfile
 
 router = APIRouter(prefix="/train", tags=["Training"])
 
+# Limite de imagens por chamada de /train/batch (contando as de dentro dos zips)
+TRAIN_BATCH_MAX_IMAGES = int(os.getenv("TRAIN_BATCH_MAX_IMAGES", "5000"))
+
 
 @router.post("", response_model=TrainResponse)
 async def train_face(
@@ -28,10 +40,17 @@ async def train_face(
     if len(image_bytes) == 0:
         raise HTTPException(status_code=400, detail="Arquivo vazio")
     
-    # Treina o rosto
-    success, message, face_id_result = face_service.train_face(
-        image_bytes, name, face_id
-    )
+    # Treina o rosto (em uma thread do pool, sem bloquear o event loop)
+    try:
+        success, message, face_id_result = await run_in_threadpool(
+            face_service.train_face, image_bytes, name, face_id
+        )
+    except InferenceQueueFull as e:
+        raise HTTPException(
+            status_code=503,
+            detail="Servidor ocupado. Tente novamente em instantes.",
+            headers={"Retry-After": str(e.retry_after)}
+        )
     
     if not success:
         raise HTTPException(status_code=400, detail=message)
@@ -42,3 +61,76 @@ async def train_face(
         face_id=face_id_result
     )
 
+
+
+@router.post("/batch")
+async def train_batch(
+    files: List[UploadFile] = File(...),
+    name: Optional[str] = Form(None)
+):
+    """
+    Cadastra muitos rostos em uma chamada.
+    
+    - **files**: Imagens e/ou arquivos .zip organizados como `<nome>/<foto>.jpg`
+    - **name**: Nome usado para as imagens que não estão em uma pasta
+    
+    Cada imagem deve ter uma única face e vira um rosto (face_id gerado a
+    partir do nome). Os encodings são extraídos em paralelo e a resposta volta
+    em streaming (NDJSON), uma linha por imagem conforme ficam prontas. Os
+    rostos só são gravados no final, em uma única transação: a última linha
+    traz o resumo, ou `status: "error"` se nada foi salvo.
+    """
+    try:
+        items = batch_items(files)
+    except zipfile.BadZipFile:
+        raise HTTPException(status_code=400, detail="Arquivo zip inválido")
+    
+    if not items:
+        raise HTTPException(status_code=400, detail="Nenhuma imagem enviada")
+    if len(items) > TRAIN_BATCH_MAX_IMAGES:
+        raise HTTPException(status_code=413, detail=f"Máximo de {TRAIN_BATCH_MAX_IMAGES} imagens por lote")
+    
+    return StreamingResponse(_train_lines(items, name), media_type="application/x-ndjson")
+
+
+def person_name(filename: str, default: Optional[str] = None) -> Optional[str]:
+    """Nome da pessoa: a pasta que contém a imagem (ex.: "Ana Silva/1.jpg")"""
+    folder = posixpath.basename(posixpath.dirname(filename.replace("\\", "/")))
+    return folder or default
+
+
+def _train_lines(items: List[Tuple[str, Callable[[], bytes]]], name: Optional[str]) -> Iterator[str]:
+    """Linhas NDJSON do cadastro em lote (iterado pelo Starlette em uma thread do pool)"""
+    images = [(filename, person_name(filename, name), None, read) for filename, read in items]
+    accepted = errors = 0
+    try:
+        for index, filename, face_name, face_id, error in face_service.train_batch(images):
+            line = {
+                "index": index,
+                "filename": filename,
+                "name": face_name,
+                "status": "error" if error else "accepted",
+                "face_id": face_id
+            }
+            if error:
+                line["error"] = error
+                errors += 1
+            else:
+                accepted += 1
+            yield json.dumps(line, ensure_ascii=False) + "\n"
+    except Exception as e:
+        yield json.dumps({
+            "status": "error",
+            "images": len(items),
+            "trained": 0,
+            "errors": errors,
+            "error": f"Erro ao gravar rostos: {str(e)}"
+        }, ensure_ascii=False) + "\n"
+        return
+    
+    yield json.dumps({
+        "status": "done",
+        "images": len(items),
+        "trained": accepted,
+        "errors": errors
+    }) + "\n"
@@ -1,122 +1,439 @@
 import cv2
+import itertools
+import os
 import threading
 import time
-from typing import Callable, Optional
+from typing import Callable, Dict, List, Optional, Union
 from datetime import datetime
+from app.frame_rate import FrameRateController
+from app.inference import InferenceQueueFull
+from app.motion import MotionGate
+from app.pipeline import LatencyStats, Pipeline
 from app.services.face_service import face_service
+from app.tracker import FaceTracker
 
 
-class CameraService:
-    def __init__(self):
-        self.camera = None
+class _FrameJob:
+    """Um frame de uma câmera e o que cada estágio do pipeline já produziu para ele"""
+    
+    def __init__(self, camera: "Camera", frame, captured_at: float):
+        self.camera = camera
+        self.frame = frame
+        self.captured_at = captured_at
+        self.compute_time = 0.0
+        self.rgb = None
+        self.boxes = []
+        # Com rastreador: trilhas do frame e as que precisam ser codificadas
+        self.tracks = []
+        self.pending = []
+        self.encodings = []
+        self.recognized = []
+
+
+class Camera:
+    """
+    Uma fonte de vídeo: índice da câmera local, URL (RTSP/HTTP) ou arquivo.
+    Lê a fonte em uma thread própria e entrega os frames ao pipeline
+    compartilhado; rastreador, portão de movimento, controle de FPS e cooldown
+    de alertas são desta câmera.
+    """
+    
+    def __init__(self, camera_id: str, source: Union[int, str], weight: int = 1,
+                 cooldown: float = 5.0, loop: bool = False):
+        self.camera_id = camera_id
+        self.source = source
+        self.weight = weight
+        self.recognition_cooldown = cooldown  # Segundos entre reconhecimentos da mesma pessoa
+        # Arquivos: recomeça do início ao chegar no fim (senão a câmera termina)
+        self.loop = loop
+        self.capture = None
         self.is_running = False
+        self.stopped = False
+        self.finished = False
         self.thread = None
-        self.on_face_recognized: Optional[Callable] = None
-        self.camera_index = 0  # Pode ser ajustado via config
-        self.frame_skip = 2  # Processa 1 frame a cada N frames (performance)
         self.frame_count = 0
+        self.submitted = 0
+        self.alerts = 0
         self.last_recognition_time = {}
-        self.recognition_cooldown = 5  # Segundos entre reconhecimentos da mesma pessoa
-    
-    def set_camera_index(self, index: int):
-        """Define qual câmera usar (0 para padrão, 1, 2, etc.)"""
-        self.camera_index = index
+        # Latência captura → alerta dos frames desta câmera
+        self.latency = LatencyStats()
+        
+        # Rastreia as faces entre frames para não recodificar quem já foi identificado
+        self.tracker: Optional[FaceTracker] = None
+        if os.getenv("TRACKER_ENABLED", "true").lower() == "true":
+            self.tracker = FaceTracker(
+                iou_threshold=float(os.getenv("TRACKER_IOU", "0.3")),
+                max_missed=int(os.getenv("TRACKER_MAX_MISSED", "5")),
+                refresh_interval=float(os.getenv("TRACKER_REFRESH_SECONDS", "5")),
+                min_confidence=float(os.getenv("TRACKER_MIN_CONFIDENCE", "0.5"))
+            )
+        
+        # Pula a detecção quando a cena está parada e limita-a às regiões com movimento
+        self.motion_gate: Optional[MotionGate] = None
+        if os.getenv("MOTION_GATE_ENABLED", "true").lower() == "true":
+            self.motion_gate = MotionGate(
+                threshold=int(os.getenv("MOTION_THRESHOLD", "25")),
+                min_area=float(os.getenv("MOTION_MIN_AREA", "0.002")),
+                full_frame_interval=int(os.getenv("MOTION_FULL_FRAME_INTERVAL", "150"))
+            )
+        
+        # Quantos frames por segundo vão para o pipeline, ajustado pela latência
+        # medida, pelo teto de CPU e pela presença de faces na cena
+        self.frame_rate = FrameRateController(
+            latency_budget=float(os.getenv("CAMERA_LATENCY_BUDGET_MS", "500")) / 1000,
+            cpu_ceiling=float(os.getenv("CAMERA_CPU_CEILING", "0.5")),
+            min_fps=float(os.getenv("CAMERA_MIN_FPS", "1")),
+            max_fps=float(os.getenv("CAMERA_MAX_FPS", "15")),
+            idle_fps=float(os.getenv("CAMERA_IDLE_FPS", "2")),
+            idle_after=float(os.getenv("CAMERA_IDLE_AFTER_SECONDS", "3"))
+        )
+        self.reconnect_after = float(os.getenv("CAMERA_RECONNECT_SECONDS", "5"))
     
-    def set_on_face_recognized_callback(self, callback: Callable):
-        """Define callback quando uma face é reconhecida"""
-        self.on_face_recognized = callback
+    @property
+    def is_file(self) -> bool:
+        return isinstance(self.source, str) and os.path.isfile(self.source)
     
-    def start(self) -> bool:
-        """Inicia o serviço de câmera"""
+    def start(self, submit: Callable[[_FrameJob], None]) -> bool:
+        """Abre a fonte e inicia a captura"""
         if self.is_running:
             return False
         
         try:
-            self.camera = cv2.VideoCapture(self.camera_index)
+            self.capture = cv2.VideoCapture(self.source)
             
-            if not self.camera.isOpened():
+            if not self.capture.isOpened():
+                self.capture.release()
+                self.capture = None
                 return False
             
+            if self.tracker is not None:
+                self.tracker.reset()
+            if self.motion_gate is not None:
+                self.motion_gate.reset()
+            self.frame_rate.reset()
+            
             self.is_running = True
-            self.thread = threading.Thread(target=self._camera_loop, daemon=True)
+            self.stopped = False
+            self.finished = False
+            self.thread = threading.Thread(
+                target=self._capture_loop, args=(submit,), name=f"camera-{self.camera_id}", daemon=True
+            )
             self.thread.start()
             return True
-            
+        
         except Exception as e:
-            print(f"Erro ao iniciar câmera: {str(e)}")
+            print(f"Erro ao iniciar câmera {self.camera_id}: {str(e)}")
             return False
     
     def stop(self):
-        """Para o serviço de câmera"""
+        """Para a captura e libera a fonte"""
         self.is_running = False
+        self.stopped = True
         if self.thread:
             self.thread.join(timeout=2.0)
-        if self.camera:
-            self.camera.release()
-        self.camera = None
+        if self.capture:
+            self.capture.release()
+        self.capture = None
     
-    def _camera_loop(self):
-        """Loop principal de captura e reconhecimento"""
+    def _capture_loop(self, submit: Callable[[_FrameJob], None]):
+        """
+        Lê a fonte continuamente (o buffer do OpenCV não acumula frames velhos)
+        e entrega ao pipeline os frames que cabem no FPS alvo. Arquivos são lidos
+        no ritmo do próprio vídeo, como se fossem uma câmera ao vivo.
+        """
+        is_file = self.is_file
+        interval = 0.0
+        if is_file:
+            fps = self.capture.get(cv2.CAP_PROP_FPS)
+            interval = 1.0 / fps if fps and fps > 0 else 1.0 / 30
+        next_frame = time.monotonic()
+        failing_since = None
+        
         while self.is_running:
             try:
-                ret, frame = self.camera.read()
+                if interval:
+                    delay = next_frame - time.monotonic()
+                    if delay > 0:
+                        time.sleep(delay)
+                    next_frame = max(next_frame + interval, time.monotonic() - interval)
+                
+                ret, frame = self.capture.read()
                 
                 if not ret:
+                    if is_file:
+                        if self.loop:
+                            self.capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                            continue
+                        self.finished = True
+                        break
+                    # Stream caiu: tenta reabrir depois de alguns segundos sem frames
+                    failing_since = failing_since or time.monotonic()
+                    if time.monotonic() - failing_since >= self.reconnect_after:
+                        self.capture.release()
+                        self.capture = cv2.VideoCapture(self.source)
+                        failing_since = None
                     time.sleep(0.1)
                     continue
                 
+                failing_since = None
                 self.frame_count += 1
                 
-                # Processa apenas alguns frames (otimização)
-                if self.frame_count % self.frame_skip != 0:
+                # Só os frames que cabem no FPS alvo do controlador
+                now = time.monotonic()
+                if not self.frame_rate.should_process(now):
                     continue
                 
-                # Converte frame para formato que face_recognition espera (RGB)
-                rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                
-                # Converte para bytes (simulando imagem)
-                import io
-                from PIL import Image
-                pil_image = Image.fromarray(rgb_frame)
-                img_bytes = io.BytesIO()
-                pil_image.save(img_bytes, format='JPEG')
-                image_bytes = img_bytes.getvalue()
-                
-                # Reconhece faces
-                recognized = face_service.recognize_face(image_bytes)
-                
-                # Processa reconhecimentos
-                for face_id, name, confidence in recognized:
-                    # Cooldown para evitar spam de notificações
-                    current_time = time.time()
-                    last_time = self.last_recognition_time.get(face_id, 0)
-                    
-                    if current_time - last_time >= self.recognition_cooldown:
-                        self.last_recognition_time[face_id] = current_time
-                        
-                        # Chama callback se definido
-                        if self.on_face_recognized:
-                            try:
-                                self.on_face_recognized({
-                                    "face_id": face_id,
-                                    "name": name,
-                                    "confidence": confidence,
-                                    "timestamp": datetime.utcnow().isoformat()
-                                })
-                            except Exception as e:
-                                print(f"Erro no callback: {str(e)}")
-                
-                time.sleep(0.033)  # ~30 FPS
-                
+                self.submitted += 1
+                submit(_FrameJob(self, frame, now))
+            
             except Exception as e:
-                print(f"Erro no loop da câmera: {str(e)}")
+                print(f"Erro no loop da câmera {self.camera_id}: {str(e)}")
                 time.sleep(1.0)
+        
+        self.is_running = False
     
     def is_active(self) -> bool:
-        """Retorna se a câmera está ativa"""
-        return self.is_running and self.camera is not None and self.camera.isOpened()
+        """Retorna se a câmera está capturando"""
+        return self.is_running and self.capture is not None and self.capture.isOpened()
+    
+    def stats(self, dropped: int = 0) -> dict:
+        stats = {
+            "source": str(self.source),
+            "active": self.is_active(),
+            "finished": self.finished,
+            "weight": self.weight,
+            "cooldown": self.recognition_cooldown,
+            "frames_read": self.frame_count,
+            "submitted": self.submitted,
+            "dropped": dropped,
+            "alerts": self.alerts,
+            "latency_ms": self.latency.snapshot(),
+            "frame_rate": self.frame_rate.stats()
+        }
+        if self.motion_gate is not None:
+            stats["motion"] = dict(self.motion_gate.stats)
+        if self.tracker is not None:
+            stats["tracker"] = dict(self.tracker.stats)
+        return stats
+
+
+class CameraService:
+    """
+    Registro de câmeras. Cada câmera captura na sua thread e todas compartilham
+    um único pipeline (detecção, encoding, matching, notificação) e o executor
+    de inferência do FaceService. As filas do pipeline atendem as câmeras por
+    round-robin ponderado (peso de cada câmera), então uma câmera movimentada
+    não impede as outras de serem processadas.
+    """
+    
+    def __init__(self):
+        self.cameras: Dict[str, Camera] = {}
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self.on_face_recognized: Optional[Callable] = None
+        self.camera_index = 0  # Câmera usada por start() (0 para padrão, 1, 2, etc.)
+        self.recognition_cooldown = 5  # Cooldown padrão das câmeras novas
+        # Teto de CPU do processamento, dividido entre as câmeras pelo peso
+        self.cpu_ceiling = float(os.getenv("CAMERA_CPU_CEILING", "0.5"))
+        
+        # Threads dos estágios de inferência: tantas quanto os workers do executor
+        inference_threads = (
+            int(os.getenv("CAMERA_INFERENCE_THREADS", "0"))
+            or int(os.getenv("INFERENCE_WORKERS", "0"))
+            or os.cpu_count()
+            or 1
+        )
+        
+        # Detecção, encoding, matching e notificação em estágios separados,
+        # ligados por filas limitadas que descartam o frame mais antigo de cada
+        # câmera (a latência não cresce quando a inferência atrasa)
+        self.pipeline = Pipeline(
+            [
+                ("detect", self._detect_stage, inference_threads),
+                ("encode", self._encode_stage, inference_threads),
+                ("match", self._match_stage),
+                ("notify", self._notify_stage)
+            ],
+            queue_size=int(os.getenv("PIPELINE_QUEUE_SIZE", "2")),
+            drop_on=(InferenceQueueFull,),
+            max_age=float(os.getenv("PIPELINE_MAX_AGE_SECONDS", "2.0")),
+            on_complete=self._frame_done,
+            key=lambda job: job.camera.camera_id
+        )
+    
+    def set_camera_index(self, index: int):
+        """Define qual câmera start() usa (0 para padrão, 1, 2, etc.)"""
+        self.camera_index = index
+    
+    def set_on_face_recognized_callback(self, callback: Callable):
+        """Define callback quando uma face é reconhecida"""
+        self.on_face_recognized = callback
+    
+    def add_camera(
+        self,
+        source: Union[int, str],
+        camera_id: Optional[str] = None,
+        weight: int = 1,
+        cooldown: Optional[float] = None,
+        loop: bool = False
+    ) -> Camera:
+        """
+        Registra e inicia uma câmera. source: índice ("0", 1...), URL ou caminho
+        de arquivo de vídeo. Levanta ValueError se o id já existe ou a fonte não
+        abre.
+        """
+        if isinstance(source, str) and source.isdigit():
+            source = int(source)
+        
+        with self._lock:
+            if camera_id is None:
+                camera_id = next(f"cam{n}" for n in self._ids if f"cam{n}" not in self.cameras)
+            if camera_id in self.cameras:
+                raise ValueError(f"Câmera '{camera_id}' já existe")
+            
+            camera = Camera(
+                camera_id, source, max(1, weight),
+                self.recognition_cooldown if cooldown is None else cooldown, loop
+            )
+            self.pipeline.set_weight(camera_id, camera.weight)
+            if not self.pipeline.is_running:
+                self.pipeline.start()
+            if not camera.start(self.pipeline.submit):
+                if not self.cameras:
+                    self.pipeline.stop()
+                self.pipeline.remove_key(camera_id)
+                raise ValueError(f"Não foi possível abrir a fonte de vídeo: {source}")
+            
+            self.cameras[camera_id] = camera
+            self._rebalance()
+            return camera
+    
+    def remove_camera(self, camera_id: str) -> bool:
+        """Para e remove uma câmera; o pipeline para junto com a última"""
+        with self._lock:
+            camera = self.cameras.pop(camera_id, None)
+            if camera is None:
+                return False
+            camera.stop()
+            self.pipeline.remove_key(camera_id)
+            if not self.cameras:
+                self.pipeline.stop()
+            self._rebalance()
+            return True
+    
+    def get_camera(self, camera_id: str) -> Optional[Camera]:
+        return self.cameras.get(camera_id)
+    
+    def list_cameras(self) -> List[Camera]:
+        return list(self.cameras.values())
+    
+    def camera_stats(self, camera: Camera) -> dict:
+        return camera.stats(self.pipeline.dropped(camera.camera_id))
+    
+    def _rebalance(self):
+        """Divide o teto de CPU entre as câmeras na proporção dos pesos"""
+        total = sum(camera.weight for camera in self.cameras.values())
+        for camera in self.cameras.values():
+            camera.frame_rate.cpu_ceiling = self.cpu_ceiling * camera.weight / total
+    
+    def start(self) -> bool:
+        """Inicia a câmera padrão (camera_index) com o id "default" """
+        if "default" in self.cameras:
+            return False
+        try:
+            self.add_camera(self.camera_index, camera_id="default")
+            return True
+        except ValueError as e:
+            print(f"Erro ao iniciar câmera: {str(e)}")
+            return False
+    
+    def stop(self):
+        """Para e remove todas as câmeras"""
+        for camera_id in list(self.cameras):
+            self.remove_camera(camera_id)
+    
+    def _detect_stage(self, job: _FrameJob) -> Optional[_FrameJob]:
+        camera = job.camera
+        if camera.stopped:
+            return None
+        
+        # Cena parada: nada a detectar neste frame
+        regions = None
+        if camera.motion_gate is not None:
+            regions = camera.motion_gate.check(job.frame)
+            if regions is None:
+                return None
+        
+        # Converte frame para formato que face_recognition espera (RGB)
+        job.rgb = cv2.cvtColor(job.frame, cv2.COLOR_BGR2RGB)
+        job.frame = None
+        job.boxes = face_service.detect_frame(job.rgb, regions)
+        
+        if camera.tracker is not None:
+            # Atualiza as trilhas mesmo sem faces, para encerrar as que sumiram
+            job.tracks, job.pending = camera.tracker.select(job.boxes, time.monotonic())
+        
+        return job if job.boxes else None
+    
+    def _encode_stage(self, job: _FrameJob) -> _FrameJob:
+        boxes = [track.box for track in job.pending] if job.camera.tracker is not None else job.boxes
+        job.encodings = face_service.encode_frame(job.rgb, boxes)
+        job.rgb = None
+        return job
+    
+    def _match_stage(self, job: _FrameJob) -> Optional[_FrameJob]:
+        tracker = job.camera.tracker
+        recognized = face_service.match_frame(job.encodings, tracker=tracker, tracks=job.pending)
+        if tracker is not None:
+            # Inclui quem já estava identificado e não precisou ser recodificado
+            recognized = tracker.recognized(job.tracks)
+        job.recognized = recognized
+        return job if recognized else None
+    
+    def _notify_stage(self, job: _FrameJob) -> _FrameJob:
+        camera = job.camera
+        camera.latency.add(time.monotonic() - job.captured_at)
+        
+        # Processa reconhecimentos
+        for face_id, name, confidence in job.recognized:
+            # Cooldown (por câmera) para evitar spam de notificações
+            current_time = time.time()
+            last_time = camera.last_recognition_time.get(face_id, 0)
+            
+            if current_time - last_time >= camera.recognition_cooldown:
+                camera.last_recognition_time[face_id] = current_time
+                camera.alerts += 1
+                
+                # Chama callback se definido
+                if self.on_face_recognized:
+                    try:
+                        self.on_face_recognized({
+                            "face_id": face_id,
+                            "name": name,
+                            "confidence": confidence,
+                            "timestamp": datetime.utcnow().isoformat(),
+                            "camera_id": camera.camera_id
+                        })
+                    except Exception as e:
+                        print(f"Erro no callback: {str(e)}")
+        return job
+    
+    def _frame_done(self, job: _FrameJob):
+        """Realimenta o controlador de FPS da câmera com cada frame que saiu do pipeline"""
+        now = time.monotonic()
+        job.camera.frame_rate.observe(now - job.captured_at, job.compute_time, bool(job.boxes), now)
+    
+    def get_stats(self) -> dict:
+        """Contadores por câmera (frames, FPS, descartes, portão de movimento, rastreador) e do pipeline"""
+        return {
+            "cameras": {camera.camera_id: self.camera_stats(camera) for camera in self.list_cameras()},
+            "pipeline": self.pipeline.stats()
+        }
+    
+    def is_active(self) -> bool:
+        """Retorna se alguma câmera está ativa"""
+        return any(camera.is_active() for camera in self.list_cameras())
 
 
 # Singleton instance
 camera_service = CameraService()
-
@@ -0,0 +1,116 @@
+import asyncio
+import collections
+import itertools
+import os
+import threading
+from typing import Deque, List, Optional, Set
+
+
+class Subscription:
+    """
+    Fila de eventos de um cliente (WebSocket/SSE). É limitada e descarta os
+    eventos mais antigos quando o cliente não acompanha: quem publica (a thread
+    da câmera) nunca espera por um consumidor lento.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, maxsize: int):
+        self._loop = loop
+        self._events: Deque[dict] = collections.deque(maxlen=max(1, maxsize))
+        self._ready = asyncio.Event()
+        self._lock = threading.Lock()
+        self.dropped = 0
+        self.closed = False
+
+    def put(self, event: dict):
+        """Enfileira um evento (chamado de qualquer thread, nunca bloqueia)"""
+        with self._lock:
+            if len(self._events) == self._events.maxlen:
+                self.dropped += 1
+            self._events.append(event)
+        try:
+            self._loop.call_soon_threadsafe(self._ready.set)
+        except RuntimeError:
+            # Event loop já encerrado: o cliente não vai mais ler
+            self.closed = True
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[dict]:
+        """Próximo evento, ou None se nada chegar em `timeout` segundos"""
+        while True:
+            with self._lock:
+                if self._events:
+                    return self._events.popleft()
+                self._ready.clear()
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+
+
+class EventService:
+    """
+    Distribui os eventos de reconhecimento da câmera para vários assinantes.
+    Guarda também os últimos eventos em memória, para quem consulta por polling
+    e para clientes SSE que reconectam (Last-Event-ID).
+    """
+
+    def __init__(self):
+        self.queue_size = int(os.getenv("EVENT_QUEUE_SIZE", "100"))
+        self._recent: Deque[dict] = collections.deque(maxlen=int(os.getenv("EVENT_HISTORY_SIZE", "100")))
+        self._subscribers: Set[Subscription] = set()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.published = 0
+
+    def publish(self, event_type: str, data: dict) -> dict:
+        """Publica um evento para todos os assinantes"""
+        with self._lock:
+            event = {"id": next(self._ids), "event": event_type, **data}
+            self._recent.append(event)
+            self.published += 1
+            subscribers = list(self._subscribers)
+
+        for subscription in subscribers:
+            if subscription.closed:
+                self.unsubscribe(subscription)
+            else:
+                subscription.put(event)
+        return event
+
+    def subscribe(self, since: Optional[int] = None, maxsize: Optional[int] = None) -> Subscription:
+        """
+        Cria a fila de um cliente. Deve ser chamado dentro do event loop.
+        since: reenvia os eventos guardados com id maior (reconexão).
+        """
+        subscription = Subscription(asyncio.get_running_loop(), maxsize or self.queue_size)
+        with self._lock:
+            if since is not None:
+                for event in self._recent:
+                    if event["id"] > since:
+                        subscription.put(event)
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+        subscription.closed = True
+
+    def recent(self, limit: Optional[int] = None, since: Optional[int] = None) -> List[dict]:
+        """Últimos eventos (mais antigos primeiro)"""
+        with self._lock:
+            events = [event for event in self._recent if since is None or event["id"] > since]
+        return events[-limit:] if limit else events
+
+    def stats(self) -> dict:
+        with self._lock:
+            subscribers = list(self._subscribers)
+        return {
+            "published": self.published,
+            "subscribers": len(subscribers),
+            "dropped": sum(subscription.dropped for subscription in subscribers),
+            "queue_size": self.queue_size
+        }
+
+
+# Instância global
+event_service = EventService()
@@ -1,39 +1,191 @@
-from typing import List, Tuple, Optional
+import collections
+import os
+import queue
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Iterable, Iterator, List, Tuple, Optional
 import numpy as np
 from app.database import db
+from app.detectors import get_detector
+from app.gallery import Gallery
+from app.gallery_shards import ShardedGallery
+from app.inference import InferenceExecutor, InferenceQueueFull, create_executor
+from app.pq_index import PQIndex
+from app.result_cache import ResultCache, content_key
+from app.services.gallery_manager import GalleryManager
+from app.tracker import FaceTracker, Track
+from app.video import iter_video_frames
 from app.utils import (
-    extract_face_encodings,
+    IMAGE_MAX_SIDE,
     encode_face_encoding,
-    decode_face_encoding,
-    find_matching_face,
     generate_face_id
 )
 
 
 class FaceService:
     def __init__(self):
-        self._known_faces_cache = None
-        self._cache_valid = False
-    
-    def _load_known_faces(self) -> List[Tuple[str, str, np.ndarray]]:
-        """Carrega todos os rostos conhecidos do banco de dados"""
-        if self._known_faces_cache and self._cache_valid:
-            return self._known_faces_cache
+        # Snapshot imutável da galeria, trocado atomicamente por uma única thread
+        self._galleries = GalleryManager()
+        
+        # Com GALLERY_SHARDS > 1 a galeria fica particionada entre processos
+        # matcher locais (iniciados no primeiro uso) em vez de neste processo
+        self._num_shards = int(os.getenv("GALLERY_SHARDS", "1"))
+        self._shards: Optional[ShardedGallery] = None
+        self._shards_lock = threading.Lock()
+        
+        # Escala da detecção por origem da imagem; os encodings são sempre
+        # calculados na resolução original
+        self.camera_detection_scale = float(os.getenv("DETECTION_SCALE_CAMERA", "0.5"))
+        self.upload_detection_scale = float(os.getenv("DETECTION_SCALE_UPLOAD", "1.0"))
+        self.detection_grayscale = os.getenv("DETECTION_GRAYSCALE", "false").lower() == "true"
         
-        trained_faces = db.get_all_trained_faces()
-        known_faces = []
+        # Detector de faces (FACE_DETECTOR: hog, cascade, dnn ou cascade_hog);
+        # carregado já aqui para um nome ou modelo inválido aparecer na subida
+        self.detector_name = os.getenv("FACE_DETECTOR", "hog").lower()
+        try:
+            get_detector(self.detector_name)
+        except ValueError as e:
+            print(f"Erro ao carregar o detector de faces: {str(e)}")
         
-        for face in trained_faces:
-            encoding = decode_face_encoding(face.encoding)
-            known_faces.append((face.face_id, face.name, encoding))
+        # Detecção + encoding (INFERENCE_BACKEND: threads ou pool de processos),
+        # criado no primeiro uso
+        self._executor: Optional[InferenceExecutor] = None
+        self._executor_lock = threading.Lock()
         
-        self._known_faces_cache = known_faces
-        self._cache_valid = True
-        return known_faces
+        # Caixas + encodings das imagens enviadas, pelo hash do conteúdo: reenvios
+        # da mesma imagem só refazem o match (RESULT_CACHE_MB=0 desliga)
+        self._result_cache = ResultCache(
+            max_bytes=int(float(os.getenv("RESULT_CACHE_MB", "32")) * 1024 * 1024),
+            ttl=float(os.getenv("RESULT_CACHE_TTL_SECONDS", "300"))
+        )
+    
+    def _inference(self) -> InferenceExecutor:
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = create_executor()
+        return self._executor
+    
+    def close(self):
+        """Encerra os workers de inferência (e seus segmentos de memória compartilhada) e os shards da galeria"""
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.close()
+        with self._shards_lock:
+            shards, self._shards = self._shards, None
+        if shards is not None:
+            shards.close()
+    
+    def get_inference_stats(self) -> Optional[dict]:
+        """Fila e tempos do executor de inferência (None se ainda não foi usado)"""
+        return self._executor.stats() if self._executor is not None else None
+    
+    def get_cache_stats(self) -> dict:
+        """Acertos, erros e ocupação do cache de extração das imagens enviadas"""
+        return self._result_cache.stats()
+    
+    def _extract_upload(
+        self,
+        image_bytes: bytes,
+        scale: float = 1.0,
+        grayscale: bool = False
+    ) -> Tuple[List[Tuple[int, int, int, int]], List[np.ndarray]]:
+        """Caixas + encodings de uma imagem enviada, do cache quando já vista"""
+        key = content_key(image_bytes, scale, grayscale, IMAGE_MAX_SIDE)
+        return self._result_cache.get_or_compute(
+            key, lambda: self._inference().extract_bytes(image_bytes, scale, grayscale)
+        )
+    
+    def _sharded(self) -> Optional[ShardedGallery]:
+        if self._num_shards <= 1:
+            return None
+        if self._shards is None:
+            with self._shards_lock:
+                if self._shards is None:
+                    self._shards = ShardedGallery(
+                        self._num_shards,
+                        reply_timeout=float(os.getenv("GALLERY_SHARD_TIMEOUT", "30")),
+                        consistency_interval=float(os.getenv("GALLERY_CONSISTENCY_INTERVAL", "60"))
+                    )
+        return self._shards
+    
+    def _load_gallery(self) -> Gallery:
+        """Snapshot atual dos rostos conhecidos (sem lock; não espera reconstruções)"""
+        return self._galleries.current()
     
     def invalidate_cache(self):
-        """Invalida o cache quando novos rostos são treinados"""
-        self._cache_valid = False
+        """Recarrega a galeria do banco (pedidos simultâneos viram uma única recarga)"""
+        shards = self._sharded()
+        if shards is not None:
+            shards.reload()
+            return
+        self._galleries.reload()
+    
+    def _match_encodings(self, encodings: List[np.ndarray], tolerance: float) -> List[Tuple[bool, str, str, float]]:
+        """Compara os encodings com a galeria local ou com os shards"""
+        shards = self._sharded()
+        if shards is not None:
+            return shards.match(encodings, tolerance)
+        
+        gallery = self._load_gallery()
+        if len(gallery) == 0:
+            return []
+        return self._match(gallery, encodings, tolerance)
+    
+    def _match(self, gallery: Gallery, encodings: List[np.ndarray], tolerance: float) -> List[Tuple[bool, str, str, float]]:
+        """
+        Compara os encodings com a galeria, via índice aproximado quando habilitado.
+        Retorna, para cada encoding: (match, face_id, name, confidence)
+        """
+        index = self._galleries.current_index(gallery)
+        if index is None:
+            return gallery.match(encodings, tolerance)
+        
+        if isinstance(index, PQIndex):
+            # O PQ faz o re-rank da shortlist com os vetores do próprio snapshot
+            candidates = index.search(np.asarray(encodings), gallery)
+        else:
+            candidates = index.search(np.asarray(encodings))
+        
+        results = []
+        for encoding, (face_id, _) in zip(encodings, candidates):
+            # O índice pode estar um passo à frente/atrás do snapshot: confirma o
+            # candidato no snapshot e recalcula a distância exata com o vetor dele
+            row = gallery.position(face_id) if face_id else None
+            if row is None:
+                results.append((False, "", "", 0.0))
+                continue
+            
+            distance = float(np.linalg.norm(gallery.encoding_at(row) - np.asarray(encoding, dtype=np.float32)))
+            if distance > tolerance:
+                results.append((False, "", "", 0.0))
+            else:
+                results.append((True, face_id, gallery.name_at(row), max(0.0, 1.0 - distance)))
+        return results
+    
+    def delete_face(self, face_id: str) -> bool:
+        """Remove um rosto treinado e atualiza a galeria"""
+        deleted = db.delete_trained_face(face_id)
+        if deleted:
+            shards = self._sharded()
+            if shards is not None:
+                shards.remove(face_id)
+            else:
+                self._galleries.remove(face_id)
+        return deleted
+    
+    def rename_face(self, face_id: str, new_name: str) -> bool:
+        """Atualiza o nome de um rosto e da entrada correspondente na galeria"""
+        updated = db.update_face_name(face_id, new_name)
+        if updated:
+            shards = self._sharded()
+            if shards is not None:
+                shards.rename(face_id, new_name)
+            else:
+                self._galleries.rename(face_id, new_name)
+        return updated
     
     def train_face(self, image_bytes: bytes, name: str, face_id: Optional[str] = None) -> Tuple[bool, str, str]:
         """
@@ -42,7 +194,7 @@ class FaceService:
         """
         try:
             # Extrai encodings da imagem
-            encodings = extract_face_encodings(image_bytes)
+            _, encodings = self._extract_upload(image_bytes)
             
             if not encodings:
                 return False, "Nenhuma face encontrada na imagem", ""
@@ -54,7 +206,7 @@ class FaceService:
             
             # Gera face_id se não fornecido
             if not face_id:
-                existing_ids = [f.face_id for f in db.get_all_trained_faces()]
+                existing_ids = db.get_trained_face_ids()
                 face_id = generate_face_id(name, existing_ids)
             
             # Verifica se já existe
@@ -63,19 +215,86 @@ class FaceService:
                 return False, f"Face ID '{face_id}' já existe. Use um ID diferente ou atualize a face existente.", ""
             
             # Salva no banco de dados
-            encoding_str = encode_face_encoding(encoding)
-            db.add_trained_face(face_id, name, encoding_str)
+            face = db.add_trained_face(face_id, name, encode_face_encoding(encoding))
             
-            # Invalida cache
-            self.invalidate_cache()
+            # Atualiza a galeria em memória sem recarregar tudo
+            shards = self._sharded()
+            if shards is not None:
+                shards.add(face_id, name, encoding, face.id)
+            else:
+                self._galleries.add(face_id, name, encoding, face.id)
             
             return True, f"Rosto de {name} treinado com sucesso", face_id
             
+        except InferenceQueueFull:
+            raise
         except ValueError as e:
             return False, str(e), ""
         except Exception as e:
             return False, f"Erro ao treinar rosto: {str(e)}", ""
     
+    def train_batch(
+        self,
+        images: Iterable[Tuple[str, str, Optional[str], Callable[[], bytes]]]
+    ) -> Iterator[Tuple[int, str, str, str, Optional[str]]]:
+        """
+        Treina vários rostos de uma vez: (arquivo, nome, face_id opcional,
+        função que lê os bytes). Os encodings são extraídos em paralelo nos
+        workers de inferência e os IDs gerados contra um conjunto em memória
+        (uma única leitura do banco). Gera, conforme ficam prontos (fora de
+        ordem): (índice, arquivo, nome, face_id, erro).
+        
+        Nada é gravado antes do fim: depois da última imagem, todas as linhas
+        entram em uma única transação e a galeria é atualizada uma única vez.
+        Se a gravação falhar, a exceção é levantada e nenhum rosto é salvo.
+        """
+        existing_ids = db.get_trained_face_ids()
+        faces = []
+        
+        def extract(filename: str, name: str, face_id: Optional[str], read: Callable[[], bytes]) -> np.ndarray:
+            if not name:
+                raise ValueError("Nome da pessoa ausente")
+            image_bytes = read()
+            if not image_bytes:
+                raise ValueError("Arquivo vazio")
+            _, encodings = self._retry_when_busy(lambda: self._extract_upload(image_bytes))
+            if not encodings:
+                raise ValueError("Nenhuma face encontrada na imagem")
+            if len(encodings) > 1:
+                raise ValueError("Múltiplas faces encontradas. Por favor, envie uma imagem com apenas uma pessoa.")
+            return encodings[0]
+        
+        for finished in self._in_parallel(images, extract):
+            for index, (filename, name, face_id, _), encoding, error in finished:
+                if error is None:
+                    if not face_id:
+                        face_id = generate_face_id(name, existing_ids)
+                    elif face_id in existing_ids:
+                        error = f"Face ID '{face_id}' já existe"
+                if error is not None:
+                    yield index, filename, name, "", error
+                    continue
+                
+                existing_ids.add(face_id)
+                faces.append((face_id, name, encoding))
+                yield index, filename, name, face_id, None
+        
+        if not faces:
+            return
+        
+        db_ids = db.add_trained_faces([
+            (face_id, name, encode_face_encoding(encoding)) for face_id, name, encoding in faces
+        ])
+        
+        # Uma única atualização da galeria para o lote inteiro
+        shards = self._sharded()
+        if shards is not None:
+            shards.reload()
+        else:
+            self._galleries.add_many([
+                (face_id, name, encoding, db_id) for (face_id, name, encoding), db_id in zip(faces, db_ids)
+            ])
+    
     def recognize_face(self, image_bytes: bytes, tolerance: float = 0.6) -> List[Tuple[str, str, float]]:
         """
         Reconhece faces em uma imagem.
@@ -83,36 +302,305 @@ class FaceService:
         """
         try:
             # Extrai encodings da imagem
-            encodings = extract_face_encodings(image_bytes)
+            _, encodings = self._extract_upload(
+                image_bytes, self.upload_detection_scale, self.detection_grayscale
+            )
+            return self._recognize_encodings(encodings, tolerance)
             
-            if not encodings:
-                return []
+        except InferenceQueueFull:
+            raise
+        except Exception as e:
+            print(f"Erro ao reconhecer rosto: {str(e)}")
+            return []
+    
+    def recognize_frame(
+        self,
+        rgb_frame: np.ndarray,
+        tolerance: float = 0.6,
+        tracker: Optional[FaceTracker] = None,
+        regions: Optional[List[Tuple[int, int, int, int]]] = None
+    ) -> List[Tuple[str, str, float]]:
+        """
+        Reconhece faces em um frame RGB já decodificado (ex.: câmera), sem
+        reencodar para JPEG. Com um tracker, faces já identificadas em frames
+        anteriores não são codificadas de novo; com regions (x, y, w, h), a
+        detecção roda só nessas regiões (ex.: onde houve movimento).
+        Retorna lista de: (face_id, name, confidence)
+        """
+        try:
+            if tracker is not None:
+                boxes = self.detect_frame(rgb_frame, regions)
+                tracks, stale = tracker.select(boxes, time.monotonic())
+                encodings = self.encode_frame(rgb_frame, [track.box for track in stale])
+                self.match_frame(encodings, tolerance, tracker, stale)
+                return tracker.recognized(tracks)
             
-            # Carrega rostos conhecidos
-            known_faces = self._load_known_faces()
+            _, encodings = self._inference().extract(
+                rgb_frame, self.camera_detection_scale, self.detection_grayscale, regions
+            )
+            return self._recognize_encodings(encodings, tolerance)
             
-            if not known_faces:
-                return []
+        except InferenceQueueFull:
+            raise
+        except Exception as e:
+            print(f"Erro ao reconhecer rosto: {str(e)}")
+            return []
+    
+    # Etapas de recognize_frame, usadas separadamente pelo pipeline da câmera.
+    # Erros (inclusive InferenceQueueFull) sobem para quem chamou.
+    
+    def detect_frame(
+        self,
+        rgb_frame: np.ndarray,
+        regions: Optional[List[Tuple[int, int, int, int]]] = None
+    ) -> List[Tuple[int, int, int, int]]:
+        """Detecta as faces de um frame da câmera (escala da câmera)"""
+        return self._inference().detect(rgb_frame, self.camera_detection_scale, self.detection_grayscale, regions)
+    
+    def encode_frame(self, rgb_frame: np.ndarray, boxes: List[Tuple[int, int, int, int]]) -> List[np.ndarray]:
+        """Encodings das caixas informadas, na resolução original do frame"""
+        return self._inference().encode(rgb_frame, boxes)
+    
+    def match_frame(
+        self,
+        encodings: List[np.ndarray],
+        tolerance: float = 0.6,
+        tracker: Optional[FaceTracker] = None,
+        tracks: Optional[List[Track]] = None
+    ) -> List[Tuple[str, str, float]]:
+        """
+        Matching dos encodings de um frame, gravando os logs. Com tracker, tracks
+        são as trilhas codificadas (na ordem dos encodings) e recebem a identidade.
+        Retorna lista de: (face_id, name, confidence) dos encodings reconhecidos
+        """
+        if tracker is None:
+            return self._recognize_encodings(encodings, tolerance)
+        
+        if not encodings:
+            return []
+        
+        recognized = []
+        now = time.monotonic()
+        for track, (match, face_id, name, confidence) in zip(tracks, self._match_encodings(encodings, tolerance)):
+            tracker.identify(track, match, face_id, name, confidence, now)
+            if match:
+                recognized.append((face_id, name, confidence))
+                # Só grava quando houve matching de fato (não a cada frame da trilha)
+                db.update_last_seen(face_id)
+                db.add_recognition_log(face_id, name, confidence)
+        return recognized
+    
+    def _recognize_encodings(self, encodings: List[np.ndarray], tolerance: float) -> List[Tuple[str, str, float]]:
+        if not encodings:
+            return []
+        
+        recognized = []
+        
+        # Compara todos os encodings encontrados com a galeria de uma vez
+        for match, face_id, name, confidence in self._match_encodings(encodings, tolerance):
+            if match:
+                recognized.append((face_id, name, confidence))
+                # Atualiza last_seen
+                db.update_last_seen(face_id)
+                # Adiciona log
+                db.add_recognition_log(face_id, name, confidence)
+        
+        return recognized
+    
+    def recognize_batch(
+        self,
+        images: Iterable[Tuple[str, Callable[[], bytes]]],
+        tolerance: float = 0.6
+    ) -> Iterator[Tuple[int, str, List[Tuple[str, str, float]], int, Optional[str]]]:
+        """
+        Reconhece um lote de imagens (nome, função que lê os bytes), várias ao
+        mesmo tempo nos workers de inferência. As imagens que terminam juntas
+        são comparadas com a galeria em uma única operação e seus logs gravados
+        em uma única transação. Gera os resultados conforme ficam prontos
+        (fora de ordem): (índice, nome, [(face_id, name, confidence)],
+        faces detectadas, erro)
+        """
+        def extract(filename: str, read: Callable[[], bytes]) -> List[np.ndarray]:
+            image_bytes = read()
+            if not image_bytes:
+                raise ValueError("Arquivo vazio")
+            return self._retry_when_busy(
+                lambda: self._extract_upload(image_bytes, self.upload_detection_scale, self.detection_grayscale)[1]
+            )
+        
+        for finished in self._in_parallel(images, extract):
+            encodings, owners = [], []
+            for position, (_, _, image_encodings, _) in enumerate(finished):
+                encodings.extend(image_encodings or [])
+                owners.extend([position] * len(image_encodings or []))
             
-            recognized = []
+            # Matching de todas as faces das imagens prontas de uma vez
+            recognized = [[] for _ in finished]
+            face_counts = [0] * len(finished)
+            for position in owners:
+                face_counts[position] += 1
+            if encodings:
+                for position, (match, face_id, name, confidence) in zip(owners, self._match_encodings(encodings, tolerance)):
+                    if match:
+                        recognized[position].append((face_id, name, confidence))
             
-            # Compara cada encoding encontrado com os conhecidos
-            for encoding in encodings:
-                match, face_id, name, confidence = find_matching_face(
-                    encoding, known_faces, tolerance
-                )
-                
-                if match:
-                    recognized.append((face_id, name, confidence))
-                    # Atualiza last_seen
-                    db.update_last_seen(face_id)
-                    # Adiciona log
-                    db.add_recognition_log(face_id, name, confidence)
+            try:
+                db.add_recognition_logs([entry for faces in recognized for entry in faces])
+            except Exception as e:
+                print(f"Erro ao gravar logs de reconhecimento: {str(e)}")
             
-            return recognized
+            for position, (index, (filename, _), _, error) in enumerate(finished):
+                yield index, filename, recognized[position], face_counts[position], error
+    
+    def _in_parallel(
+        self,
+        items: Iterable[tuple],
+        fn: Callable
+    ) -> Iterator[List[Tuple[int, tuple, object, Optional[str]]]]:
+        """
+        Roda fn(*item) para cada item, vários ao mesmo tempo nos workers de
+        inferência. Gera, a cada rodada, os que terminaram juntos:
+        [(índice, item, resultado, erro)]
+        """
+        executor = self._inference()
+        items = iter(enumerate(items))
+        
+        # No máximo 2 itens por worker em andamento (não lê o lote inteiro na memória)
+        window = 2 * executor.max_workers
+        with ThreadPoolExecutor(max_workers=executor.max_workers, thread_name_prefix="batch") as pool:
+            running = {}
+            
+            def fill():
+                while len(running) < window:
+                    entry = next(items, None)
+                    if entry is None:
+                        return
+                    index, item = entry
+                    running[pool.submit(fn, *item)] = (index, item)
+            
+            fill()
+            while running:
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                finished = []
+                for future in done:
+                    index, item = running.pop(future)
+                    try:
+                        finished.append((index, item, future.result(), None))
+                    except Exception as e:
+                        finished.append((index, item, None, str(e)))
+                fill()
+                yield finished
+    
+    @staticmethod
+    def _retry_when_busy(call: Callable):
+        """Lotes esperam a vez em vez de falhar: outras requisições têm prioridade"""
+        while True:
+            try:
+                return call()
+            except InferenceQueueFull:
+                time.sleep(0.05)
+    
+    def recognize_video(
+        self,
+        path: str,
+        sample_fps: float = 2.0,
+        tolerance: float = 0.6
+    ) -> Iterator[Tuple[int, float, int, List[Tuple[str, str, float]]]]:
+        """
+        Reconhece as faces de um arquivo de vídeo, amostrando ~sample_fps frames
+        por segundo. Uma thread decodifica à frente (fila limitada) enquanto os
+        frames amostrados rodam em paralelo nos workers de inferência; os
+        resultados saem na ordem do vídeo: (índice do frame, segundos, faces
+        detectadas, [(face_id, name, confidence)]).
+        Análise de gravações: não grava logs nem last_seen.
+        """
+        executor = self._inference()
+        window = 2 * executor.max_workers
+        frames: "queue.Queue" = queue.Queue(maxsize=window)
+        stop = threading.Event()
+        
+        def put(item) -> bool:
+            while not stop.is_set():
+                try:
+                    frames.put(item, timeout=0.2)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        
+        def decode():
+            try:
+                for item in iter_video_frames(path, sample_fps):
+                    if not put(item):
+                        return
+            except Exception as e:
+                put(e)
+            finally:
+                put(None)
+        
+        def extract(rgb_frame: np.ndarray) -> List[np.ndarray]:
+            return self._retry_when_busy(
+                lambda: executor.extract(rgb_frame, self.camera_detection_scale, self.detection_grayscale)
+            )[1]
+        
+        decoder = threading.Thread(target=decode, name="video-decode", daemon=True)
+        decoder.start()
+        pending = collections.deque()
+        with ThreadPoolExecutor(max_workers=executor.max_workers, thread_name_prefix="video") as pool:
+            try:
+                decoding = True
+                while True:
+                    while decoding and len(pending) < window:
+                        item = frames.get()
+                        if item is None:
+                            decoding = False
+                        elif isinstance(item, Exception):
+                            raise item
+                        else:
+                            index, seconds, rgb_frame = item
+                            pending.append((index, seconds, pool.submit(extract, rgb_frame)))
+                    if not pending:
+                        break
+                    
+                    index, seconds, future = pending.popleft()
+                    encodings = future.result()
+                    recognized = []
+                    if encodings:
+                        recognized = [
+                            (face_id, name, confidence)
+                            for match, face_id, name, confidence in self._match_encodings(encodings, tolerance)
+                            if match
+                        ]
+                    yield index, seconds, len(encodings), recognized
+            finally:
+                # Cliente desconectou ou erro: para a decodificação e o que não começou
+                stop.set()
+                for _, _, future in pending:
+                    future.cancel()
+    
+    def recognize_face_top_k(self, image_bytes: bytes, k: int = 5) -> List[List[Tuple[str, str, float]]]:
+        """
+        Retorna, para cada face detectada, os k rostos conhecidos mais próximos
+        com as distâncias: [(face_id, name, distance), ...].
+        Modo de revisão: usa sempre a busca exata e não grava logs nem last_seen.
+        """
+        try:
+            _, encodings = self._extract_upload(
+                image_bytes, self.upload_detection_scale, self.detection_grayscale
+            )
             
+            if not encodings:
+                return []
+            
+            shards = self._sharded()
+            if shards is not None:
+                return shards.top_k(encodings, k)
+            return self._load_gallery().top_k(encodings, k)
+            
+        except InferenceQueueFull:
+            raise
         except Exception as e:
-            print(f"Erro ao reconhecer rosto: {str(e)}")
+            print(f"Erro ao buscar candidatos: {str(e)}")
             return []
 
 
@@ -0,0 +1,296 @@
+import os
+import threading
+import time
+from collections import deque
+from typing import List, Optional, Tuple, Union
+
+from app.ann_index import IVFIndex
+from app.database import db
+from app.gallery import Gallery
+from app.gallery_snapshot import GallerySnapshotStore
+from app.pq_index import PQIndex
+from app.utils import decode_face_encoding
+
+
+class GalleryManager:
+    """
+    Mantém o snapshot vigente da galeria no estilo RCU.
+
+    Leitores (thread da câmera, requisições) apenas leem a referência atual
+    com current(), sem lock e sem nunca esperar uma reconstrução. Todas as
+    alterações (treino, remoção, renomeação, recarga) são enfileiradas e
+    aplicadas por uma única thread reconstrutora, que publica um novo snapshot
+    imutável trocando a referência. Pedidos de recarga que chegam juntos são
+    agrupados em uma única reconstrução.
+    """
+
+    def __init__(self):
+        self._gallery: Optional[Gallery] = None
+        self._ready = threading.Event()
+        self._pending = deque()
+        self._wakeup = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._thread_lock = threading.Lock()
+
+        # Maior id do banco refletido na galeria (para a verificação de consistência)
+        self._max_id = 0
+        self._consistency_interval = float(os.getenv("GALLERY_CONSISTENCY_INTERVAL", "60"))
+        self._last_consistency_check = 0.0
+        # Espera máxima de um leitor pela primeira carga da galeria
+        self._load_timeout = float(os.getenv("GALLERY_LOAD_TIMEOUT", "120"))
+        self._consistency_mismatches = 0
+        # Compacta quando remoções/renomeações pendentes passam desta fração da galeria
+        self._compaction_ratio = 0.1
+
+        # Índice aproximado para galerias muito grandes: "ivf", "pq" (quantizado)
+        # ou "exact" (desativa)
+        self._index_mode = os.getenv("GALLERY_INDEX", "exact").lower()
+
+        # Snapshot da galeria compartilhado entre workers (mapeado em memória).
+        # Opcional mesmo com o PQ: neste modo cada alteração republica a galeria
+        # inteira a partir do banco, então só compensa com poucas escritas
+        self._snapshot_store: Optional[GallerySnapshotStore] = None
+        if os.getenv("GALLERY_SHARED_SNAPSHOT", "false").lower() == "true":
+            self._snapshot_store = GallerySnapshotStore(
+                os.getenv("GALLERY_SNAPSHOT_DIR", "data/gallery")
+            )
+        elif self._index_mode == "pq":
+            print("⚠️ GALLERY_INDEX=pq sem GALLERY_SHARED_SNAPSHOT=true: a galeria float32 "
+                  "continua inteira na memória e o PQ não economiza memória")
+        self._index_min_size = int(os.getenv("GALLERY_INDEX_MIN_SIZE", "20000"))
+        self._index: Optional[Union[IVFIndex, PQIndex]] = None
+
+        self.stats = {"rebuilds": 0, "deltas": 0, "publishes": 0, "compactions": 0, "remaps": 0}
+
+    # Leitura (nunca bloqueia, exceto na primeiríssima carga do processo)
+
+    def current(self) -> Gallery:
+        gallery = self._gallery
+        if gallery is None:
+            self._ensure_started()
+            if not self._ready.wait(self._load_timeout):
+                raise RuntimeError(
+                    f"Galeria não carregou em {self._load_timeout:.0f}s (veja os erros de atualização da galeria)"
+                )
+            gallery = self._gallery
+        return gallery
+
+    def current_index(self, gallery: Gallery) -> Optional[Union[IVFIndex, PQIndex]]:
+        """Índice aproximado a usar com a galeria (None = matching exato)"""
+        if self._index is None or len(gallery) < self._index_min_size:
+            return None
+        return self._index
+
+    # Escrita: enfileira para a thread reconstrutora
+
+    def add(self, face_id: str, name: str, encoding, db_id: int, wait: bool = True):
+        self._submit(("add", face_id, name, encoding, db_id), wait)
+
+    def add_many(self, faces: List[tuple], wait: bool = True):
+        """Vários rostos (face_id, name, encoding, db_id) publicados em um único snapshot"""
+        self._submit_all([("add", *face) for face in faces], wait)
+
+    def remove(self, face_id: str, wait: bool = True):
+        self._submit(("remove", face_id), wait)
+
+    def rename(self, face_id: str, name: str, wait: bool = True):
+        self._submit(("rename", face_id, name), wait)
+
+    def reload(self, wait: bool = True):
+        self._submit(("reload",), wait)
+
+    def _submit(self, op: tuple, wait: bool, timeout: float = 30.0):
+        self._submit_all([op], wait, timeout)
+
+    def _submit_all(self, ops: List[tuple], wait: bool, timeout: float = 30.0):
+        done = threading.Event()
+        self._ensure_started()
+        with self._wakeup:
+            # Enfileiradas juntas: a thread reconstrutora aplica todas no mesmo lote
+            self._pending.extend((op, done) for op in ops)
+            self._wakeup.notify()
+        if wait:
+            # Quem espera é só o escritor; leitores continuam no snapshot anterior
+            if not done.wait(timeout):
+                print(f"⚠️  Alteração da galeria ainda não publicada após {timeout:.0f}s; segue em segundo plano")
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._thread_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="gallery-rebuilder", daemon=True)
+                self._thread.start()
+
+    # Thread reconstrutora (única escritora de self._gallery)
+
+    def _run(self):
+        while True:
+            with self._wakeup:
+                # Sem galeria ainda: faz a carga inicial imediatamente
+                if not self._pending and self._gallery is not None:
+                    self._wakeup.wait(timeout=self._poll_interval())
+                batch = list(self._pending)
+                self._pending.clear()
+
+            try:
+                self._process([op for op, _ in batch])
+            except Exception as e:
+                print(f"Erro ao atualizar a galeria: {str(e)}")
+                time.sleep(1.0)
+            finally:
+                if self._gallery is not None:
+                    self._ready.set()
+                for _, done in batch:
+                    done.set()
+
+    def _poll_interval(self) -> float:
+        if self._snapshot_store is not None:
+            return self._snapshot_store.check_interval
+        return max(0.05, self._consistency_interval)
+
+    def _process(self, ops: List[tuple]):
+        if self._snapshot_store is not None:
+            self._process_shared(ops)
+            return
+
+        if self._gallery is None or any(op[0] == "reload" for op in ops) or not self._is_consistent():
+            # Uma única reconstrução cobre todos os deltas do lote
+            self._adopt(*self._build_from_db())
+            self.stats["rebuilds"] += 1
+            return
+
+        if not ops:
+            return
+
+        gallery = self._gallery
+        removed = False
+        for op in ops:
+            if op[0] == "add":
+                _, face_id, name, encoding, db_id = op
+                gallery = gallery.with_added(face_id, name, encoding)
+                self._max_id = max(self._max_id, db_id)
+            elif op[0] == "remove":
+                gallery = gallery.with_removed(op[1])
+                removed = True
+            elif op[0] == "rename":
+                gallery = gallery.with_renamed(op[1], op[2])
+
+        if removed:
+            # A remoção pode ter apagado a linha de maior id: o banco (que já
+            # reflete as remoções do lote) diz qual é o novo maior id
+            self._max_id = db.get_gallery_fingerprint()[1]
+
+        if gallery.overlay_size > max(64, self._compaction_ratio * len(gallery)):
+            gallery = gallery.compacted()
+            self.stats["compactions"] += 1
+
+        self.stats["deltas"] += len(ops)
+        self._publish(gallery)
+        self._update_index(gallery, ops)
+
+    def _process_shared(self, ops: List[tuple]):
+        """Modo snapshot compartilhado: alterações publicam uma nova geração no disco"""
+        store = self._snapshot_store
+
+        if ops:
+            loaded = store.publish(self._build_from_db)
+            self.stats["rebuilds"] += 1
+        elif self._gallery is None:
+            # Primeira carga: reaproveita o snapshot se ele ainda corresponde ao banco
+            loaded = store.load()
+            if loaded is None or loaded[1].get("fingerprint") != list(db.get_gallery_fingerprint()):
+                loaded = store.publish(self._build_from_db)
+                self.stats["rebuilds"] += 1
+        elif store.current_generation(force=True) != self._gallery.generation:
+            # Outro worker publicou uma nova geração
+            loaded = store.load()
+            self.stats["remaps"] += 1
+        else:
+            return
+
+        if loaded is None:
+            # Snapshot removido entre a leitura de CURRENT e o mapeamento
+            loaded = self._build_from_db()
+        self._adopt(*loaded)
+
+    def _build_from_db(self) -> Tuple[Gallery, dict]:
+        """Monta a galeria a partir do banco; retorna também a assinatura da tabela"""
+        rows = db.get_gallery_rows()
+        known_faces = [
+            (face_id, name, decode_face_encoding(encoding))
+            for _, face_id, name, encoding in rows
+        ]
+        fingerprint = [len(rows), rows[-1].id if rows else 0]
+        return Gallery.from_known_faces(known_faces), {"fingerprint": fingerprint}
+
+    def _adopt(self, gallery: Gallery, meta: dict):
+        """Publica uma galeria completa (recarga ou remapeamento)"""
+        self._max_id = meta.get("fingerprint", [0, 0])[1]
+        self._last_consistency_check = time.monotonic()
+        self._publish(gallery)
+        self._update_index(gallery, None)
+
+    def _publish(self, gallery: Gallery):
+        # Troca atômica da referência: leitores veem o snapshot antigo ou o novo
+        self._gallery = gallery
+        self.stats["publishes"] += 1
+
+    def _is_consistent(self) -> bool:
+        """
+        Verificação periódica da galeria em memória contra o banco (contagem e
+        maior id), para detectar alterações feitas fora deste processo.
+        """
+        now = time.monotonic()
+        if now - self._last_consistency_check < self._consistency_interval:
+            return True
+        self._last_consistency_check = now
+
+        count, max_id = db.get_gallery_fingerprint()
+        if count == len(self._gallery) and max_id == self._max_id:
+            self._consistency_mismatches = 0
+            return True
+
+        # Um escritor pode ter gravado no banco e ainda não enfileirado o delta;
+        # só recarrega se a divergência persistir na verificação seguinte
+        self._consistency_mismatches += 1
+        if self._consistency_mismatches < 2:
+            return True
+
+        self._consistency_mismatches = 0
+        print(f"⚠️  Galeria inconsistente com o banco ({len(self._gallery)} em memória, {count} no banco); recarregando")
+        return False
+
+    def _update_index(self, gallery: Gallery, ops: Optional[List[tuple]]):
+        """Mantém o índice aproximado em dia com a galeria publicada"""
+        if self._index_mode not in ("ivf", "pq"):
+            return
+
+        if len(gallery) < self._index_min_size and self._index is None:
+            return
+
+        if self._index is None or len(gallery) > 2 * self._index.trained_size:
+            # Treina (ou re-treina, quando a galeria dobrou) os centróides
+            index = self._new_index()
+            index.build(gallery)
+            self._index = index
+        elif ops is None:
+            # Galeria nova por completo: aplica só a diferença
+            self._index.sync(gallery)
+        else:
+            for op in ops:
+                if op[0] == "add":
+                    self._index.add(op[1], op[3])
+                elif op[0] == "remove":
+                    self._index.remove(op[1])
+
+    def _new_index(self) -> Union[IVFIndex, PQIndex]:
+        if self._index_mode == "pq":
+            return PQIndex(
+                subspaces=int(os.getenv("PQ_SUBSPACES", "16")),
+                shortlist=int(os.getenv("PQ_SHORTLIST", "64"))
+            )
+        return IVFIndex(
+            nlist=int(os.getenv("IVF_NLIST", "0")) or None,
+            nprobe=int(os.getenv("IVF_NPROBE", "8"))
+        )
@@ -0,0 +1,173 @@
+import itertools
+import threading
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Caixa no formato do face_recognition: (top, right, bottom, left)
+Box = Tuple[int, int, int, int]
+
+
+def iou_matrix(a: Sequence[Box], b: Sequence[Box]) -> np.ndarray:
+    """IoU (len(a), len(b)) entre duas listas de caixas"""
+    if not len(a) or not len(b):
+        return np.zeros((len(a), len(b)), dtype=np.float32)
+    a = np.asarray(a, dtype=np.float32)[:, None, :]
+    b = np.asarray(b, dtype=np.float32)[None, :, :]
+    top = np.maximum(a[..., 0], b[..., 0])
+    right = np.minimum(a[..., 1], b[..., 1])
+    bottom = np.minimum(a[..., 2], b[..., 2])
+    left = np.maximum(a[..., 3], b[..., 3])
+    inter = np.clip(right - left, 0, None) * np.clip(bottom - top, 0, None)
+    area_a = (a[..., 1] - a[..., 3]) * (a[..., 2] - a[..., 0])
+    area_b = (b[..., 1] - b[..., 3]) * (b[..., 2] - b[..., 0])
+    union = area_a + area_b - inter
+    return np.where(union > 0, inter / np.maximum(union, 1e-6), 0.0)
+
+
+class Track:
+    """Uma face acompanhada entre frames e a última identidade atribuída a ela"""
+
+    def __init__(self, track_id: int, box: Box, now: float):
+        self.track_id = track_id
+        self.box = box
+        self.face_id = ""
+        self.name = ""
+        self.confidence = 0.0
+        self.first_seen = now
+        self.last_seen = now
+        # Momento do último encoding (None = nunca codificada)
+        self.last_encoded: Optional[float] = None
+        # Encoding em andamento desde (None = nenhum): ainda sem resultado em identify()
+        self.in_flight_since: Optional[float] = None
+        self.missed = 0
+
+    @property
+    def identified(self) -> bool:
+        return bool(self.face_id)
+
+
+class FaceTracker:
+    """
+    Rastreador de faces por IoU entre as caixas de frames consecutivos.
+
+    Cada caixa detectada é associada (guloso, maior IoU primeiro) a uma trilha
+    existente ou abre uma trilha nova. Uma trilha identificada mantém a
+    identidade, e a face só volta a ser codificada quando a trilha é nova ou a
+    cada `refresh_interval` segundos. Trilhas desconhecidas ou com confiança
+    abaixo de `min_confidence` tentam de novo a cada `unknown_retry` segundos.
+
+    Seguro entre threads: no pipeline da câmera, select() do frame N+1 roda na
+    thread de detecção enquanto identify() do frame N roda na de matching.
+    """
+
+    def __init__(
+        self,
+        iou_threshold: float = 0.3,
+        max_missed: int = 5,
+        refresh_interval: float = 5.0,
+        min_confidence: float = 0.5,
+        unknown_retry: float = 0.5,
+        in_flight_timeout: float = 2.0
+    ):
+        self.iou_threshold = iou_threshold
+        self.max_missed = max_missed
+        self.refresh_interval = refresh_interval
+        self.min_confidence = min_confidence
+        self.unknown_retry = unknown_retry
+        # Uma trilha em codificação não é reservada de novo; passado este prazo
+        # sem resultado (frame descartado no pipeline), ela volta a ser elegível
+        self.in_flight_timeout = in_flight_timeout
+        self.tracks: List[Track] = []
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self.stats = {"tracks": 0, "encoded": 0, "reused": 0}
+
+    def reset(self):
+        with self._lock:
+            self.tracks = []
+
+    def update(self, boxes: Sequence[Box], now: float) -> List[Track]:
+        """Associa as caixas do frame às trilhas; retorna a trilha de cada caixa, na mesma ordem"""
+        with self._lock:
+            return self._update(boxes, now)
+
+    def _update(self, boxes: Sequence[Box], now: float) -> List[Track]:
+        overlaps = iou_matrix([t.box for t in self.tracks], boxes)
+        assigned: List[Optional[Track]] = [None] * len(boxes)
+        used = set()
+
+        if overlaps.size:
+            for flat in np.argsort(overlaps, axis=None)[::-1].tolist():
+                t, b = divmod(flat, len(boxes))
+                if overlaps[t, b] < self.iou_threshold:
+                    break
+                if t in used or assigned[b] is not None:
+                    continue
+                track = self.tracks[t]
+                track.box = boxes[b]
+                track.last_seen = now
+                track.missed = 0
+                assigned[b] = track
+                used.add(t)
+
+        # Trilhas não vistas neste frame expiram após max_missed frames
+        survivors = []
+        for t, track in enumerate(self.tracks):
+            if t not in used:
+                track.missed += 1
+                if track.missed > self.max_missed:
+                    continue
+            survivors.append(track)
+        self.tracks = survivors
+
+        for b, box in enumerate(boxes):
+            if assigned[b] is None:
+                track = Track(next(self._ids), box, now)
+                self.tracks.append(track)
+                self.stats["tracks"] += 1
+                assigned[b] = track
+
+        return assigned
+
+    def select(self, boxes: Sequence[Box], now: float) -> Tuple[List[Track], List[Track]]:
+        """
+        Atualiza as trilhas com as caixas do frame e retorna (trilhas do frame,
+        trilhas a codificar). As trilhas a codificar ficam reservadas até o
+        resultado chegar em identify(), para que frames seguintes ainda em
+        processamento não as codifiquem de novo.
+        """
+        with self._lock:
+            tracks = self._update(boxes, now)
+            stale = [track for track in tracks if self.needs_encoding(track, now)]
+            for track in stale:
+                track.in_flight_since = now
+            self.stats["encoded"] += len(stale)
+            self.stats["reused"] += len(tracks) - len(stale)
+            return tracks, stale
+
+    def recognized(self, tracks: Sequence[Track]) -> List[Tuple[str, str, float]]:
+        """(face_id, name, confidence) das trilhas já identificadas"""
+        with self._lock:
+            return [(track.face_id, track.name, track.confidence) for track in tracks if track.identified]
+
+    def needs_encoding(self, track: Track, now: float) -> bool:
+        if track.in_flight_since is not None and now - track.in_flight_since < self.in_flight_timeout:
+            return False
+        if track.last_encoded is None:
+            return True
+        elapsed = now - track.last_encoded
+        if not track.identified or track.confidence < self.min_confidence:
+            return elapsed >= self.unknown_retry
+        return elapsed >= self.refresh_interval
+
+    def identify(self, track: Track, match: bool, face_id: str, name: str, confidence: float, now: float):
+        """
+        Registra o resultado do matching da trilha. Uma trilha já identificada
+        mantém a identidade se a nova tentativa não casar (ex.: rosto de perfil).
+        """
+        with self._lock:
+            track.last_encoded = now
+            track.in_flight_since = None
+            if match:
+                track.face_id, track.name, track.confidence = face_id, name, confidence
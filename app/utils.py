@@ -1,8 +1,13 @@
 import json
+import os
+import struct
+import cv2
 import numpy as np
-from typing import List, Tuple
+from typing import Collection, List, Optional, Tuple, Union
 from PIL import Image
 import io
+from app.detectors import get_detector
+from app.gallery import Gallery
 
 # Tenta importar face_recognition, se não estiver disponível mostra erro claro
 try:
@@ -13,37 +18,208 @@ except ImportError:
     face_recognition = None
 
 
-def encode_face_encoding(encoding: np.ndarray) -> str:
-    """Converte numpy array encoding para string JSON"""
-    return json.dumps(encoding.tolist())
+# Formato binário dos encodings: cabeçalho (versão, reservado, dimensão)
+# seguido dos valores em float32 little-endian
+ENCODING_FORMAT_VERSION = 1
+_ENCODING_HEADER = struct.Struct("<BBH")
+_ENCODING_DTYPE = np.dtype("<f4")
 
+# Imagens enviadas: maior lado da resolução de trabalho (0 = original) e limite
+# de pixels conferido no cabeçalho, antes de decodificar (bombas de descompressão)
+IMAGE_MAX_SIDE = int(os.getenv("IMAGE_MAX_SIDE", "1600"))
+IMAGE_MAX_PIXELS = int(float(os.getenv("IMAGE_MAX_MEGAPIXELS", "50")) * 1_000_000)
 
-def decode_face_encoding(encoding_str: str) -> np.ndarray:
-    """Converte string JSON para numpy array encoding"""
-    return np.array(json.loads(encoding_str))
 
+def encode_face_encoding(encoding: np.ndarray) -> bytes:
+    """Converte numpy array encoding para o formato binário (float32)"""
+    values = np.asarray(encoding, dtype=_ENCODING_DTYPE).ravel()
+    header = _ENCODING_HEADER.pack(ENCODING_FORMAT_VERSION, 0, values.shape[0])
+    return header + values.tobytes()
 
-def extract_face_encodings(image_bytes: bytes) -> List[np.ndarray]:
-    """Extrai encodings de face de uma imagem"""
+
+def decode_face_encoding(encoding_data: Union[bytes, str]) -> np.ndarray:
+    """
+    Converte o encoding armazenado para numpy array float32.
+    O formato binário é decodificado sem cópia (np.frombuffer); o formato
+    JSON legado continua aceito enquanto a migração não termina.
+    """
+    if is_legacy_encoding(encoding_data):
+        return np.array(json.loads(encoding_data), dtype=np.float32)
+    
+    version, _, dim = _ENCODING_HEADER.unpack_from(encoding_data)
+    if version != ENCODING_FORMAT_VERSION:
+        raise ValueError(f"Versão de encoding não suportada: {version}")
+    
+    return np.frombuffer(encoding_data, dtype=_ENCODING_DTYPE, count=dim, offset=_ENCODING_HEADER.size)
+
+
+def is_legacy_encoding(encoding_data: Union[bytes, str]) -> bool:
+    """Indica se o encoding ainda está no formato JSON legado"""
+    return isinstance(encoding_data, str)
+
+
+def _require_face_recognition():
     if not FACE_RECOGNITION_AVAILABLE:
         raise ValueError(
             "face-recognition não está instalado. "
             "Por favor, instale CMake e Visual Studio Build Tools, depois execute: "
             "pip install dlib face-recognition==1.3.0"
         )
+
+
+def extract_face_encodings(
+    image_bytes: bytes,
+    detection_scale: float = 1.0,
+    grayscale: bool = False
+) -> List[np.ndarray]:
+    """Extrai encodings de face de uma imagem"""
+    image = load_image_bytes(image_bytes)
+    return extract_frame_encodings(image, detection_scale, grayscale)
+
+
+def load_image_bytes(image_bytes: bytes, max_side: Optional[int] = None) -> np.ndarray:
+    """
+    Decodifica a imagem enviada para um array RGB (uint8, H x W x 3) com o maior
+    lado limitado a max_side (padrão IMAGE_MAX_SIDE; 0 = resolução original).
+    O tamanho é lido do cabeçalho antes de decodificar: imagens acima de
+    IMAGE_MAX_MEGAPIXELS são recusadas, e JPEGs são decodificados direto em
+    1/2, 1/4 ou 1/8 da resolução (modo draft do PIL), sem passar pela
+    resolução cheia.
+    """
+    _require_face_recognition()
+    
+    if max_side is None:
+        max_side = IMAGE_MAX_SIDE
+    
+    try:
+        # Só lê o cabeçalho; os pixels são decodificados em convert()
+        image = Image.open(io.BytesIO(image_bytes))
+        width, height = image.size
+    except Exception as e:
+        raise ValueError(f"Erro ao processar imagem: {str(e)}")
+    
+    if width * height > IMAGE_MAX_PIXELS:
+        raise ValueError(
+            f"Imagem muito grande: {width}x{height} "
+            f"(máximo {IMAGE_MAX_PIXELS / 1_000_000:g} megapixels)"
+        )
+    
+    try:
+        ratio = max_side / max(width, height) if max_side else 1.0
+        if ratio < 1.0:
+            # Menor fator de redução do JPEG que ainda fica >= ao tamanho pedido
+            image.draft("RGB", (int(width * ratio), int(height * ratio)))
+        rgb = np.array(image.convert("RGB"))
+    except Exception as e:
+        raise ValueError(f"Erro ao processar imagem: {str(e)}")
+    
+    height, width = rgb.shape[:2]
+    if max_side and max(width, height) > max_side:
+        ratio = max_side / max(width, height)
+        size = (max(1, int(round(width * ratio))), max(1, int(round(height * ratio))))
+        rgb = cv2.resize(rgb, size, interpolation=cv2.INTER_AREA)
+    return rgb
+
+
+def extract_frame_encodings(
+    rgb_frame: np.ndarray,
+    detection_scale: float = 1.0,
+    grayscale: bool = False
+) -> List[np.ndarray]:
+    """
+    Extrai encodings de face de um frame RGB (uint8, H x W x 3) já decodificado.
+    A detecção pode rodar em uma cópia reduzida (detection_scale < 1); os
+    encodings são sempre calculados na resolução original.
+    """
+    _require_face_recognition()
     
     try:
-        # Carrega a imagem
-        image = face_recognition.load_image_file(io.BytesIO(image_bytes))
         # Encontra todas as faces na imagem
-        face_locations = face_recognition.face_locations(image)
+        face_locations = detect_faces(rgb_frame, detection_scale, grayscale)
         # Extrai encodings de todas as faces encontradas
-        encodings = face_recognition.face_encodings(image, face_locations)
+        encodings = face_recognition.face_encodings(rgb_frame, face_locations)
         return encodings
     except Exception as e:
         raise ValueError(f"Erro ao processar imagem: {str(e)}")
 
 
+def encode_faces(rgb_frame: np.ndarray, boxes: List[Tuple[int, int, int, int]]) -> List[np.ndarray]:
+    """Calcula os encodings apenas das caixas indicadas (top, right, bottom, left)"""
+    _require_face_recognition()
+    
+    if not boxes:
+        return []
+    return face_recognition.face_encodings(rgb_frame, boxes)
+
+
+def detect_faces_in_regions(
+    rgb_frame: np.ndarray,
+    regions: List[Tuple[int, int, int, int]],
+    scale: float = 1.0,
+    grayscale: bool = False
+) -> List[Tuple[int, int, int, int]]:
+    """
+    Detecta faces apenas nas regiões (x, y, largura, altura) indicadas, como as
+    de movimento; retorna as caixas em coordenadas do frame inteiro.
+    
+    `scale` limita o custo ao de detectar no frame reduzido: cada recorte só é
+    reduzido o necessário para caber nesse tamanho de trabalho (nunca abaixo de
+    `scale`). Recortes pequenos rodam na resolução original, sem encolher faces
+    que já estão justas no recorte para baixo do tamanho mínimo do detector.
+    """
+    frame_height, frame_width = rgb_frame.shape[:2]
+    work_height, work_width = frame_height * scale, frame_width * scale
+    boxes = []
+    for x, y, w, h in regions:
+        crop = rgb_frame[y:y + h, x:x + w]
+        if crop.size == 0:
+            continue
+        crop_height, crop_width = crop.shape[:2]
+        crop_scale = min(1.0, max(scale, min(work_height / crop_height, work_width / crop_width)))
+        for top, right, bottom, left in detect_faces(crop, crop_scale, grayscale):
+            boxes.append((top + y, right + x, bottom + y, left + x))
+    return boxes
+
+
+def detect_faces(
+    rgb_frame: np.ndarray,
+    scale: float = 1.0,
+    grayscale: bool = False,
+    detector=None
+) -> List[Tuple[int, int, int, int]]:
+    """
+    Detecta faces em uma cópia reduzida por `scale` e, opcionalmente, em tons
+    de cinza, com o detector indicado (padrão: FACE_DETECTOR, ver
+    app/detectors.py). Retorna as caixas (top, right, bottom, left) já
+    mapeadas para a resolução original do frame.
+    """
+    _require_face_recognition()
+    
+    detector = detector or get_detector()
+    if scale >= 1.0 and not grayscale:
+        return detector.detect(rgb_frame)
+    
+    small = rgb_frame
+    if scale < 1.0:
+        small = cv2.resize(rgb_frame, (0, 0), fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    if grayscale:
+        small = cv2.cvtColor(small, cv2.COLOR_RGB2GRAY)
+    
+    height, width = rgb_frame.shape[:2]
+    scale_y = height / small.shape[0]
+    scale_x = width / small.shape[1]
+    
+    return [
+        (
+            max(0, int(round(top * scale_y))),
+            min(width, int(round(right * scale_x))),
+            min(height, int(round(bottom * scale_y))),
+            max(0, int(round(left * scale_x)))
+        )
+        for top, right, bottom, left in detector.detect(small)
+    ]
+
+
 def find_matching_face(
     unknown_encoding: np.ndarray,
     known_encodings: List[Tuple[str, str, np.ndarray]],
@@ -53,37 +229,16 @@ def find_matching_face(
     Compara um encoding desconhecido com encodings conhecidos.
     Retorna: (match, face_id, name, confidence)
     """
-    if not FACE_RECOGNITION_AVAILABLE:
-        raise RuntimeError(
-            "face-recognition não está instalado. "
-            "Por favor, instale CMake e Visual Studio Build Tools, depois execute: "
-            "pip install dlib face-recognition==1.3.0"
-        )
-    
     if not known_encodings:
         return False, "", "", 0.0
     
-    distances = []
-    for face_id, name, encoding in known_encodings:
-        # Calcula a distância euclidiana entre os encodings
-        distance = face_recognition.face_distance([encoding], unknown_encoding)[0]
-        distances.append((distance, face_id, name))
-    
-    # Encontra o melhor match (menor distância)
-    if distances:
-        min_distance, face_id, name = min(distances, key=lambda x: x[0])
-        # Converte distância para confidence (quanto menor a distância, maior a confidence)
-        confidence = max(0.0, 1.0 - min_distance)
-        
-        # Considera match se a distância for menor que a tolerância
-        if min_distance <= tolerance:
-            return True, face_id, name, confidence
-    
-    return False, "", "", 0.0
+    # Compara com todos os encodings conhecidos em uma única operação vetorizada
+    gallery = Gallery.from_known_faces(known_encodings)
+    return gallery.match([unknown_encoding], tolerance)[0]
 
 
-def generate_face_id(name: str, existing_ids: List[str]) -> str:
-    """Gera um ID único para o rosto"""
+def generate_face_id(name: str, existing_ids: Collection[str]) -> str:
+    """Gera um ID único para o rosto (existing_ids de preferência um set)"""
     base_id = name.lower().replace(" ", "_")
     counter = 1
     face_id = base_id
@@ -0,0 +1,86 @@
+from typing import Dict, Iterator, List, Tuple
+
+import cv2
+import numpy as np
+
+
+def is_video_file(path: str) -> bool:
+    """Se o OpenCV consegue abrir o arquivo e ler o primeiro frame"""
+    capture = cv2.VideoCapture(path)
+    try:
+        return capture.isOpened() and capture.grab()
+    finally:
+        capture.release()
+
+
+def iter_video_frames(path: str, sample_fps: float) -> Iterator[Tuple[int, float, np.ndarray]]:
+    """
+    Decodifica o vídeo em streaming (um frame por vez, sem carregar o arquivo),
+    entregando ~sample_fps frames RGB por segundo de vídeo: (índice, segundos, frame).
+    Os frames pulados são só avançados (grab), sem decodificar a imagem.
+    """
+    capture = cv2.VideoCapture(path)
+    if not capture.isOpened():
+        raise ValueError("Não foi possível abrir o vídeo")
+
+    fps = capture.get(cv2.CAP_PROP_FPS) or 0.0
+    step = max(1, round(fps / sample_fps)) if fps > 0 and sample_fps > 0 else 1
+    index = 0
+    try:
+        while True:
+            if index % step:
+                if not capture.grab():
+                    break
+                index += 1
+                continue
+
+            ret, frame = capture.read()
+            if not ret:
+                break
+            seconds = index / fps if fps > 0 else capture.get(cv2.CAP_PROP_POS_MSEC) / 1000
+            yield index, seconds, cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            index += 1
+    finally:
+        capture.release()
+
+
+class AppearanceTimeline:
+    """
+    Aparições de cada identidade ao longo do vídeo. Detecções da mesma pessoa
+    separadas por até `gap` segundos contam como uma única aparição.
+    """
+
+    def __init__(self, gap: float = 2.0):
+        self.gap = gap
+        self._identities: Dict[str, dict] = {}
+
+    def add(self, face_id: str, name: str, seconds: float, confidence: float) -> bool:
+        """Registra uma detecção; retorna True se ela inicia uma nova aparição"""
+        identity = self._identities.get(face_id)
+        if identity is None:
+            self._identities[face_id] = {
+                "face_id": face_id,
+                "name": name,
+                "first_seen": seconds,
+                "last_seen": seconds,
+                "best_confidence": confidence,
+                "best_time": seconds,
+                "appearances": [{"start": seconds, "end": seconds}]
+            }
+            return True
+
+        identity["last_seen"] = max(identity["last_seen"], seconds)
+        if confidence > identity["best_confidence"]:
+            identity["best_confidence"] = confidence
+            identity["best_time"] = seconds
+
+        current = identity["appearances"][-1]
+        if seconds - current["end"] > self.gap:
+            identity["appearances"].append({"start": seconds, "end": seconds})
+            return True
+        current["end"] = max(current["end"], seconds)
+        return False
+
+    def summary(self) -> List[dict]:
+        """Identidades em ordem de primeira aparição (tempos em segundos)"""
+        return sorted(self._identities.values(), key=lambda identity: identity["first_seen"])
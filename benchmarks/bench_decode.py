@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Decodificação das imagens enviadas (IMAGE_MAX_SIDE): tempo e memória do array
+decodificado por imagem, comparando a decodificação em resolução cheia
+(face_recognition.load_image_file) com a decodificação reduzida de
+app.utils.load_image_bytes (modo draft do PIL para JPEG + redimensionamento).
+
+Sem --images, gera um JPEG sintético de --megapixels (foto de celular).
+Com --detect, inclui a detecção + encoding (requer face_recognition real).
+
+Uso:
+    python benchmarks/bench_decode.py --megapixels 12 --max-sides 0 2048 1600 1000
+    python benchmarks/bench_decode.py --images fotos/ --detect
+"""
+
+import argparse
+import glob
+import io
+import os
+import sys
+import time
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils import FACE_RECOGNITION_AVAILABLE, extract_frame_encodings, load_image_bytes  # noqa: E402
+
+
+def synthetic_jpeg(megapixels: float) -> bytes:
+    """JPEG 4:3 com textura (ruído suavizado), comprimido como uma foto"""
+    height = int((megapixels * 1_000_000 * 3 / 4) ** 0.5)
+    width = int(height * 4 / 3)
+    rng = np.random.default_rng(0)
+    small = rng.integers(0, 256, (height // 16, width // 16, 3), dtype=np.uint8)
+    image = Image.fromarray(small).resize((width, height), Image.BILINEAR)
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=90)
+    return buffer.getvalue()
+
+
+def run(images, max_side, detect, repeat):
+    """Retorna (ms por imagem, MB do array decodificado, forma do último array)"""
+    start = time.perf_counter()
+    nbytes = 0
+    shape = None
+    for _ in range(repeat):
+        for image_bytes in images:
+            rgb = load_image_bytes(image_bytes, max_side)
+            if detect:
+                extract_frame_encodings(rgb)
+            nbytes = max(nbytes, rgb.nbytes)
+            shape = rgb.shape
+    elapsed = time.perf_counter() - start
+    return 1000 * elapsed / (repeat * len(images)), nbytes / 1024 / 1024, shape
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", help="diretório com imagens (jpg/png)")
+    parser.add_argument("--megapixels", type=float, default=12.0, help="tamanho do JPEG sintético")
+    parser.add_argument("--max-sides", type=int, nargs="+", default=[0, 2048, 1600, 1000],
+                        help="valores de IMAGE_MAX_SIDE (0 = resolução original)")
+    parser.add_argument("--detect", action="store_true", help="inclui detecção + encoding")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    if not FACE_RECOGNITION_AVAILABLE:
+        print("face_recognition não está instalado.")
+        return 1
+
+    if args.images:
+        paths = sorted(p for ext in ("jpg", "jpeg", "png") for p in glob.glob(os.path.join(args.images, f"*.{ext}")))
+        images = [open(p, "rb").read() for p in paths]
+    else:
+        images = [synthetic_jpeg(args.megapixels)]
+    if not images:
+        print("Nenhuma imagem encontrada.")
+        return 1
+
+    print(f"Imagens: {len(images)} | {sum(len(i) for i in images) / len(images) / 1024:.0f} KB em média")
+    print(f"{'max_side':>9} {'ms/img':>9} {'MB array':>9} {'ganho':>7}  resolução")
+    reference = None
+    for max_side in args.max_sides:
+        ms, mb, shape = run(images, max_side, args.detect, args.repeat)
+        reference = reference or ms
+        print(f"{max_side or 'original':>9} {ms:9.1f} {mb:9.1f} {reference / ms:6.1f}x  {shape[1]}x{shape[0]}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
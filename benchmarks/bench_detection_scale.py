@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Detecção reduzida (DETECTION_SCALE_CAMERA / DETECTION_SCALE_UPLOAD): tempo de
+detecção + encoding por imagem em cada escala, comparado à resolução original.
+
+Para cada escala mostra:
+- ms/imagem e ganho de frames por núcleo;
+- recall da detecção para faces com pelo menos --min-face pixels de altura
+  (caixa com IoU >= 0,5 contra a detecção em escala 1.0);
+- deriva do encoding da mesma face (distância ao encoding em escala 1.0);
+- concordância do match com a galeria do banco (DATABASE_PATH), se houver.
+
+Requer face_recognition. Use fotos ou frames reais da câmera:
+
+Uso:
+    python benchmarks/bench_detection_scale.py --images fotos/ --scales 1.0 0.5 0.33 0.25
+    python benchmarks/bench_detection_scale.py --images frames/ --grayscale
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils import FACE_RECOGNITION_AVAILABLE, detect_faces, face_recognition  # noqa: E402
+
+
+def iou(a, b):
+    top, right, bottom, left = max(a[0], b[0]), min(a[1], b[1]), min(a[2], b[2]), max(a[3], b[3])
+    inter = max(0, right - left) * max(0, bottom - top)
+    area = lambda box: (box[1] - box[3]) * (box[2] - box[0])  # noqa: E731
+    union = area(a) + area(b) - inter
+    return inter / union if union else 0.0
+
+
+def run(images, scale, grayscale):
+    """Retorna (ms por imagem, [(caixas, encodings) por imagem])"""
+    results = []
+    start = time.perf_counter()
+    for image in images:
+        boxes = detect_faces(image, scale, grayscale)
+        results.append((boxes, face_recognition.face_encodings(image, boxes)))
+    return 1000 * (time.perf_counter() - start) / len(images), results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", required=True, help="diretório com imagens (jpg/png)")
+    parser.add_argument("--scales", type=float, nargs="+", default=[1.0, 0.5, 0.33, 0.25])
+    parser.add_argument("--grayscale", action="store_true", help="detecta em tons de cinza")
+    parser.add_argument("--min-face", type=int, default=80, help="altura mínima (px) das faces avaliadas")
+    parser.add_argument("--tolerance", type=float, default=0.6)
+    args = parser.parse_args()
+
+    if not FACE_RECOGNITION_AVAILABLE:
+        print("face_recognition não está instalado.")
+        return 1
+
+    paths = sorted(p for ext in ("jpg", "jpeg", "png") for p in glob.glob(os.path.join(args.images, f"*.{ext}")))
+    images = [cv2.cvtColor(cv2.imread(p), cv2.COLOR_BGR2RGB) for p in paths]
+    if not images:
+        print("Nenhuma imagem encontrada.")
+        return 1
+
+    gallery = None
+    try:
+        from app.services.gallery_manager import GalleryManager
+        gallery, _ = GalleryManager()._build_from_db()
+    except Exception as e:
+        print(f"Sem galeria para comparar matches: {str(e)}")
+
+    reference_ms, reference = run(images, 1.0, False)
+    print(f"Imagens: {len(images)} | faces na escala 1.0: {sum(len(b) for b, _ in reference)} | "
+          f"galeria: {len(gallery) if gallery is not None else 0} rostos")
+    print(f"{'escala':>6} | {'ms/imagem':>9} | {'ganho':>6} | {'recall':>6} | {'deriva média':>12} | {'match igual':>11}")
+    print("-" * 66)
+
+    for scale in args.scales:
+        ms, results = run(images, scale, args.grayscale)
+        expected = found = same_match = compared = 0
+        drifts = []
+        for (ref_boxes, ref_encodings), (boxes, encodings) in zip(reference, results):
+            for ref_box, ref_encoding in zip(ref_boxes, ref_encodings):
+                if ref_box[2] - ref_box[0] < args.min_face:
+                    continue
+                expected += 1
+                overlaps = [iou(ref_box, box) for box in boxes]
+                if not overlaps or max(overlaps) < 0.5:
+                    continue
+                found += 1
+                encoding = encodings[int(np.argmax(overlaps))]
+                drifts.append(float(np.linalg.norm(encoding - ref_encoding)))
+                if gallery is not None and len(gallery):
+                    ref_match, match = gallery.match([ref_encoding, encoding], args.tolerance)
+                    compared += 1
+                    same_match += ref_match[:2] == match[:2]
+
+        recall = f"{found / expected:.3f}" if expected else "n/d"
+        drift = f"{np.mean(drifts):.4f}" if drifts else "n/d"
+        agreement = f"{same_match / compared:.3f}" if compared else "n/d"
+        print(f"{scale:>6.2f} | {ms:>9.1f} | {reference_ms / ms:>5.1f}x | {recall:>6} | {drift:>12} | {agreement:>11}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
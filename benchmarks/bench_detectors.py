@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Detectores de faces (FACE_DETECTOR): vazão e recall de cada backend em um
+conjunto local de imagens, comparados a um detector de referência (padrão:
+dlib HOG na resolução original).
+
+Para cada detector mostra:
+- ms/imagem e imagens/s por núcleo (uma thread);
+- faces encontradas;
+- recall: faces da referência com alguma caixa de IoU >= --iou;
+- extras: caixas sem correspondência na referência (falsos positivos prováveis,
+  ou faces que a referência perdeu).
+
+Caixas de detectores diferentes enquadram o rosto de forma diferente; por isso
+o IoU padrão é mais baixo que o de bench_detection_scale.py. O backend dnn
+precisa de DETECTOR_DNN_MODEL (e DETECTOR_DNN_CONFIG, se o formato exigir).
+
+Uso:
+    python benchmarks/bench_detectors.py --images fotos/
+    python benchmarks/bench_detectors.py --images frames/ --scale 0.5 --detectors hog cascade_hog
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+
+import cv2
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.detectors import DETECTOR_NAMES, create_detector  # noqa: E402
+from app.utils import FACE_RECOGNITION_AVAILABLE, detect_faces  # noqa: E402
+
+
+def iou(a, b):
+    top, right, bottom, left = max(a[0], b[0]), min(a[1], b[1]), min(a[2], b[2]), max(a[3], b[3])
+    inter = max(0, right - left) * max(0, bottom - top)
+    area = lambda box: (box[1] - box[3]) * (box[2] - box[0])  # noqa: E731
+    union = area(a) + area(b) - inter
+    return inter / union if union else 0.0
+
+
+def run(images, detector, scale):
+    """Retorna (ms por imagem, [caixas por imagem])"""
+    results = []
+    start = time.perf_counter()
+    for image in images:
+        results.append(detect_faces(image, scale, detector=detector))
+    return 1000 * (time.perf_counter() - start) / len(images), results
+
+
+def compare(reference, results, min_iou):
+    """Retorna (faces da referência encontradas, caixas extras)"""
+    found = extras = 0
+    for expected, boxes in zip(reference, results):
+        found += sum(1 for box in expected if any(iou(box, other) >= min_iou for other in boxes))
+        extras += sum(1 for box in boxes if all(iou(box, other) < min_iou for other in expected))
+    return found, extras
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", required=True, help="diretório com imagens (jpg/png)")
+    parser.add_argument("--detectors", nargs="+", default=DETECTOR_NAMES, choices=DETECTOR_NAMES)
+    parser.add_argument("--reference", default="hog", choices=DETECTOR_NAMES,
+                        help="detector de referência (sempre na escala 1.0)")
+    parser.add_argument("--scale", type=float, default=1.0, help="escala da detecção dos detectores avaliados")
+    parser.add_argument("--iou", type=float, default=0.3, help="IoU mínimo para contar uma face como encontrada")
+    args = parser.parse_args()
+
+    if not FACE_RECOGNITION_AVAILABLE:
+        print("face_recognition não está instalado.")
+        return 1
+
+    paths = sorted(p for ext in ("jpg", "jpeg", "png") for p in glob.glob(os.path.join(args.images, f"*.{ext}")))
+    images = [cv2.cvtColor(cv2.imread(p), cv2.COLOR_BGR2RGB) for p in paths]
+    if not images:
+        print("Nenhuma imagem encontrada.")
+        return 1
+
+    reference_ms, reference = run(images, create_detector(args.reference), 1.0)
+    total = sum(len(boxes) for boxes in reference)
+    print(f"Imagens: {len(images)} | referência {args.reference}: {total} faces, {reference_ms:.1f} ms/imagem")
+    print(f"{'detector':>12} {'ms/img':>9} {'img/s':>7} {'ganho':>7} {'faces':>6} {'recall':>7} {'extras':>7}")
+
+    for name in args.detectors:
+        try:
+            detector = create_detector(name)
+        except ValueError as e:
+            print(f"{name:>12} indisponível: {str(e)}")
+            continue
+
+        ms, results = run(images, detector, args.scale)
+        found, extras = compare(reference, results, args.iou)
+        recall = found / total if total else 0.0
+        print(f"{name:>12} {ms:9.1f} {1000 / ms:7.1f} {reference_ms / ms:6.1f}x "
+              f"{sum(len(boxes) for boxes in results):6d} {recall:7.1%} {extras:7d}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
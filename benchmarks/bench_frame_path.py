@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Latência por frame do caminho da câmera: antes (BGR→RGB, JPEG com PIL e
+decodificação de volta em extract_face_encodings) vs. depois
+(FaceService.recognize_frame direto com o buffer RGB).
+
+Sem face_recognition instalado mede só a preparação do frame (a parte que
+mudou); com ele, mede também detecção + encoding (--full).
+
+Uso:
+    python benchmarks/bench_frame_path.py
+    python benchmarks/bench_frame_path.py --image foto.jpg --resolutions 640x480 1920x1080 --full
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils import FACE_RECOGNITION_AVAILABLE, extract_frame_encodings  # noqa: E402
+
+
+def synthetic_frame(width, height, rng):
+    """Frame BGR com gradiente + ruído (comprime como uma cena real, não como ruído puro)"""
+    x = np.linspace(0, 255, width, dtype=np.float32)
+    y = np.linspace(0, 255, height, dtype=np.float32)
+    base = (x[None, :, None] * 0.6 + y[:, None, None] * 0.4) * np.array([1.0, 0.8, 0.6], dtype=np.float32)
+    noise = rng.normal(0.0, 8.0, size=(height, width, 3))
+    return np.clip(base + noise, 0, 255).astype(np.uint8)
+
+
+def old_path(frame, full):
+    """Reprodução do loop antigo: JPEG em memória e decodificação como load_image_file"""
+    rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    img_bytes = io.BytesIO()
+    Image.fromarray(rgb_frame).save(img_bytes, format='JPEG')
+    image = np.array(Image.open(io.BytesIO(img_bytes.getvalue())).convert("RGB"))
+    if full:
+        extract_frame_encodings(image)
+    return image
+
+
+def new_path(frame, full):
+    rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    if full:
+        extract_frame_encodings(rgb_frame)
+    return rgb_frame
+
+
+def per_frame_ms(fn, min_time):
+    calls = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < min_time:
+        fn()
+        calls += 1
+    return 1000 * (time.perf_counter() - start) / calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--image", help="foto usada como frame (redimensionada para cada resolução)")
+    parser.add_argument("--resolutions", nargs="+", default=["640x480", "1280x720", "1920x1080"])
+    parser.add_argument("--full", action="store_true", help="inclui detecção + encoding (requer face_recognition)")
+    parser.add_argument("--min-time", type=float, default=2.0)
+    args = parser.parse_args()
+
+    if args.full and not FACE_RECOGNITION_AVAILABLE:
+        print("face_recognition não está instalado; medindo só a preparação do frame.")
+        args.full = False
+
+    rng = np.random.default_rng(0)
+    source = cv2.imread(args.image) if args.image else None
+
+    print(f"{'resolução':>10} | {'antes (ms)':>10} | {'depois (ms)':>11} | {'economia (ms)':>13} | {'erro JPEG (média)':>17}")
+    print("-" * 74)
+    for resolution in args.resolutions:
+        width, height = (int(v) for v in resolution.split("x"))
+        if source is not None:
+            frame = cv2.resize(source, (width, height))
+        else:
+            frame = synthetic_frame(width, height, rng)
+
+        before = per_frame_ms(lambda: old_path(frame, args.full), args.min_time)
+        after = per_frame_ms(lambda: new_path(frame, args.full), args.min_time)
+        # Artefatos que o JPEG intermediário introduzia nos pixels entregues ao detector
+        error = np.abs(old_path(frame, False).astype(np.int16) - new_path(frame, False).astype(np.int16)).mean()
+        print(f"{resolution:>10} | {before:>10.2f} | {after:>11.2f} | {before - after:>13.2f} | {error:>17.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark do carregamento da galeria: encodings JSON (formato legado) vs.
+binário float32, incluindo o tamanho do arquivo SQLite e a migração online.
+
+Uso:
+    python benchmarks/bench_gallery_load.py --rows 10000
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+from sqlalchemy import text
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import Database  # noqa: E402
+from app.gallery import Gallery, ENCODING_DIM  # noqa: E402
+from app.utils import decode_face_encoding  # noqa: E402
+
+
+def populate_legacy(database, encodings):
+    """Insere os encodings no formato JSON legado (coluna TEXT)"""
+    rows = [
+        {"face_id": f"face_{i}", "name": f"Pessoa {i}", "encoding": json.dumps(encoding.tolist())}
+        for i, encoding in enumerate(encodings)
+    ]
+    with database.engine.begin() as conn:
+        conn.execute(text(
+            "INSERT INTO trained_faces (face_id, name, encoding, created_at) "
+            "VALUES (:face_id, :name, :encoding, CURRENT_TIMESTAMP)"
+        ), rows)
+
+
+def load_gallery(database):
+    known = [(f, n, decode_face_encoding(e)) for _, f, n, e in database.get_gallery_rows()]
+    return Gallery.from_known_faces(known)
+
+
+def timed(fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    encodings = rng.normal(0.0, 0.09, size=(args.rows, ENCODING_DIM))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_path = os.path.join(tmp, "legacy.db")
+        legacy_db = Database(legacy_path)
+        populate_legacy(legacy_db, encodings)
+        legacy_size = os.path.getsize(legacy_path)
+        legacy_time = timed(lambda: load_gallery(legacy_db))
+
+        start = time.perf_counter()
+        converted = legacy_db.migrate_encodings_to_binary()
+        legacy_db.vacuum()
+        migration_time = time.perf_counter() - start
+
+        binary_size = os.path.getsize(legacy_path)
+        binary_time = timed(lambda: load_gallery(legacy_db))
+        legacy_db.engine.dispose()
+
+    print(f"Linhas: {args.rows} (migradas: {converted} em {migration_time:.2f}s)")
+    print(f"{'formato':>8} | {'arquivo (KB)':>12} | {'carga da galeria (ms)':>22}")
+    print("-" * 50)
+    print(f"{'json':>8} | {legacy_size / 1024:>12,.0f} | {legacy_time * 1000:>22,.1f}")
+    print(f"{'binário':>8} | {binary_size / 1024:>12,.0f} | {binary_time * 1000:>22,.1f}")
+
+
+if __name__ == "__main__":
+    main()
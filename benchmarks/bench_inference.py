@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Throughput de detecção + encoding: executor em threads (INFERENCE_BACKEND=thread)
+vs. pool de processos com memória compartilhada (INFERENCE_BACKEND=process),
+com --clients chamadas simultâneas (requisições ou câmeras).
+
+Requer face_recognition. Use uma foto com rostos (--image); sem ela, um frame
+sintético mede só o custo da detecção.
+
+Uso:
+    python benchmarks/bench_inference.py --image foto.jpg --clients 1 2 4 8
+    python benchmarks/bench_inference.py --image foto.jpg --workers 4 --uploads
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.inference import InferenceExecutor, ProcessInferenceExecutor  # noqa: E402
+from app.utils import FACE_RECOGNITION_AVAILABLE  # noqa: E402
+
+
+def throughput(fn, clients, min_time):
+    """Chamadas por segundo com `clients` threads chamando fn em paralelo"""
+    counts = [0] * clients
+    deadline = time.perf_counter() + min_time
+
+    def client(i):
+        while time.perf_counter() < deadline:
+            fn()
+            counts[i] += 1
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return sum(counts) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--image", help="foto com rostos")
+    parser.add_argument("--resolution", default="1280x720", help="resolução do frame")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--uploads", action="store_true", help="envia JPEG (como /recognize/image) em vez de frames")
+    parser.add_argument("--min-time", type=float, default=5.0)
+    args = parser.parse_args()
+
+    if not FACE_RECOGNITION_AVAILABLE:
+        print("face_recognition não está instalado.")
+        return 1
+
+    width, height = (int(v) for v in args.resolution.split("x"))
+    if args.image:
+        frame = cv2.cvtColor(cv2.resize(cv2.imread(args.image), (width, height)), cv2.COLOR_BGR2RGB)
+    else:
+        frame = np.random.default_rng(0).integers(0, 255, size=(height, width, 3), dtype=np.uint8)
+    jpeg = cv2.imencode(".jpg", cv2.cvtColor(frame, cv2.COLOR_RGB2BGR))[1].tobytes()
+
+    executors = {
+        "thread": InferenceExecutor(args.workers, queue_size=max(args.clients)),
+        "process": ProcessInferenceExecutor(args.workers, queue_size=max(args.clients)),
+    }
+    print(f"Workers: {args.workers} | CPUs: {os.cpu_count()} | entrada: {'JPEG' if args.uploads else 'frame'} {args.resolution}")
+    print(f"{'backend':>8} | {'clientes':>8} | {'chamadas/s':>10}")
+    print("-" * 32)
+    try:
+        for name, executor in executors.items():
+            if args.uploads:
+                call = lambda: executor.extract_bytes(jpeg)  # noqa: E731
+            else:
+                call = lambda: executor.extract(frame)  # noqa: E731
+            call()
+            for clients in args.clients:
+                print(f"{name:>8} | {clients:>8} | {throughput(call, clients, args.min_time):>10.1f}")
+    finally:
+        for executor in executors.values():
+            executor.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Galeria quantizada (app.pq_index.PQIndex) vs. matching exato float32:
+memória por rosto, recall@1, concordância dos matches e latência por probe.
+
+Por padrão usa uma galeria sintética; com --from-db usa a galeria do banco
+configurado (DATABASE_PATH). Os probes são encodings da própria galeria com
+ruído gaussiano. Com --mmap a matriz float32 é gravada em disco e mapeada
+(como no snapshot compartilhado), e o re-rank lê só as linhas candidatas.
+
+Uso:
+    python benchmarks/bench_quantized.py
+    python benchmarks/bench_quantized.py --synthetic 1000000 --shortlist 32 64 128 --mmap
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.gallery import Gallery, ENCODING_DIM  # noqa: E402
+from app.pq_index import PQIndex  # noqa: E402
+
+
+def load_gallery(args, tmp_dir):
+    if args.from_db:
+        from app.services.gallery_manager import GalleryManager
+        gallery, _ = GalleryManager()._build_from_db()
+    else:
+        rng = np.random.default_rng(1)
+        matrix = rng.normal(0.0, 0.09, size=(args.synthetic, ENCODING_DIM)).astype(np.float32)
+        ids = [f"face_{i}" for i in range(args.synthetic)]
+        gallery = Gallery(ids, ids, matrix)
+
+    if args.mmap and len(gallery):
+        path = os.path.join(tmp_dir, "gallery.npy")
+        np.save(path, gallery.matrix)
+        gallery = Gallery(gallery.face_ids, gallery.names, np.load(path, mmap_mode="r"))
+    return gallery
+
+
+def per_probe_ms(fn, probes, min_time=0.5):
+    """Latência média por probe, chamando fn com um probe por vez (como num frame)"""
+    calls = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < min_time:
+        fn(probes[calls % len(probes)][None, :])
+        calls += 1
+    return 1000 * (time.perf_counter() - start) / calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--synthetic", type=int, default=200000, help="rostos da galeria sintética")
+    parser.add_argument("--from-db", action="store_true", help="usa a galeria do banco")
+    parser.add_argument("--mmap", action="store_true", help="mapeia a matriz float32 do disco")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--noise", type=float, default=0.03, help="desvio do ruído por dimensão")
+    parser.add_argument("--tolerance", type=float, default=0.6)
+    parser.add_argument("--subspaces", type=int, default=16)
+    parser.add_argument("--shortlist", type=int, nargs="+", default=[16, 64, 256])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        gallery = load_gallery(args, tmp_dir)
+        if len(gallery) == 0:
+            print("Galeria vazia. Treine rostos primeiro ou use a galeria sintética.")
+            return 1
+
+        rng = np.random.default_rng(2)
+        rows = rng.choice(len(gallery), size=min(args.queries, len(gallery)), replace=False)
+        probes = (gallery.matrix[rows] + rng.normal(0.0, args.noise, size=(len(rows), ENCODING_DIM))).astype(np.float32)
+
+        exact_dist = gallery.distances(probes)
+        truth = exact_dist.argmin(axis=1)
+        truth_match = exact_dist[np.arange(len(rows)), truth] <= args.tolerance
+        exact_ms = per_probe_ms(lambda p: gallery.match(p, args.tolerance), probes)
+
+        index = PQIndex(subspaces=args.subspaces)
+        start = time.perf_counter()
+        index.build(gallery)
+        build_time = time.perf_counter() - start
+
+        n = len(gallery)
+        print(f"Galeria: {n} rostos | probes: {len(rows)} | build PQ: {build_time:.2f} s")
+        print(f"Memória por rosto: float32 {ENCODING_DIM * 4} B | códigos PQ {args.subspaces} B "
+              f"(alocado: {index.code_bytes / n:.1f} B)")
+        print(f"Exato: {exact_ms:.3f} ms/probe")
+        print(f"{'shortlist':>9} | {'recall@1':>8} | {'matches':>8} | {'ms/probe':>8} | {'speedup':>7}")
+        print("-" * 54)
+
+        for shortlist in args.shortlist:
+            results = index.search(probes, gallery, shortlist=shortlist)
+            found = np.array([gallery.position(face_id) if face_id else -1 for face_id, _ in results])
+            recall = float(np.mean(found == truth))
+            matched = np.array([distance <= args.tolerance for _, distance in results])
+            # Fração dos matches do modo exato que o PQ também encontra
+            match_recall = float(np.mean(matched[truth_match] & (found[truth_match] == truth[truth_match]))) \
+                if truth_match.any() else float("nan")
+
+            ms = per_probe_ms(lambda p: index.search(p, gallery, shortlist=shortlist), probes)
+            print(f"{shortlist:>9} | {recall:>8.3f} | {match_recall:>8.3f} | {ms:>8.3f} | {exact_ms / ms:>6.1f}x")
+
+        del gallery, index
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Throughput do matching com a galeria particionada entre processos
+(app.gallery_shards.ShardedGallery, GALLERY_SHARDS) vs. galeria única no
+próprio processo.
+
+Cria um banco temporário com --rows rostos sintéticos, confere que o top-k
+combinado dos shards é igual ao da galeria única e mede probes/s com
+--clients threads enviando lotes de --batch probes em paralelo.
+
+Uso:
+    python benchmarks/bench_shards.py
+    python benchmarks/bench_shards.py --rows 500000 --shards 1 2 4 8 --clients 4
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def throughput(fn, probes, batch, clients, min_time):
+    """Probes por segundo com `clients` threads chamando fn(lote) em paralelo"""
+    counts = [0] * clients
+    deadline = time.perf_counter() + min_time
+
+    def client(i):
+        offset = i * batch
+        while time.perf_counter() < deadline:
+            start = offset % (len(probes) - batch)
+            fn(probes[start:start + batch])
+            counts[i] += batch
+            offset += clients * batch
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return sum(counts) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--batch", type=int, default=8, help="probes por chamada (rostos por frame)")
+    parser.add_argument("--clients", type=int, default=2, help="threads chamando em paralelo")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=3.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Os processos dos shards herdam o ambiente e abrem o mesmo banco
+        os.environ["DATABASE_PATH"] = os.path.join(tmp, "bench.db")
+
+        from app.database import db, TrainedFace
+        from app.gallery import Gallery, ENCODING_DIM
+        from app.gallery_shards import ShardedGallery
+        from app.utils import encode_face_encoding
+
+        rng = np.random.default_rng(0)
+        encodings = rng.normal(0.0, 0.09, size=(args.rows, ENCODING_DIM)).astype(np.float32)
+        session = db.get_session()
+        try:
+            session.bulk_insert_mappings(TrainedFace, [
+                {"face_id": f"face_{i}", "name": f"Pessoa {i}", "encoding": encode_face_encoding(encoding)}
+                for i, encoding in enumerate(encodings)
+            ])
+            session.commit()
+        finally:
+            session.close()
+
+        gallery = Gallery([f"face_{i}" for i in range(args.rows)], [f"Pessoa {i}" for i in range(args.rows)], encodings)
+        probes = (encodings[rng.choice(args.rows, size=512)] + rng.normal(0.0, 0.03, size=(512, ENCODING_DIM))).astype(np.float32)
+        expected = gallery.top_k(probes[:32], args.k)
+
+        local_rate = throughput(lambda p: gallery.top_k(p, args.k), probes, args.batch, args.clients, args.min_time)
+        print(f"Linhas: {args.rows} | lote: {args.batch} probes | clientes: {args.clients} | CPUs: {os.cpu_count()}")
+        print(f"{'shards':>6} | {'início (s)':>10} | {'probes/s':>10} | {'vs. local':>9}")
+        print("-" * 46)
+        print(f"{'local':>6} | {'-':>10} | {local_rate:>10,.0f} | {1.0:>8.2f}x")
+
+        for num_shards in args.shards:
+            start = time.perf_counter()
+            shards = ShardedGallery(num_shards)
+            start_time = time.perf_counter() - start
+            try:
+                merged = shards.top_k(probes[:32], args.k)
+                assert [[c[0] for c in r] for r in merged] == [[c[0] for c in r] for r in expected], \
+                    "top-k dos shards diverge da galeria única"
+
+                rate = throughput(lambda p: shards.top_k(p, args.k), probes, args.batch, args.clients, args.min_time)
+                print(f"{num_shards:>6} | {start_time:>10.2f} | {rate:>10,.0f} | {rate / local_rate:>8.2f}x")
+            finally:
+                shards.close()
+
+
+if __name__ == "__main__":
+    main()
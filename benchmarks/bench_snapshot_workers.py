@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark de memória e tempo de carga por worker: galeria montada a partir do
+SQLite em cada processo vs. snapshot compartilhado mapeado em memória
+(GALLERY_SHARED_SNAPSHOT=true).
+
+A memória é medida como PSS/privada via /proc/self/smaps_rollup (Linux);
+em outros sistemas apenas o tempo de carga é exibido.
+
+Uso:
+    python benchmarks/bench_snapshot_workers.py --rows 50000 --workers 1 4 8
+"""
+
+import argparse
+import multiprocessing as mp
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def read_memory_kb():
+    """Retorna (pss, privada) em KB, ou (None, None) fora do Linux"""
+    try:
+        values = {}
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0].endswith(":"):
+                    values[parts[0][:-1]] = int(parts[1])
+        private = values.get("Private_Clean", 0) + values.get("Private_Dirty", 0)
+        return values.get("Pss"), private
+    except OSError:
+        return None, None
+
+
+def worker(env, barrier, results):
+    os.environ.update(env)
+    from app.services.face_service import FaceService
+
+    service = FaceService()
+    _, private_before = read_memory_kb()
+    barrier.wait()
+
+    start = time.perf_counter()
+    gallery = service._load_gallery()
+    # Toca todas as páginas da matriz, como uma busca real faria
+    gallery.match([np.zeros(128, dtype=np.float32)])
+    load_time = time.perf_counter() - start
+
+    pss, private_after = read_memory_kb()
+    delta = private_after - private_before if private_after is not None else None
+    results.put((load_time, pss, delta))
+
+
+def run(env, workers):
+    barrier = mp.Barrier(workers)
+    results = mp.Queue()
+    procs = [mp.Process(target=worker, args=(env, barrier, results)) for _ in range(workers)]
+    for p in procs:
+        p.start()
+    measurements = [results.get() for _ in procs]
+    for p in procs:
+        p.join()
+    return measurements
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        snapshot_dir = os.path.join(tmp, "gallery")
+        os.environ["DATABASE_PATH"] = db_path
+
+        from app.database import db
+        from app.utils import encode_face_encoding
+
+        rng = np.random.default_rng(0)
+        session = db.get_session()
+        try:
+            from app.database import TrainedFace
+            for i, encoding in enumerate(rng.normal(0.0, 0.09, size=(args.rows, 128))):
+                session.add(TrainedFace(face_id=f"face_{i}", name=f"Pessoa {i}", encoding=encode_face_encoding(encoding)))
+            session.commit()
+        finally:
+            session.close()
+
+        modes = {
+            "sqlite": {"DATABASE_PATH": db_path, "GALLERY_SHARED_SNAPSHOT": "false"},
+            "snapshot": {"DATABASE_PATH": db_path, "GALLERY_SHARED_SNAPSHOT": "true",
+                         "GALLERY_SNAPSHOT_DIR": snapshot_dir},
+        }
+
+        # Publica o snapshot antes de medir (equivale ao primeiro worker a subir)
+        run(modes["snapshot"], 1)
+
+        print(f"Linhas: {args.rows}")
+        print(f"{'modo':>9} | {'workers':>7} | {'carga média (ms)':>16} | {'privada/worker (MB)':>19} | {'PSS/worker (MB)':>15}")
+        print("-" * 82)
+        for mode, env in modes.items():
+            for workers in args.workers:
+                measurements = run(env, workers)
+                load_ms = 1000 * sum(m[0] for m in measurements) / workers
+                pss = [m[1] for m in measurements if m[1] is not None]
+                private = [m[2] for m in measurements if m[2] is not None]
+                pss_mb = f"{sum(pss) / len(pss) / 1024:.1f}" if pss else "n/d"
+                private_mb = f"{sum(private) / len(private) / 1024:.1f}" if private else "n/d"
+                print(f"{mode:>9} | {workers:>7} | {load_ms:>16.1f} | {private_mb:>19} | {pss_mb:>15}")
+
+
+if __name__ == "__main__":
+    main()
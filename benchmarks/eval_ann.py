@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Avaliação recall vs. latência do índice IVF (app.ann_index.IVFIndex) contra o
+matching exato, para escolher GALLERY_INDEX / IVF_NLIST / IVF_NPROBE.
+
+Por padrão usa a galeria do banco configurado (DATABASE_PATH); os probes são
+encodings da própria galeria com ruído gaussiano, simulando novas fotos das
+mesmas pessoas. Com --synthetic N gera uma galeria aleatória.
+
+Uso:
+    python benchmarks/eval_ann.py
+    python benchmarks/eval_ann.py --synthetic 100000 --nlist 256 1024 --nprobe 4 8 16 32
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.ann_index import IVFIndex  # noqa: E402
+from app.gallery import Gallery, ENCODING_DIM  # noqa: E402
+
+
+def load_gallery(args):
+    if args.synthetic:
+        rng = np.random.default_rng(1)
+        matrix = rng.normal(0.0, 0.09, size=(args.synthetic, ENCODING_DIM)).astype(np.float32)
+        ids = [f"face_{i}" for i in range(args.synthetic)]
+        return Gallery(ids, ids, matrix)
+
+    from app.services.gallery_manager import GalleryManager
+    gallery, _ = GalleryManager()._build_from_db()
+    return gallery
+
+
+def per_probe_ms(fn, probes, min_time=0.5):
+    """Latência média por probe, chamando fn com um probe por vez (como num frame)"""
+    calls = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < min_time:
+        fn(probes[calls % len(probes)][None, :])
+        calls += 1
+    return 1000 * (time.perf_counter() - start) / calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--synthetic", type=int, default=0, help="gera uma galeria aleatória com N rostos")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--noise", type=float, default=0.03, help="desvio do ruído por dimensão")
+    parser.add_argument("--tolerance", type=float, default=0.6)
+    parser.add_argument("--nlist", type=int, nargs="+", default=[0], help="0 = automático (√N)")
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    args = parser.parse_args()
+
+    gallery = load_gallery(args)
+    if len(gallery) == 0:
+        print("Galeria vazia. Use --synthetic N ou treine rostos primeiro.")
+        return 1
+
+    rng = np.random.default_rng(2)
+    rows = rng.choice(len(gallery), size=min(args.queries, len(gallery)), replace=False)
+    probes = (gallery.matrix[rows] + rng.normal(0.0, args.noise, size=(len(rows), ENCODING_DIM))).astype(np.float32)
+
+    exact_dist = gallery.distances(probes)
+    truth = exact_dist.argmin(axis=1)
+    truth_match = exact_dist[np.arange(len(rows)), truth] <= args.tolerance
+    exact_ms = per_probe_ms(lambda p: gallery.match(p, args.tolerance), probes)
+
+    print(f"Galeria: {len(gallery)} rostos | probes: {len(rows)} | exato: {exact_ms:.3f} ms/probe")
+    print(f"{'nlist':>6} | {'nprobe':>6} | {'build (s)':>9} | {'recall@1':>8} | {'matches':>8} | {'ms/probe':>8} | {'speedup':>7}")
+    print("-" * 70)
+
+    for nlist in args.nlist:
+        index = IVFIndex(nlist=nlist or None)
+        start = time.perf_counter()
+        index.build(gallery)
+        build_time = time.perf_counter() - start
+
+        for nprobe in args.nprobe:
+            results = index.search(probes, nprobe=nprobe)
+            found = np.array([gallery.position(face_id) if face_id else -1 for face_id, _ in results])
+            recall = float(np.mean(found == truth))
+            matched = np.array([distance <= args.tolerance for _, distance in results])
+            # Fração dos matches do modo exato que o índice também encontra
+            match_recall = float(np.mean(matched[truth_match] & (found[truth_match] == truth[truth_match]))) \
+                if truth_match.any() else float("nan")
+
+            ms = per_probe_ms(lambda p: index.search(p, nprobe=nprobe), probes)
+            print(f"{len(index.centroids):>6} | {nprobe:>6} | {build_time:>9.2f} | {recall:>8.3f} | "
+                  f"{match_recall:>8.3f} | {ms:>8.3f} | {exact_ms / ms:>6.1f}x")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Teste de estresse da galeria RCU (app.services.gallery_manager.GalleryManager):
+muitos leitores reconhecendo em paralelo com treinos, remoções, renomeações e
+rajadas de recarga.
+
+Verifica que:
+- todo snapshot lido é consistente (face_id, nome e encoding de cada linha
+  pertencem ao mesmo rosto, e o probe de uma linha casa com ela mesma);
+- leitores nunca esperam reconstruções;
+- rajadas de recarga são agrupadas (sem "tempestade" de reconstruções);
+- ao final, a galeria corresponde exatamente ao banco.
+
+Uso:
+    python benchmarks/stress_gallery.py --readers 16 --writers 4 --seconds 10
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def face_encoding(k, rng):
+    """Encoding cujo primeiro valor identifica o rosto (k)"""
+    encoding = rng.normal(0.0, 0.01, size=128).astype(np.float32)
+    encoding[0] = k
+    return encoding
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--readers", type=int, default=16)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--reloaders", type=int, default=2)
+    parser.add_argument("--initial", type=int, default=2000)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    os.environ["DATABASE_PATH"] = os.path.join(tmp, "stress.db")
+    os.environ["GALLERY_CONSISTENCY_INTERVAL"] = "1"
+
+    from app.database import db
+    from app.services.gallery_manager import GalleryManager
+    from app.utils import encode_face_encoding
+
+    rng = np.random.default_rng(0)
+    for k in range(args.initial):
+        db.add_trained_face(f"face_{k}", f"N{k}", encode_face_encoding(face_encoding(k, rng)))
+
+    manager = GalleryManager()
+    manager.current()
+
+    stop = threading.Event()
+    errors = []
+    reads = [0] * args.readers
+    max_read_time = [0.0] * args.readers
+    reload_requests = [0]
+    next_id = [args.initial]
+    id_lock = threading.Lock()
+
+    def reader(i):
+        local_rng = random.Random(i)
+        while not stop.is_set():
+            start = time.perf_counter()
+            gallery = manager.current()
+            max_read_time[i] = max(max_read_time[i], time.perf_counter() - start)
+
+            if len(gallery) == 0:
+                continue
+            live = gallery.face_ids
+            if len(live) != len(gallery):
+                errors.append(f"len inconsistente: {len(live)} != {len(gallery)}")
+            for face_id in local_rng.sample(live, min(4, len(live))):
+                row = gallery.position(face_id)
+                k = int(face_id.split("_")[1])
+                if gallery.name_at(row) not in (f"N{k}", f"R{k}") or int(gallery.encoding_at(row)[0]) != k:
+                    errors.append(f"linha rasgada: {face_id} / {gallery.name_at(row)}")
+                match = gallery.match([gallery.encoding_at(row)], tolerance=0.5)[0]
+                if match[1] != face_id:
+                    errors.append(f"match errado: {face_id} -> {match[1]}")
+            reads[i] += 1
+
+    def writer(i):
+        local_rng = np.random.default_rng(100 + i)
+        mine = []
+        while not stop.is_set():
+            action = local_rng.random()
+            if action < 0.5 or not mine:
+                with id_lock:
+                    k = next_id[0]
+                    next_id[0] += 1
+                encoding = face_encoding(k, local_rng)
+                face = db.add_trained_face(f"face_{k}", f"N{k}", encode_face_encoding(encoding))
+                manager.add(f"face_{k}", f"N{k}", encoding, face.id)
+                mine.append(k)
+            elif action < 0.8:
+                k = mine.pop(int(local_rng.integers(len(mine))))
+                if db.delete_trained_face(f"face_{k}"):
+                    manager.remove(f"face_{k}")
+            else:
+                k = mine[int(local_rng.integers(len(mine)))]
+                if db.update_face_name(f"face_{k}", f"R{k}"):
+                    manager.rename(f"face_{k}", f"R{k}")
+
+    def reloader(_):
+        while not stop.is_set():
+            manager.reload(wait=False)
+            reload_requests[0] += 1
+            time.sleep(0.001)
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(args.readers)]
+    threads += [threading.Thread(target=writer, args=(i,)) for i in range(args.writers)]
+    threads += [threading.Thread(target=reloader, args=(i,)) for i in range(args.reloaders)]
+    for t in threads:
+        t.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+
+    # Espera a fila esvaziar e confere contra o banco
+    manager.reload()
+    final = manager.current()
+    db_ids = sorted(row.face_id for row in db.get_gallery_rows())
+    if sorted(final.face_ids) != db_ids:
+        errors.append("galeria final difere do banco")
+
+    stats = manager.stats
+    print(f"Leituras: {sum(reads)} | maior espera de leitura: {max(max_read_time) * 1000:.3f} ms")
+    print(f"Pedidos de recarga: {reload_requests[0]} | reconstruções: {stats['rebuilds']} | "
+          f"deltas: {stats['deltas']} | publicações: {stats['publishes']} | compactações: {stats['compactions']}")
+    print(f"Rostos no final: {len(final)}")
+
+    if reload_requests[0] > 20 and stats["rebuilds"] > reload_requests[0] / 2:
+        errors.append("tempestade de reconstruções: recargas não foram agrupadas")
+
+    if errors:
+        print(f"❌ {len(errors)} erros, ex.: {errors[:5]}")
+        return 1
+    print("✅ Nenhuma leitura inconsistente")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
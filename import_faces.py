@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Importa rostos de uma árvore de diretórios, uma pasta por pessoa:
+
+    data/trained_faces/
+        Ana Silva/1.jpg
+        Ana Silva/2.jpg
+        João/foto.png
+
+O nome da pessoa é o da pasta que contém a foto; cada foto deve ter uma única
+face e vira um rosto (face_id gerado a partir do nome). Os encodings são
+extraídos em paralelo em processos worker; todos os rostos são gravados em uma
+única transação no final (se ela falhar, nada é salvo).
+
+Um servidor já rodando só passa a reconhecer os rostos importados quando a
+verificação de consistência da galeria detecta a diferença com o banco: até
+2 x GALLERY_CONSISTENCY_INTERVAL (padrão 60 s, ou seja, ~2 min).
+
+Uso:
+    python import_faces.py data/trained_faces
+    python import_faces.py fotos/ --workers 8
+    python import_faces.py fotos/ --backend thread --progress-every 100
+"""
+
+import argparse
+import functools
+import os
+import sys
+import time
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".webp")
+
+
+def find_images(root: str):
+    """(caminho relativo, nome da pessoa, caminho) de cada imagem, em ordem"""
+    images = []
+    for directory, subdirs, files in os.walk(root):
+        subdirs.sort()
+        for filename in sorted(files):
+            if not filename.lower().endswith(IMAGE_EXTENSIONS):
+                continue
+            path = os.path.join(directory, filename)
+            relative = os.path.relpath(path, root)
+            name = os.path.basename(directory) if directory != root else None
+            images.append((relative, name, path))
+    return images
+
+
+def read_file(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("directory", help="diretório com uma pasta por pessoa")
+    parser.add_argument("--workers", type=int, default=0, help="workers de inferência (0 = núcleos da máquina)")
+    parser.add_argument("--backend", choices=["process", "thread"], default="process",
+                        help="extração em processos worker ou em threads")
+    parser.add_argument("--progress-every", type=int, default=50, help="imagens entre as linhas de progresso")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.directory):
+        print(f"Diretório não encontrado: {args.directory}")
+        return 1
+
+    # Configura o executor de inferência antes de carregar o serviço
+    os.environ["INFERENCE_BACKEND"] = args.backend
+    if args.workers:
+        os.environ["INFERENCE_WORKERS"] = str(args.workers)
+
+    from app.services.face_service import face_service
+    from app.utils import FACE_RECOGNITION_AVAILABLE
+
+    if not FACE_RECOGNITION_AVAILABLE:
+        print("face_recognition não está instalado.")
+        return 1
+
+    found = find_images(args.directory)
+    if not found:
+        print("Nenhuma imagem encontrada.")
+        return 1
+    print(f"📂 {len(found)} imagens em {args.directory}")
+
+    images = [
+        (relative, name, None, functools.partial(read_file, path))
+        for relative, name, path in found
+    ]
+    try:
+        return import_images(face_service, images, args.progress_every)
+    finally:
+        # Encerra os workers de inferência e libera a memória compartilhada
+        face_service.close()
+
+
+def import_images(face_service, images, progress_every: int) -> int:
+    """Extrai e grava os rostos mostrando o progresso; retorna o código de saída"""
+    start = time.perf_counter()
+    done = accepted = 0
+    errors = []
+    try:
+        for _, filename, _, _, error in face_service.train_batch(images):
+            done += 1
+            if error:
+                errors.append((filename, error))
+                print(f"❌ {filename}: {error}")
+            else:
+                accepted += 1
+            if done % progress_every == 0 or done == len(images):
+                elapsed = time.perf_counter() - start
+                print(f"[{done}/{len(images)}] {accepted} ok, {len(errors)} erros, {done / elapsed:.1f} imagens/s")
+    except Exception as e:
+        print(f"Erro ao gravar rostos (nada foi salvo): {str(e)}")
+        return 1
+
+    elapsed = time.perf_counter() - start
+    print(f"✅ {accepted} rostos importados em {elapsed:.1f} s ({len(errors)} erros)")
+    interval = float(os.getenv("GALLERY_CONSISTENCY_INTERVAL", "60"))
+    print(f"ℹ️  Um servidor já rodando passa a reconhecê-los em até ~{2 * interval:.0f} s "
+          "(verificação de consistência da galeria)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
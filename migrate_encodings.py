@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Migração dos encodings JSON legados para o formato binário float32.
+
+A API também executa esta migração em segundo plano ao iniciar; este script
+permite rodá-la manualmente (e compactar o banco em seguida).
+
+Uso:
+    python migrate_encodings.py
+    python migrate_encodings.py --batch-size 1000 --vacuum
+"""
+
+import argparse
+import os
+import sys
+
+from app.database import db
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=500, help="linhas convertidas por transação")
+    parser.add_argument("--pause", type=float, default=0.0, help="pausa (s) entre lotes")
+    parser.add_argument("--vacuum", action="store_true", help="executa VACUUM ao final para reduzir o arquivo")
+    args = parser.parse_args()
+
+    db_path = db.engine.url.database
+    size_before = os.path.getsize(db_path) if db_path and os.path.exists(db_path) else None
+
+    converted = db.migrate_encodings_to_binary(batch_size=args.batch_size, pause_seconds=args.pause)
+    print(f"✅ {converted} encodings convertidos para o formato binário")
+
+    if args.vacuum:
+        db.vacuum()
+        if size_before is not None:
+            size_after = os.path.getsize(db_path)
+            print(f"🗜️  Banco compactado: {size_before / 1024:.1f} KB → {size_after / 1024:.1f} KB")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())